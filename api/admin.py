@@ -1,27 +1,14 @@
 # backend/api/admin.py
 
 from django.contrib import admin
-from django.conf import settings
 from django.utils.html import format_html
-from cryptography.fernet import Fernet
 
 # --- 1. Import SEMUA model, termasuk AkunGamingImage ---
 from .models import (
     AkunGaming, TopUpProduct, Pembelian, Kupon, TopUpPembelian, 
-    AkunGamingImage
+    AkunGamingImage, AntreanGambar, DashboardStats, EmailOutbox, MidtransInbox, MidtransNotifikasi
 )
-
-# --- Fungsi Helper Enkripsi ---
-def encrypt_data(data):
-    """Menerima string, mengembalikan string terenkripsi."""
-    if data is None:
-        return None
-    try:
-        f = Fernet(settings.FERNET_KEY)
-        return f.encrypt(data.encode()).decode()
-    except Exception as e:
-        print(f"Error encrypting data: {e}")
-        return None
+from .crypto import encrypt_data
 
 # --- Admin Model ---
 
@@ -49,8 +36,15 @@ class AkunGamingAdmin(admin.ModelAdmin):
              obj.akun_email = encrypt_data(form.cleaned_data['akun_email'])
         if form.cleaned_data.get('akun_password'):
             obj.akun_password = encrypt_data(form.cleaned_data['akun_password'])
+        if change and 'is_sold' in form.changed_data and obj.is_sold:
+            # Akun terjual tidak perlu reservasi checkout lagi (lihat api/reservasi.py).
+            obj.dipesan_oleh = None
+            obj.dipesan_hingga = None
             
         super().save_model(request, obj, form, change)
+        # Akun baru dicatat sinyal post_save; perubahan is_sold dicatat di sini.
+        if change and 'is_sold' in form.changed_data:
+            DashboardStats.catat_akun_terjual(obj.is_sold)
 
 @admin.register(TopUpProduct)
 class TopUpProductAdmin(admin.ModelAdmin):
@@ -66,8 +60,17 @@ class TopUpProductAdmin(admin.ModelAdmin):
     
     image_preview.short_description = 'Preview'
 
+class StatusPesananAdminMixin:
+    """Perubahan status pesanan lewat admin ikut dicatat di DashboardStats (revenue)."""
+
+    def save_model(self, request, obj, form, change):
+        status_lama = form.initial.get('status')
+        super().save_model(request, obj, form, change)
+        if change and 'status' in form.changed_data:
+            DashboardStats.catat_status_pesanan(obj, status_lama)
+
 @admin.register(Pembelian)
-class PembelianAdmin(admin.ModelAdmin):
+class PembelianAdmin(StatusPesananAdminMixin, admin.ModelAdmin):
     list_display = ('kode_transaksi', 'pembeli', 'akun', 'harga_total', 'status', 'dibuat_pada')
     list_filter = ('status', 'akun__game')
     search_fields = ('kode_transaksi', 'pembeli__username', 'akun__nama_akun')
@@ -78,17 +81,45 @@ class PembelianAdmin(admin.ModelAdmin):
 
 @admin.register(Kupon)
 class KuponAdmin(admin.ModelAdmin):
-    list_display = ('kode', 'diskon_persen', 'aktif', 'dibuat_pada')
+    list_display = ('kode', 'diskon_persen', 'aktif', 'jumlah_pengguna', 'total_diskon', 'dibuat_pada')
     search_fields = ('kode',)
     list_filter = ('aktif',)
     filter_horizontal = ('digunakan_oleh',)
+    # Counter dijaga sinyal m2m_changed dan webhook (Kupon.catat_diskon), bukan input manual.
+    readonly_fields = ('jumlah_pengguna', 'total_diskon')
 
 @admin.register(TopUpPembelian)
-class TopUpPembelianAdmin(admin.ModelAdmin):
+class TopUpPembelianAdmin(StatusPesananAdminMixin, admin.ModelAdmin):
     list_display = ('kode_transaksi', 'pembeli', 'produk', 'game_user_id', 'harga_pembelian', 'status', 'tanggal_pembelian')
     list_filter = ('status', 'produk__game')
     search_fields = ('pembeli__username', 'game_user_id', 'kode_transaksi')
     
     readonly_fields = ('kode_transaksi', 'pembeli', 'produk', 'game_user_id', 
                        'game_zone_id', 'harga_pembelian', 'harga_asli', 
-                       'kupon', 'midtrans_token', 'tanggal_pembelian')
\ No newline at end of file
+                       'kupon', 'midtrans_token', 'tanggal_pembelian')
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('subjek', 'penerima', 'status', 'percobaan', 'kirim_setelah', 'terkirim_pada')
+    list_filter = ('status',)
+    search_fields = ('penerima', 'subjek')
+    readonly_fields = ('dibuat_pada', 'terkirim_pada', 'error_terakhir', 'klaim_hingga')
+
+@admin.register(MidtransNotifikasi)
+class MidtransNotifikasiAdmin(admin.ModelAdmin):
+    list_display = ('order_id', 'transaction_status', 'transaction_id', 'diterima_pada')
+    list_filter = ('transaction_status',)
+    search_fields = ('order_id', 'transaction_id')
+
+@admin.register(MidtransInbox)
+class MidtransInboxAdmin(admin.ModelAdmin):
+    list_display = ('order_id', 'status', 'hasil', 'percobaan', 'diterima_pada', 'diproses_pada')
+    list_filter = ('status',)
+    search_fields = ('order_id',)
+    readonly_fields = ('payload', 'diterima_pada', 'diproses_pada', 'error_terakhir')
+
+@admin.register(AntreanGambar)
+class AntreanGambarAdmin(admin.ModelAdmin):
+    list_display = ('model', 'object_id', 'status', 'percobaan', 'proses_setelah', 'diproses_pada')
+    list_filter = ('status', 'model')
+    readonly_fields = ('dibuat_pada', 'diproses_pada', 'error_terakhir', 'klaim_hingga')
@@ -0,0 +1,386 @@
+"""
+Import massal AkunGaming dari file CSV atau NDJSON (satu objek JSON per baris).
+
+File dibaca baris demi baris (tidak dimuat utuh ke memori) lalu diproses per
+chunk: gambar diambil (URL diunduh paralel, atau dibaca dari zip pendamping),
+kredensial dienkripsi sekaligus dengan satu instance Fernet, lalu akun dan
+galerinya dimasukkan dengan bulk_create. Baris yang tidak valid dilaporkan dan
+dilewati tanpa menggagalkan baris lain.
+
+Kolom: nama_akun, game, harga, akun_email, akun_password, gambar (wajib);
+level, deskripsi, images (opsional). `gambar` dan `images` berisi URL http(s)
+atau nama file di dalam zip; di CSV, beberapa `images` dipisah dengan '|'.
+
+bulk_create tidak mengirim sinyal, jadi efek sinyal (DashboardStats, cache
+katalog, antrean turunan gambar) diterapkan manual per chunk. Index pencarian
+diisi trigger database.
+
+Gambar disimpan ke storage sebelum insert. File milik baris yang akhirnya gagal
+dihapus lagi, kecuali dipakai baris lain yang berhasil.
+"""
+import csv
+import io
+import json
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, UnidentifiedImageError
+
+from . import catalog_cache, images
+from .crypto import encrypt_many
+from .models import AkunGaming, AkunGamingImage, DashboardStats
+
+FORMATS = ('csv', 'ndjson')
+KOLOM_WAJIB = ('nama_akun', 'game', 'harga', 'akun_email', 'akun_password', 'gambar')
+GAME_VALID = {kode for kode, _ in AkunGaming.GAME_CHOICES}
+HARGA_MAKS = Decimal('99999999.99')
+PANJANG_KREDENSIAL = AkunGaming._meta.get_field('akun_email').max_length
+
+
+class BarisTidakValid(ValueError):
+    pass
+
+
+def tebak_format(nama_file):
+    ext = os.path.splitext(nama_file or '')[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    return None
+
+
+# --- Parsing ---
+
+def baca_baris(file, format):
+    """
+    Generator (nomor baris, dict data, pesan error). File biner dibaca sebagai
+    UTF-8 secara streaming; nomor baris CSV dihitung dari baris header = 1.
+    """
+    teks = io.TextIOWrapper(file, encoding='utf-8-sig', newline='' if format == 'csv' else None)
+    try:
+        if format == 'csv':
+            reader = csv.DictReader(teks)
+            for data in reader:
+                yield reader.line_num, data, None
+            return
+        for nomor, baris in enumerate(teks, 1):
+            if not baris.strip():
+                continue
+            try:
+                data = json.loads(baris)
+            except json.JSONDecodeError as e:
+                yield nomor, None, f"JSON tidak valid: {e.msg}"
+                continue
+            if not isinstance(data, dict):
+                yield nomor, None, "Setiap baris harus berupa objek JSON."
+                continue
+            yield nomor, data, None
+    finally:
+        # Jangan ikut menutup file milik pemanggil.
+        teks.detach()
+
+
+def _teks(data, kolom):
+    nilai = data.get(kolom)
+    return '' if nilai is None else str(nilai).strip()
+
+
+def _daftar_gambar(nilai):
+    if not nilai:
+        return []
+    if isinstance(nilai, list):
+        return [str(ref).strip() for ref in nilai if str(ref).strip()]
+    return [ref.strip() for ref in str(nilai).split('|') if ref.strip()]
+
+
+def validasi(data):
+    """Membersihkan satu baris; melempar BarisTidakValid dengan pesan untuk admin."""
+    kosong = [kolom for kolom in KOLOM_WAJIB if not _teks(data, kolom)]
+    if kosong:
+        raise BarisTidakValid(f"Kolom wajib kosong: {', '.join(kosong)}.")
+
+    nama_akun = _teks(data, 'nama_akun')
+    if len(nama_akun) > AkunGaming._meta.get_field('nama_akun').max_length:
+        raise BarisTidakValid('nama_akun terlalu panjang.')
+    game = _teks(data, 'game')
+    if game not in GAME_VALID:
+        raise BarisTidakValid(f"Game '{game}' tidak dikenal.")
+    try:
+        harga = Decimal(_teks(data, 'harga'))
+    except InvalidOperation:
+        raise BarisTidakValid('harga harus berupa angka.')
+    if not harga.is_finite() or harga <= 0 or harga > HARGA_MAKS:
+        raise BarisTidakValid('harga tidak valid.')
+    level = _teks(data, 'level') or '1'
+    try:
+        level = int(level)
+    except ValueError:
+        raise BarisTidakValid('level harus berupa bilangan bulat.')
+    if level < 1:
+        raise BarisTidakValid('level minimal 1.')
+
+    return {
+        'nama_akun': nama_akun,
+        'game': game,
+        'harga': harga.quantize(Decimal('0.01')),
+        'level': level,
+        'deskripsi': _teks(data, 'deskripsi'),
+        'akun_email': _teks(data, 'akun_email'),
+        'akun_password': _teks(data, 'akun_password'),
+        'gambar': _teks(data, 'gambar'),
+        'images': _daftar_gambar(data.get('images')),
+    }
+
+
+# --- Gambar ---
+
+class SumberGambar:
+    """
+    Mengambil isi gambar dari URL http(s) atau dari zip pendamping, dan menyimpan
+    setiap referensi sekali ke storage (dipakai ulang jika beberapa baris memakai
+    gambar yang sama). File yang baru disimpan dicatat sampai ditandai dipakai
+    (barisnya sudah di-insert) atau dibuang.
+    """
+
+    def __init__(self, zip_file=None):
+        self.zip = zipfile.ZipFile(zip_file) if zip_file else None
+        self._zip_lock = threading.Lock()
+        self._tersimpan = {}
+        self._baru = {}  # nama file -> (field, ref), belum direferensikan baris mana pun
+        self._session = requests.Session()
+
+    def _unduh(self, url):
+        batas = settings.AKUN_IMPORT_IMAGE_MAX_BYTES
+        with self._session.get(url, timeout=settings.AKUN_IMPORT_IMAGE_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            data = bytearray()
+            for potongan in response.iter_content(64 * 1024):
+                data += potongan
+                if len(data) > batas:
+                    raise ValueError('ukuran gambar melebihi batas')
+        return bytes(data)
+
+    def _baca_zip(self, nama):
+        if self.zip is None:
+            raise ValueError('bukan URL http(s) dan tidak ada file zip')
+        with self._zip_lock:
+            try:
+                info = self.zip.getinfo(nama)
+            except KeyError:
+                raise ValueError('tidak ada di zip')
+            if info.file_size > settings.AKUN_IMPORT_IMAGE_MAX_BYTES:
+                raise ValueError('ukuran gambar melebihi batas')
+            return self.zip.read(info)
+
+    def ambil(self, ref):
+        """Isi gambar (bytes) yang sudah dicek Pillow; melempar ValueError."""
+        try:
+            if ref.startswith(('http://', 'https://')):
+                data = self._unduh(ref)
+            else:
+                data = self._baca_zip(ref)
+            with Image.open(io.BytesIO(data)) as gambar:
+                gambar.verify()
+        except UnidentifiedImageError:
+            raise ValueError(f"Gambar '{ref}' tidak bisa dipakai: bukan file gambar yang valid")
+        except (requests.RequestException, OSError, ValueError) as e:
+            raise ValueError(f"Gambar '{ref}' tidak bisa dipakai: {e}")
+        return data
+
+    def ambil_banyak(self, refs):
+        """{ref: bytes atau ValueError}; URL diunduh paralel."""
+        refs = list(dict.fromkeys(refs))
+
+        def aman(ref):
+            try:
+                return self.ambil(ref)
+            except ValueError as e:
+                return e
+
+        with ThreadPoolExecutor(settings.AKUN_IMPORT_DOWNLOAD_WORKERS) as pool:
+            return dict(zip(refs, pool.map(aman, refs)))
+
+    def simpan(self, field, instance, ref, data):
+        """Menyimpan gambar ke storage field; nama yang sama dipakai ulang per (field, ref)."""
+        tersimpan = self._tersimpan.setdefault(field, {})
+        if ref not in tersimpan:
+            nama_file = os.path.basename(ref.split('?', 1)[0]) or 'gambar'
+            nama = field.generate_filename(instance, nama_file)
+            tersimpan[ref] = field.storage.save(nama, ContentFile(data), max_length=field.max_length)
+            self._baru[tersimpan[ref]] = (field, ref)
+        return tersimpan[ref]
+
+    def tandai_dipakai(self, nama_file):
+        """File sudah direferensikan baris yang berhasil di-insert; tidak boleh dibuang."""
+        for nama in nama_file:
+            self._baru.pop(nama, None)
+
+    def buang(self, nama_file):
+        """Menghapus file yang belum dipakai baris mana pun (baris yang memakainya gagal)."""
+        for nama in nama_file:
+            if nama not in self._baru:
+                continue
+            field, ref = self._baru.pop(nama)
+            # Baris berikutnya dengan ref yang sama menyimpan ulang filenya.
+            self._tersimpan[field].pop(ref, None)
+            field.storage.delete(nama)
+
+    def close(self):
+        self.buang(list(self._baru))
+        self._session.close()
+        if self.zip is not None:
+            self.zip.close()
+
+
+# --- Insert ---
+
+def _simpan_chunk(rows):
+    """Insert akun + galeri untuk satu chunk dan terapkan efek sinyal. rows: [(akun, [gambar galeri])]."""
+    with transaction.atomic():
+        akuns = AkunGaming.objects.bulk_create([akun for akun, _ in rows])
+        galeri = []
+        for akun, nama_galeri in rows:
+            galeri += [AkunGamingImage(akun=akun, gambar=nama) for nama in nama_galeri]
+        galeri = AkunGamingImage.objects.bulk_create(galeri)
+
+        DashboardStats.tambah(akun_tersedia=len(akuns))
+        scopes = set()
+        for akun in akuns:
+            scopes.update(catalog_cache.akun_scopes(game=akun.game))
+        catalog_cache.bump_on_commit(*scopes)
+        images.antrekan([*akuns, *galeri])
+    return akuns
+
+
+def _proses_chunk(chunk, sumber):
+    """
+    Memproses [(nomor, data bersih)]. Mengembalikan (jumlah berhasil, [(nomor, error)],
+    [pesan tingkat chunk]).
+    """
+    errors = []
+    refs = [ref for _, data in chunk for ref in (data['gambar'], *data['images'])]
+    isi_gambar = sumber.ambil_banyak(refs)
+
+    siap = []
+    for nomor, data in chunk:
+        gagal = next(
+            (isi_gambar[ref] for ref in (data['gambar'], *data['images'])
+             if isinstance(isi_gambar.get(ref), ValueError)),
+            None,
+        )
+        if gagal is not None:
+            errors.append((nomor, str(gagal)))
+        else:
+            siap.append((nomor, data))
+
+    emails = encrypt_many([data['akun_email'] for _, data in siap])
+    passwords = encrypt_many([data['akun_password'] for _, data in siap])
+    field_cover = AkunGaming._meta.get_field('gambar')
+    field_galeri = AkunGamingImage._meta.get_field('gambar')
+
+    rows = []
+    # File baris yang gagal; dibuang di akhir chunk karena file yang sama (ref sama)
+    # bisa dipakai baris lain yang berhasil.
+    dibuang = []
+    for (nomor, data), email, password in zip(siap, emails, passwords):
+        if len(email) > PANJANG_KREDENSIAL or len(password) > PANJANG_KREDENSIAL:
+            errors.append((nomor, 'akun_email/akun_password terlalu panjang setelah dienkripsi.'))
+            continue
+        akun = AkunGaming(
+            nama_akun=data['nama_akun'], game=data['game'], harga=data['harga'], level=data['level'],
+            deskripsi=data['deskripsi'], akun_email=email, akun_password=password,
+        )
+        nama_file = []
+        try:
+            akun.gambar = sumber.simpan(field_cover, akun, data['gambar'], isi_gambar.get(data['gambar']))
+            nama_file.append(akun.gambar.name)
+            nama_galeri = []
+            for ref in data['images']:
+                nama_galeri.append(sumber.simpan(field_galeri, AkunGamingImage(akun=akun), ref, isi_gambar.get(ref)))
+                nama_file.append(nama_galeri[-1])
+        except Exception as e:
+            errors.append((nomor, f"Gagal menyimpan gambar: {e}"))
+            dibuang += nama_file
+            continue
+        rows.append((nomor, akun, nama_galeri, nama_file))
+
+    berhasil = 0
+    catatan = []
+    try:
+        if rows:
+            _simpan_chunk([(akun, galeri) for _, akun, galeri, _ in rows])
+            sumber.tandai_dipakai([nama for *_, nama_file in rows for nama in nama_file])
+            berhasil = len(rows)
+    except Exception as e:
+        catatan.append(f"Bulk insert chunk gagal ({e}), mengulang per baris.")
+        # Satu baris bermasalah tidak boleh menggagalkan baris lain di chunk yang sama.
+        for nomor, akun, galeri, nama_file in rows:
+            akun.pk = None
+            akun._state.adding = True
+            try:
+                _simpan_chunk([(akun, galeri)])
+                berhasil += 1
+                sumber.tandai_dipakai(nama_file)
+            except Exception as e:
+                errors.append((nomor, f"Gagal menyimpan: {e}"))
+                dibuang += nama_file
+    sumber.buang(dibuang)
+    return berhasil, errors, catatan
+
+
+def impor_akun(file, format, zip_file=None, chunk_size=None):
+    """
+    Generator event progres (dict) untuk import `file` (file biner):
+      {'event': 'error', 'baris': n, 'error': '...'} untuk setiap baris yang dilewati,
+      {'event': 'error', 'baris': None, 'error': '...'} untuk masalah di luar satu baris,
+      {'event': 'progress', 'diproses': n, 'berhasil': n, 'gagal': n} setiap chunk,
+      {'event': 'selesai', ...} di akhir.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Format harus salah satu dari: {', '.join(FORMATS)}.")
+    chunk_size = max(1, chunk_size or settings.AKUN_IMPORT_CHUNK_SIZE)
+    sumber = SumberGambar(zip_file)
+    diproses = berhasil = gagal = 0
+
+    def selesaikan(chunk):
+        nonlocal berhasil, gagal
+        jumlah, errors, catatan = _proses_chunk(chunk, sumber)
+        berhasil += jumlah
+        gagal += len(errors)
+        for pesan in catatan:
+            yield {'event': 'error', 'baris': None, 'error': pesan}
+        for nomor, pesan in sorted(errors):
+            yield {'event': 'error', 'baris': nomor, 'error': pesan}
+        yield {'event': 'progress', 'diproses': diproses, 'berhasil': berhasil, 'gagal': gagal}
+
+    try:
+        chunk = []
+        for nomor, data, error in baca_baris(file, format):
+            diproses += 1
+            if error is None:
+                try:
+                    chunk.append((nomor, validasi(data)))
+                except BarisTidakValid as e:
+                    error = str(e)
+            if error is not None:
+                gagal += 1
+                yield {'event': 'error', 'baris': nomor, 'error': error}
+            if len(chunk) >= chunk_size:
+                yield from selesaikan(chunk)
+                chunk = []
+        if chunk:
+            yield from selesaikan(chunk)
+    except UnicodeDecodeError:
+        gagal += 1
+        yield {'event': 'error', 'baris': None, 'error': 'File harus berenkoding UTF-8.'}
+    finally:
+        sumber.close()
+    yield {'event': 'selesai', 'diproses': diproses, 'berhasil': berhasil, 'gagal': gagal}
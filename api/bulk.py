@@ -0,0 +1,263 @@
+"""
+Mutasi massal untuk dashboard admin: ubah harga, update field, hapus produk,
+aktif/nonaktifkan kupon, semuanya dalam satu request dan satu transaksi.
+
+Request berisi daftar operasi, misal:
+
+    {"operations": [
+        {"op": "harga", "tipe": "AKUN", "filter": {"game": "Mobile Legends"}, "persen": 10},
+        {"op": "update", "tipe": "TOPUP", "items": [{"id": 3, "harga": 15000}]},
+        {"op": "hapus", "tipe": "AKUN", "ids": [7, 8]},
+        {"op": "kupon_aktif", "ids": [1, 2], "aktif": false}
+    ]}
+
+Target operasi ditentukan `ids` atau `filter` (game, min_harga, max_harga, dan
+untuk AKUN: min_level, max_level, is_sold; default hanya akun yang belum terjual).
+Operasi dengan `filter` dibatasi ADMIN_BULK_MAX_ITEMS baris seperti `ids`, dan
+wajib menyertakan `konfirmasi_jumlah` yang sama dengan jumlah baris yang cocok,
+misal {"op": "hapus", "tipe": "AKUN", "filter": {...}, "konfirmasi_jumlah": 12}.
+Perubahan ditulis dengan QuerySet.update()/bulk_update(), jadi tanpa save() per
+baris. Karena itu efek sinyal diterapkan di sini: diperbarui_pada, cache katalog
+(dinaikkan sekali per request lewat catalog_cache.batch()), cache kupon, dan
+ringkasan rating jika game akun diganti. Jika satu operasi tidak valid, seluruh
+request dibatalkan.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, Min
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from . import catalog_cache, kupon_cache
+from .facets import FilterTidakValid, filter_rentang
+from .models import AkunGaming, Kupon, RingkasanRating, TopUpProduct
+
+HARGA_MAKS = Decimal('99999999.99')
+
+# tipe -> (model, fungsi scope cache, field yang boleh diubah lewat op update)
+TIPE = {
+    'AKUN': (AkunGaming, catalog_cache.akun_scopes, ('nama_akun', 'game', 'level', 'deskripsi', 'harga')),
+    'TOPUP': (TopUpProduct, catalog_cache.topup_scopes, ('nama_paket', 'game', 'harga')),
+}
+
+
+class OperasiTidakValid(ValueError):
+    def __init__(self, index, pesan):
+        super().__init__(pesan)
+        self.index = index
+
+
+def _tipe(index, op):
+    tipe = op.get('tipe')
+    if tipe not in TIPE:
+        raise OperasiTidakValid(index, 'tipe harus AKUN atau TOPUP.')
+    return tipe
+
+
+def _ids(index, nilai):
+    if not isinstance(nilai, list) or not nilai:
+        raise OperasiTidakValid(index, 'ids harus berupa list id yang tidak kosong.')
+    if len(nilai) > settings.ADMIN_BULK_MAX_ITEMS:
+        raise OperasiTidakValid(index, f'Maksimal {settings.ADMIN_BULK_MAX_ITEMS} id per operasi.')
+    try:
+        return [int(pk) for pk in nilai]
+    except (TypeError, ValueError):
+        raise OperasiTidakValid(index, 'ids harus berisi angka.')
+
+
+def _filter(index, op, tipe):
+    """Queryset dari `filter` operasi."""
+    model = TIPE[tipe][0]
+    filter_op = op.get('filter')
+    if not isinstance(filter_op, dict) or not filter_op:
+        raise OperasiTidakValid(index, 'Operasi membutuhkan ids atau filter.')
+    dikenal = {'game', 'min_harga', 'max_harga'}
+    if tipe == 'AKUN':
+        dikenal |= {'min_level', 'max_level', 'is_sold'}
+    asing = set(filter_op) - dikenal
+    if asing:
+        raise OperasiTidakValid(index, f"Filter tidak dikenal: {', '.join(sorted(asing))}.")
+    try:
+        filter_harga, filter_level = filter_rentang(filter_op)
+    except FilterTidakValid as e:
+        raise OperasiTidakValid(index, str(e))
+
+    queryset = model.objects.filter(filter_harga, filter_level)
+    if filter_op.get('game'):
+        queryset = queryset.filter(game=filter_op['game'])
+    if tipe == 'AKUN':
+        queryset = queryset.filter(is_sold=bool(filter_op.get('is_sold', False)))
+    return queryset
+
+
+def _target(index, op, tipe):
+    """
+    Mengunci baris target dari `ids` atau `filter`. Mengembalikan (queryset per pk
+    untuk baris yang terkunci, [(id, game)]). Baris yang masuk filter setelah dikunci
+    tidak ikut diubah.
+    """
+    model = TIPE[tipe][0]
+    dari_filter = 'ids' not in op
+    queryset = _filter(index, op, tipe) if dari_filter else model.objects.filter(pk__in=_ids(index, op['ids']))
+    batas = settings.ADMIN_BULK_MAX_ITEMS
+    # Urut pk supaya dua request yang beririsan mengunci baris dengan urutan yang sama.
+    baris = list(queryset.select_for_update().order_by('pk').values_list('id', 'game')[:batas + 1])
+    if dari_filter:
+        if len(baris) > batas:
+            raise OperasiTidakValid(
+                index, f'Filter mengenai {queryset.count()} baris; maksimal {batas} baris per operasi.'
+            )
+        konfirmasi = op.get('konfirmasi_jumlah')
+        if isinstance(konfirmasi, bool) or konfirmasi != len(baris):
+            raise OperasiTidakValid(
+                index, f'Filter mengenai {len(baris)} baris; kirim konfirmasi_jumlah: {len(baris)} untuk melanjutkan.'
+            )
+    return model.objects.filter(pk__in=[pk for pk, _ in baris]), baris
+
+
+def _desimal(index, op, kunci):
+    try:
+        return Decimal(str(op[kunci]))
+    except (InvalidOperation, TypeError, ValueError):
+        raise OperasiTidakValid(index, f'{kunci} harus berupa angka.')
+
+
+def _catat_scope(tipe, baris):
+    """baris: iterable (id, game)."""
+    scopes_fn = TIPE[tipe][1]
+    scopes = set()
+    for pk, game in baris:
+        scopes.update(scopes_fn(pk, game))
+    catalog_cache.bump_on_commit(*scopes)
+
+
+# --- Operasi ---
+
+def op_harga(index, op):
+    tipe = _tipe(index, op)
+    pilihan = [kunci for kunci in ('set', 'persen', 'tambah') if kunci in op]
+    if len(pilihan) != 1:
+        raise OperasiTidakValid(index, 'Isi tepat satu dari: set, persen, tambah.')
+    nilai = _desimal(index, op, pilihan[0])
+    queryset, baris = _target(index, op, tipe)
+    if pilihan[0] == 'set':
+        harga_baru = nilai.quantize(Decimal('0.01'))
+        rentang = {'terendah': harga_baru, 'tertinggi': harga_baru}
+    else:
+        if pilihan[0] == 'persen':
+            harga_baru = Round(F('harga') * (1 + nilai / 100), 2, output_field=DecimalField())
+        else:
+            harga_baru = ExpressionWrapper(F('harga') + nilai, output_field=DecimalField())
+        # Cek hasil untuk semua baris sebelum menulis (satu aggregate).
+        rentang = queryset.aggregate(terendah=Min(harga_baru), tertinggi=Max(harga_baru))
+    if rentang['terendah'] is not None and (rentang['terendah'] <= 0 or rentang['tertinggi'] > HARGA_MAKS):
+        raise OperasiTidakValid(index, 'Harga hasil perubahan harus lebih dari 0 dan tidak melebihi batas.')
+
+    jumlah = queryset.update(harga=harga_baru, diperbarui_pada=timezone.now())
+    _catat_scope(tipe, baris)
+    return jumlah
+
+
+def op_update(index, op):
+    tipe = _tipe(index, op)
+    model, _, boleh = TIPE[tipe]
+    items = op.get('items')
+    if not isinstance(items, list) or not items:
+        raise OperasiTidakValid(index, 'items harus berupa list yang tidak kosong.')
+    if len(items) > settings.ADMIN_BULK_MAX_ITEMS:
+        raise OperasiTidakValid(index, f'Maksimal {settings.ADMIN_BULK_MAX_ITEMS} item per operasi.')
+
+    perubahan = {}
+    for item in items:
+        if not isinstance(item, dict) or 'id' not in item:
+            raise OperasiTidakValid(index, 'Setiap item harus berupa objek dengan id.')
+        asing = set(item) - {'id', *boleh}
+        if asing:
+            raise OperasiTidakValid(index, f"Field tidak bisa diubah: {', '.join(sorted(asing))}.")
+        try:
+            perubahan[int(item['id'])] = {k: v for k, v in item.items() if k != 'id'}
+        except (TypeError, ValueError):
+            raise OperasiTidakValid(index, 'id harus berupa angka.')
+
+    objs = {obj.pk: obj for obj in model.objects.select_for_update().filter(pk__in=perubahan)}
+    hilang = set(perubahan) - set(objs)
+    if hilang:
+        raise OperasiTidakValid(index, f"{tipe} tidak ditemukan: {', '.join(map(str, sorted(hilang)))}.")
+
+    sekarang = timezone.now()
+    fields = {'diperbarui_pada'}
+    baris = []
+    game_berubah = set()
+    for pk, data in perubahan.items():
+        obj = objs[pk]
+        game_lama = obj.game
+        for field, nilai in data.items():
+            setattr(obj, field, nilai)
+            fields.add(field)
+        obj.diperbarui_pada = sekarang
+        try:
+            obj.clean_fields(exclude=[f.name for f in model._meta.fields if f.name not in data])
+        except ValidationError as e:
+            pesan = '; '.join(f"{field}: {' '.join(errors)}" for field, errors in e.message_dict.items())
+            raise OperasiTidakValid(index, f'{tipe} #{pk}: {pesan}')
+        if 'harga' in data and obj.harga <= 0:
+            raise OperasiTidakValid(index, f'{tipe} #{pk}: harga harus lebih dari 0.')
+        baris += [(pk, obj.game), (pk, game_lama)]
+        if tipe == 'AKUN' and obj.game != game_lama:
+            game_berubah |= {game_lama, obj.game}
+
+    model.objects.bulk_update(list(objs.values()), sorted(fields))
+    _catat_scope(tipe, baris)
+    # Ulasan ikut pindah game bersama akunnya.
+    for game in game_berubah:
+        RingkasanRating.rebuild(game)
+        catalog_cache.bump_on_commit(catalog_cache.ulasan_scope(game))
+    return len(objs)
+
+
+def op_hapus(index, op):
+    tipe = _tipe(index, op)
+    queryset, _ = _target(index, op, tipe)
+    # delete() tetap mengirim sinyal per objek (DashboardStats, ringkasan rating);
+    # bump cache dari sinyal itu dikumpulkan catalog_cache.batch().
+    _, per_model = queryset.delete()
+    return per_model.get(queryset.model._meta.label, 0)
+
+
+def op_kupon_aktif(index, op):
+    if not isinstance(op.get('aktif'), bool):
+        raise OperasiTidakValid(index, 'aktif harus true atau false.')
+    jumlah = Kupon.objects.filter(pk__in=_ids(index, op.get('ids'))).update(aktif=op['aktif'])
+    kupon_cache.invalidate()
+    return jumlah
+
+
+OPERASI = {
+    'harga': op_harga,
+    'update': op_update,
+    'hapus': op_hapus,
+    'kupon_aktif': op_kupon_aktif,
+}
+
+
+def jalankan(operations):
+    """
+    Menjalankan semua operasi dalam satu transaksi. Mengembalikan list
+    {'op': ..., 'jumlah': baris terpengaruh}; melempar OperasiTidakValid.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise OperasiTidakValid(None, 'operations harus berupa list yang tidak kosong.')
+    if len(operations) > settings.ADMIN_BULK_MAX_OPERATIONS:
+        raise OperasiTidakValid(None, f'Maksimal {settings.ADMIN_BULK_MAX_OPERATIONS} operasi per request.')
+
+    hasil = []
+    with transaction.atomic(), catalog_cache.batch():
+        for index, op in enumerate(operations):
+            fungsi = OPERASI.get(op.get('op')) if isinstance(op, dict) else None
+            if fungsi is None:
+                raise OperasiTidakValid(index, f"op harus salah satu dari: {', '.join(OPERASI)}.")
+            hasil.append({'op': op['op'], 'jumlah': fungsi(index, op)})
+    return hasil
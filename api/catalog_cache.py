@@ -0,0 +1,181 @@
+"""
+Cache respons untuk endpoint katalog publik (list/detail akun, produk top up,
+ulasan per game).
+
+Setiap entri cache memuat nomor versi dari "scope" datanya, misal `akun:game:Valorant`,
+`akun:semua` atau `akun:12`. Saat data berubah, cukup nomor versi scope terkait
+yang dinaikkan (satu `incr` per scope); entri lama tidak pernah dibaca lagi dan
+hilang sendiri saat timeout. Jadi invalidasi O(1), tanpa perlu mencari atau
+menghapus key.
+
+Hanya request anonim yang di-cache, karena respons untuk user login memuat data
+personal (misal `is_favorited`).
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+KEY_PREFIX = 'katalog'
+# Atribut request tempat @conditional (api/conditional.py) menyimpan ETag respons.
+ATRIBUT_ETAG = '_katalog_etag'
+
+_lokal = threading.local()
+
+
+def _cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _version_key(scope):
+    # Nama game bisa berisi spasi/karakter lain yang tidak aman untuk memcached.
+    return f'{KEY_PREFIX}:v:{hashlib.sha1(scope.encode()).hexdigest()}'
+
+
+def _versi_awal():
+    # Nilai awal berbasis waktu: jika key versi ter-evict, versi baru tidak akan
+    # bertabrakan dengan versi lama yang entrinya mungkin masih ada di cache.
+    return time.time_ns()
+
+
+def get_versions(scopes):
+    cache = _cache()
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: _versi_awal() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Menaikkan versi scope, sehingga semua respons ter-cache untuk scope itu basi."""
+    cache = _cache()
+    scopes = set(scopes)
+    if len(scopes) > 1:
+        # Versi baru berbasis waktu dalam satu set_many: satu round trip untuk
+        # berapapun jumlah scope (misal update massal ribuan akun).
+        versi = _versi_awal()
+        cache.set_many({_version_key(scope): versi for scope in scopes}, timeout=None)
+        return
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _versi_awal(), timeout=None)
+
+
+def bump_on_commit(*scopes):
+    """
+    bump() setelah transaksi commit. Jika dinaikkan sebelum commit, request lain
+    bisa mengisi ulang cache dengan data lama yang belum ter-commit.
+    Di dalam batch(), scope hanya dikumpulkan.
+    """
+    kumpulan = getattr(_lokal, 'batch', None)
+    if kumpulan is not None:
+        kumpulan.update(scopes)
+        return
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+@contextmanager
+def batch():
+    """
+    Mengumpulkan semua bump_on_commit() (termasuk dari sinyal) selama blok ini,
+    lalu menaikkan semuanya sekali setelah commit. Untuk operasi massal.
+    """
+    if getattr(_lokal, 'batch', None) is not None:
+        # Batch bersarang ikut batch terluar.
+        yield
+        return
+    _lokal.batch = kumpulan = set()
+    try:
+        yield
+    finally:
+        _lokal.batch = None
+    if kumpulan:
+        transaction.on_commit(lambda: bump(*kumpulan))
+
+
+def akun_scopes(akun_id=None, game=None):
+    scopes = ['akun:semua']
+    if game:
+        scopes.append(f'akun:game:{game}')
+    if akun_id is not None:
+        scopes.append(f'akun:{akun_id}')
+    return scopes
+
+
+def topup_scopes(produk_id=None, game=None):
+    scopes = ['topup:semua']
+    if game:
+        scopes.append(f'topup:game:{game}')
+    if produk_id is not None:
+        scopes.append(f'topup:{produk_id}')
+    return scopes
+
+
+def ulasan_scope(game):
+    return f'ulasan:{game}'
+
+
+def game_scope(namespace, request):
+    """Scope list per game: `<namespace>:game:<game>`, atau `<namespace>:semua` tanpa filter."""
+    game = request.query_params.get('game')
+    if game and game != 'semua':
+        return [f'{namespace}:game:{game}']
+    return [f'{namespace}:semua']
+
+
+def _normalized_params(request, params):
+    items = []
+    for name in sorted(params):
+        values = sorted(v for v in request.query_params.getlist(name) if v != '')
+        if values:
+            items.append((name, values))
+    return items
+
+
+def cache_katalog(scopes, params=()):
+    """
+    Decorator untuk view katalog (pasang di bawah @api_view, atau lewat
+    method_decorator di method `get` class-based view).
+
+    `scopes(request, **kwargs)` mengembalikan daftar scope yang menentukan versi
+    respons. Hanya query parameter di `params` yang masuk key, diurutkan, sehingga
+    `?a=1&b=2` dan `?b=2&a=1` berbagi entri dan parameter asing tidak membuat
+    entri baru. Jika view juga dipasangi @conditional, ETag-nya ikut masuk key.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+
+            cache = _cache()
+            versions = get_versions(scopes(request, **kwargs))
+            raw = repr((
+                view.__module__, view.__qualname__, request.scheme, request.get_host(), sorted(kwargs.items()),
+                _normalized_params(request, params), versions,
+                getattr(request, ATRIBUT_ETAG, None),
+            ))
+            key = f'{KEY_PREFIX}:r:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,129 @@
+"""
+Request bersyarat (If-None-Match / If-Modified-Since) untuk endpoint katalog.
+
+Validator (ETag dan Last-Modified) dihitung dari kolom `diperbarui_pada` dengan
+satu aggregate atau satu lookup pk, tanpa membangun body respons. Jika klien
+masih memegang versi yang sama, view tidak dijalankan sama sekali dan yang
+dikirim hanya 304.
+
+Status "dipesan" (is_reserved) berubah sendiri saat `dipesan_hingga` lewat, sebelum
+`diperbarui_pada` ikut diperbarui oleh release_expired_reservations. Karena itu
+reservasi yang sudah lewat ikut dihitung sebagai waktu perubahan terakhir.
+ETag juga disimpan di request (catalog_cache.ATRIBUT_ETAG) supaya cache_katalog memakainya
+sebagai bagian key: body yang di-cache selalu cocok dengan ETag-nya.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .catalog_cache import ATRIBUT_ETAG
+from .facets import minta_facets
+from .models import AkunGaming, TopUpProduct
+
+FavoritAkun = AkunGaming.favorited_by.through
+
+
+def _etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def _favorit_user(request):
+    """Jejak daftar favorit user (jumlah, id relasi terbesar); None untuk anonim."""
+    if not request.user.is_authenticated:
+        return None
+    hasil = FavoritAkun.objects.filter(user_id=request.user.pk).aggregate(jumlah=Count('id'), terakhir=Max('id'))
+    return request.user.pk, hasil['jumlah'], hasil['terakhir']
+
+
+def _terbaru(*waktu):
+    waktu = [w for w in waktu if w is not None]
+    return max(waktu) if waktu else None
+
+
+def _filter_game(queryset, request):
+    if minta_facets(request):
+        # Facet game ikut berubah jika akun game lain berubah.
+        return queryset
+    game = request.query_params.get('game')
+    if game and game != 'semua':
+        queryset = queryset.filter(game=game)
+    return queryset
+
+
+def _list_validators(nama, queryset, request, per_user=False, reservasi=False):
+    # Seluruh baris game (termasuk yang terjual) ikut dihitung: akun yang baru terjual
+    # punya diperbarui_pada terbaru, dan akun yang dihapus mengubah jumlah.
+    # Count('diperbarui_pada') (bukan Count('id')) supaya cukup index-only scan.
+    aggregates = {'terakhir': Max('diperbarui_pada'), 'jumlah': Count('diperbarui_pada')}
+    if reservasi:
+        # Reservasi terakhir yang sudah lewat tapi belum dibersihkan: saat itulah
+        # is_reserved berubah menjadi False.
+        aggregates['lewat'] = Max('dipesan_hingga', filter=Q(dipesan_hingga__lte=timezone.now()))
+    hasil = _filter_game(queryset, request).aggregate(**aggregates)
+    terakhir = _terbaru(hasil['terakhir'], hasil.get('lewat'))
+    favorit = _favorit_user(request) if per_user else None
+    etag = _etag(nama, request.query_params.get('game'), terakhir, hasil['jumlah'], favorit)
+    # Untuk user login, perubahan favorit tidak punya timestamp: andalkan ETag saja.
+    last_modified = terakhir if favorit is None else None
+    return etag, last_modified
+
+
+def akun_list_validators(request):
+    return _list_validators('akun', AkunGaming.objects.all(), request, per_user=True, reservasi=True)
+
+
+def akun_detail_validators(request, pk):
+    baris = AkunGaming.objects.filter(pk=pk).values_list('diperbarui_pada', 'dipesan_hingga').first()
+    if baris is None:
+        return None, None
+    diperbarui_pada, dipesan_hingga = baris
+    if dipesan_hingga and dipesan_hingga <= timezone.now():
+        diperbarui_pada = _terbaru(diperbarui_pada, dipesan_hingga)
+        dipesan = False
+    else:
+        dipesan = dipesan_hingga is not None
+    favorit = None
+    if request.user.is_authenticated:
+        favorit = FavoritAkun.objects.filter(user_id=request.user.pk, akungaming_id=pk).exists()
+    etag = _etag('akun', pk, diperbarui_pada, dipesan, request.user.pk, favorit)
+    return etag, diperbarui_pada if favorit is None else None
+
+
+def topup_list_validators(request):
+    return _list_validators('topup', TopUpProduct.objects.all(), request)
+
+
+def conditional(validators):
+    """
+    Decorator seperti django.views.decorators.http.condition, tapi ETag dan
+    Last-Modified dihitung bersamaan oleh `validators(request, **kwargs)` (satu
+    query). Pasang di bawah @api_view supaya request.user sudah diautentikasi DRF.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            etag, last_modified = validators(request, **kwargs)
+            setattr(request, ATRIBUT_ETAG, etag)
+            if etag is None and last_modified is None:
+                # Misal objek tidak ada: biarkan view yang menjawab (404).
+                return view(request, *args, **kwargs)
+
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                if timestamp and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(timestamp)
+                response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,120 @@
+"""
+Enkripsi kredensial akun (akun_email/akun_password) dengan Fernet.
+
+Kunci diambil dari settings.FERNET_KEYS (kunci terbaru di depan). Semua kunci
+dipakai untuk dekripsi, tapi enkripsi selalu memakai kunci pertama, jadi kunci bisa
+dirotasi tanpa downtime: tambahkan kunci baru di depan, jalankan
+`manage.py reencrypt_credentials`, lalu hapus kunci lama.
+
+Objek MultiFernet dibuat sekali per daftar kunci dan dipakai ulang, bukan dibuat
+ulang di setiap panggilan.
+
+Token yang tidak bisa didekripsi melempar DekripsiGagal; pemanggil yang memutuskan
+apa yang ditampilkan atau apakah prosesnya harus diulang.
+"""
+import threading
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Teks pengganti untuk tampilan (API riwayat pesanan), bukan untuk email.
+DEKRIPSI_GAGAL = "Gagal Mendekripsi Data"
+
+_lock = threading.Lock()
+_cache = {}
+
+
+class DekripsiGagal(Exception):
+    """Token tidak valid untuk FERNET_KEYS saat ini (rusak atau kuncinya sudah dihapus)."""
+
+
+def get_keys():
+    keys = tuple(key for key in (settings.FERNET_KEYS or ()) if key)
+    if not keys:
+        raise ImproperlyConfigured("FERNET_KEYS (atau FERNET_KEY) belum diisi.")
+    return keys
+
+
+def _build(keys):
+    try:
+        fernets = [Fernet(key) for key in keys]
+    except (TypeError, ValueError) as e:
+        raise ImproperlyConfigured(f"FERNET_KEYS tidak valid: {e}")
+    return MultiFernet(fernets), fernets[0]
+
+
+def _get(keys=None):
+    keys = keys or get_keys()
+    cached = _cache.get(keys)
+    if cached is None:
+        with _lock:
+            cached = _cache.get(keys)
+            if cached is None:
+                _cache.clear()
+                cached = _cache[keys] = _build(keys)
+    return cached
+
+
+def get_fernet():
+    """MultiFernet untuk daftar kunci saat ini (di-cache)."""
+    return _get()[0]
+
+
+def encrypt_data(data):
+    """Mengenkripsi string dengan kunci terbaru. String kosong/None menjadi None."""
+    if not data:
+        return None
+    return get_fernet().encrypt(data.encode()).decode()
+
+
+def decrypt_data(encrypted_data):
+    """
+    Mendekripsi token dengan kunci mana pun di FERNET_KEYS. Token yang rusak atau
+    dienkripsi dengan kunci yang sudah dihapus melempar DekripsiGagal.
+    """
+    if not encrypted_data:
+        return None
+    try:
+        return get_fernet().decrypt(encrypted_data.encode()).decode()
+    except InvalidToken as e:
+        raise DekripsiGagal("Token tidak valid untuk FERNET_KEYS saat ini") from e
+
+
+def encrypt_many(values):
+    """Versi batch dari encrypt_data(): list masuk, list keluar dengan urutan sama."""
+    fernet = get_fernet()
+    return [fernet.encrypt(value.encode()).decode() if value else None for value in values]
+
+
+def decrypt_many(values):
+    """Versi batch dari decrypt_data(). Melempar DekripsiGagal pada token pertama yang gagal."""
+    fernet = get_fernet()
+    hasil = []
+    for index, value in enumerate(values):
+        if not value:
+            hasil.append(None)
+            continue
+        try:
+            hasil.append(fernet.decrypt(value.encode()).decode())
+        except InvalidToken as e:
+            raise DekripsiGagal(f"Token ke-{index} tidak valid untuk FERNET_KEYS saat ini") from e
+    return hasil
+
+
+def rotate_token(encrypted_data, keys=None):
+    """
+    Mengenkripsi ulang token dengan kunci terbaru. Mengembalikan None jika token
+    sudah memakai kunci terbaru (tidak perlu ditulis ulang).
+    Melempar InvalidToken jika token tidak bisa dibaca dengan kunci mana pun.
+    """
+    if not encrypted_data:
+        return None
+    fernet, primary = _get(keys)
+    token = encrypted_data.encode()
+    try:
+        primary.decrypt(token)
+        return None
+    except InvalidToken:
+        pass
+    return fernet.rotate(token).decode()
@@ -0,0 +1,199 @@
+"""
+Upload gambar langsung dari dashboard admin ke media storage (signed upload),
+supaya byte gambar tidak melewati worker gunicorn.
+
+Alur:
+  1. POST /api/admin/uploads/sign/ {'tujuan': 'akun_galeri', 'jumlah': 3}
+     -> per file: public_id, upload_url, fields, expires_at.
+  2. Browser mengirim multipart `fields` + `file` langsung ke `upload_url`.
+  3. Endpoint create/update produk hanya menerima public_id tersebut
+     (`gambar`, `images[]`).
+
+public_id dibuat server (folder upload_to field + nama acak), jadi klien tidak
+bisa menimpa file lain. Sebelum dipakai, public_id dicek polanya dan
+keberadaannya di storage.
+
+Backend dipilih dari storage field:
+  - MediaCloudinaryStorage: parameter upload bertanda tangan Cloudinary.
+  - Lainnya (filesystem untuk development/test): endpoint lokal
+    /api/uploads/local/ dengan kontrak yang sama, ditandatangani django.core.signing.
+"""
+import re
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import cloudinary
+import cloudinary.utils
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .models import AkunGaming, AkunGamingImage, TopUpProduct
+
+# tujuan -> (model, nama field gambar)
+TUJUAN = {
+    'akun_gambar': (AkunGaming, 'gambar'),
+    'akun_galeri': (AkunGamingImage, 'gambar'),
+    'topup_gambar': (TopUpProduct, 'gambar'),
+}
+FORMAT_DIIZINKAN = ('jpg', 'jpeg', 'png', 'webp', 'gif')
+
+
+class UploadTidakValid(ValueError):
+    pass
+
+
+def _field(tujuan):
+    model, nama = TUJUAN[tujuan]
+    return model._meta.get_field(nama)
+
+
+class UploadBackend:
+    # Batas atas masa berlaku tanda tangan dari sisi storage (detik), None = tanpa batas.
+    masa_berlaku_maks = None
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def masa_berlaku(self):
+        ttl = settings.DIRECT_UPLOAD_TTL_SECONDS
+        return min(ttl, self.masa_berlaku_maks) if self.masa_berlaku_maks else ttl
+
+    def folder(self, tujuan):
+        """Awalan public_id untuk `tujuan` (sama dengan nama file di storage)."""
+        return _field(tujuan).upload_to.rstrip('/')
+
+    def buat_public_id(self, tujuan):
+        return f"{self.folder(tujuan)}/up_{secrets.token_hex(16)}"
+
+    def tanda_tangani(self, public_id, request):
+        """(upload_url, fields) untuk satu upload."""
+        raise NotImplementedError
+
+
+class CloudinaryUploadBackend(UploadBackend):
+    # Cloudinary menolak tanda tangan dengan timestamp lebih tua dari 1 jam.
+    masa_berlaku_maks = 3600
+
+    def folder(self, tujuan):
+        # MediaCloudinaryStorage menyimpan file dengan public_id berawalan MEDIA_URL ("media/...").
+        return self.storage._prepend_prefix(super().folder(tujuan))
+
+    def tanda_tangani(self, public_id, request):
+        config = cloudinary.config()
+        # Cloudinary tidak punya parameter kedaluwarsa: timestamp dimundurkan supaya
+        # jendela 1 jamnya habis tepat setelah masa_berlaku() detik.
+        params = {
+            'public_id': public_id,
+            'timestamp': int(time.time()) - (self.masa_berlaku_maks - self.masa_berlaku()),
+            'tags': self.storage.TAG,
+            'allowed_formats': ','.join(FORMAT_DIIZINKAN),
+            'overwrite': 'false',
+        }
+        params['signature'] = cloudinary.utils.api_sign_request(params, config.api_secret)
+        params['api_key'] = config.api_key
+        url = cloudinary.utils.cloudinary_api_url('upload', resource_type=self.storage.RESOURCE_TYPE)
+        return url, params
+
+
+class LocalUploadBackend(UploadBackend):
+    salt = 'api.direct_upload'
+
+    def tanda_tangani(self, public_id, request):
+        fields = {'public_id': public_id, 'token': signing.dumps(public_id, salt=self.salt)}
+        return request.build_absolute_uri(reverse('upload_lokal')), fields
+
+    def terima(self, fields, file):
+        """Menyimpan file yang dikirim ke endpoint lokal. Mengembalikan public_id."""
+        public_id = fields.get('public_id')
+        try:
+            valid = signing.loads(fields.get('token') or '', salt=self.salt,
+                                  max_age=self.masa_berlaku()) == public_id
+        except signing.BadSignature:
+            valid = False
+        if not valid:
+            raise UploadTidakValid('Tanda tangan upload tidak valid atau sudah kedaluwarsa.')
+        if file is None:
+            raise UploadTidakValid('File wajib diunggah.')
+        if file.size > settings.DIRECT_UPLOAD_MAX_BYTES:
+            raise UploadTidakValid('Ukuran file melebihi batas.')
+        try:
+            with Image.open(file) as img:
+                format_gambar = (img.format or '').lower()
+                img.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            raise UploadTidakValid('File bukan gambar yang valid.')
+        if format_gambar not in FORMAT_DIIZINKAN:
+            raise UploadTidakValid(f"Format gambar harus salah satu dari: {', '.join(FORMAT_DIIZINKAN)}.")
+        # Sama seperti overwrite=false di Cloudinary.
+        if self.storage.exists(public_id):
+            raise UploadTidakValid('public_id sudah dipakai.')
+        file.seek(0)
+        return self.storage.save(public_id, file)
+
+
+BACKENDS = {
+    'MediaCloudinaryStorage': CloudinaryUploadBackend,
+}
+
+
+def get_upload_backend(tujuan):
+    storage = _field(tujuan).storage
+    # default_storage adalah LazyObject; __class__ mengembalikan kelas storage aslinya.
+    return BACKENDS.get(storage.__class__.__name__, LocalUploadBackend)(storage)
+
+
+def buat_upload(tujuan, jumlah, request):
+    """Parameter upload bertanda tangan untuk `jumlah` file ke `tujuan`."""
+    backend = get_upload_backend(tujuan)
+    kedaluwarsa = timezone.now() + timedelta(seconds=backend.masa_berlaku())
+    hasil = []
+    for _ in range(jumlah):
+        public_id = backend.buat_public_id(tujuan)
+        url, fields = backend.tanda_tangani(public_id, request)
+        hasil.append({
+            'public_id': public_id,
+            'upload_url': url,
+            'method': 'POST',
+            'file_field': 'file',
+            'fields': fields,
+            'expires_at': kedaluwarsa.isoformat(),
+        })
+    return hasil
+
+
+def daftar(data, kunci):
+    """Nilai list dari form (`kunci` berulang) atau body JSON (`kunci` berupa list)."""
+    if hasattr(data, 'getlist'):
+        return data.getlist(kunci)
+    nilai = data.get(kunci) or []
+    return nilai if isinstance(nilai, list) else [nilai]
+
+
+def verifikasi(per_tujuan):
+    """
+    per_tujuan: {tujuan: [public_id, ...]}. Memastikan setiap public_id dibuat
+    untuk tujuan itu dan filenya sudah ada di storage. Melempar UploadTidakValid.
+    """
+    cek = []
+    for tujuan, ids in per_tujuan.items():
+        backend = get_upload_backend(tujuan)
+        pola = re.compile(re.escape(backend.folder(tujuan)) + r'/up_[0-9a-f]{32}')
+        for public_id in ids:
+            if not isinstance(public_id, str) or not pola.fullmatch(public_id):
+                raise UploadTidakValid(f"public_id gambar tidak valid untuk {tujuan}: {public_id}")
+            cek.append((backend.storage, public_id))
+    if not cek:
+        return
+
+    # exists() di Cloudinary adalah satu HEAD request per file, jadi dicek paralel.
+    workers = max(1, min(settings.DIRECT_UPLOAD_VERIFY_WORKERS, len(cek)))
+    with ThreadPoolExecutor(workers) as pool:
+        ada = list(pool.map(lambda item: item[0].exists(item[1]), cek))
+    hilang = [public_id for (_, public_id), sudah in zip(cek, ada) if not sudah]
+    if hilang:
+        raise UploadTidakValid(f"Gambar belum diunggah: {', '.join(hilang)}")
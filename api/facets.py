@@ -0,0 +1,145 @@
+"""
+Filter rentang (harga, level) dan facet untuk katalog akun.
+
+Facet dihitung dengan SATU query GROUP BY (game, bucket harga, bucket level,
+lolos filter harga, lolos filter level). Hasilnya paling banyak beberapa ratus
+baris, lalu dijumlahkan di Python. Setiap facet mengabaikan filternya sendiri
+(facet game tetap menampilkan game lain saat `game` dipilih, dst.) tapi
+mengikuti filter lainnya, jadi UI bisa menampilkan "berapa hasil jika opsi ini
+dipilih" tanpa request tambahan.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import BooleanField, Case, Count, IntegerField, Q, Value, When
+
+from .models import AkunGaming
+
+# Rentang [min, max); None = tanpa batas atas.
+HARGA_BUCKETS = [
+    (0, 100_000),
+    (100_000, 250_000),
+    (250_000, 500_000),
+    (500_000, 1_000_000),
+    (1_000_000, 2_500_000),
+    (2_500_000, None),
+]
+LEVEL_BUCKETS = [
+    (0, 30),
+    (30, 60),
+    (60, 100),
+    (100, 150),
+    (150, None),
+]
+
+
+class FilterTidakValid(ValueError):
+    pass
+
+
+def minta_facets(request):
+    """
+    True jika request meminta blok facets (`facets=1`). Facet game menghitung
+    semua game, jadi cache dan validator list tidak boleh dibatasi per game.
+    """
+    return request.query_params.get('facets') in ('1', 'true')
+
+
+def _angka(params, nama, jenis):
+    nilai = params.get(nama)
+    if nilai in (None, ''):
+        return None
+    try:
+        hasil = jenis(nilai)
+    except (ValueError, InvalidOperation):
+        raise FilterTidakValid(f"Parameter '{nama}' harus berupa angka.")
+    if hasil < 0:
+        raise FilterTidakValid(f"Parameter '{nama}' tidak boleh negatif.")
+    return hasil
+
+
+def filter_rentang(params):
+    """
+    Membaca min_harga/max_harga/min_level/max_level (inklusif) dari query params.
+    Mengembalikan (Q harga, Q level); melempar FilterTidakValid.
+    """
+    min_harga = _angka(params, 'min_harga', Decimal)
+    max_harga = _angka(params, 'max_harga', Decimal)
+    min_level = _angka(params, 'min_level', int)
+    max_level = _angka(params, 'max_level', int)
+    if min_harga is not None and max_harga is not None and min_harga > max_harga:
+        raise FilterTidakValid('min_harga tidak boleh lebih besar dari max_harga.')
+    if min_level is not None and max_level is not None and min_level > max_level:
+        raise FilterTidakValid('min_level tidak boleh lebih besar dari max_level.')
+
+    harga = Q()
+    if min_harga is not None:
+        harga &= Q(harga__gte=min_harga)
+    if max_harga is not None:
+        harga &= Q(harga__lte=max_harga)
+    level = Q()
+    if min_level is not None:
+        level &= Q(level__gte=min_level)
+    if max_level is not None:
+        level &= Q(level__lte=max_level)
+    return harga, level
+
+
+def _bucket(field, buckets):
+    return Case(
+        *[When(**{f'{field}__lt': atas}, then=Value(i)) for i, (_, atas) in enumerate(buckets) if atas is not None],
+        default=Value(len(buckets) - 1),
+        output_field=IntegerField(),
+    )
+
+
+def _lolos(kondisi):
+    # When() tidak menerima Q() kosong: tanpa filter, semua baris lolos.
+    if not kondisi:
+        return Value(True, output_field=BooleanField())
+    return Case(When(kondisi, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+def hitung_facets(queryset, game=None, filter_harga=Q(), filter_level=Q()):
+    """
+    `queryset` adalah katalog dengan filter yang berlaku untuk semua facet (akun
+    belum terjual, pencarian `q`), tanpa filter game/harga/level.
+    """
+    sel = (
+        queryset.order_by()
+        .annotate(
+            bucket_harga=_bucket('harga', HARGA_BUCKETS),
+            bucket_level=_bucket('level', LEVEL_BUCKETS),
+            lolos_harga=_lolos(filter_harga),
+            lolos_level=_lolos(filter_level),
+        )
+        .values('game', 'bucket_harga', 'bucket_level', 'lolos_harga', 'lolos_level')
+        .annotate(jumlah=Count('id'))
+    )
+
+    per_game = {kode: 0 for kode, _ in AkunGaming.GAME_CHOICES}
+    per_harga = [0] * len(HARGA_BUCKETS)
+    per_level = [0] * len(LEVEL_BUCKETS)
+    total = 0
+    for s in sel:
+        cocok_game = not game or s['game'] == game
+        if s['lolos_harga'] and s['lolos_level']:
+            per_game[s['game']] = per_game.get(s['game'], 0) + s['jumlah']
+            if cocok_game:
+                total += s['jumlah']
+        if cocok_game and s['lolos_level']:
+            per_harga[s['bucket_harga']] += s['jumlah']
+        if cocok_game and s['lolos_harga']:
+            per_level[s['bucket_level']] += s['jumlah']
+
+    return {
+        'total': total,
+        'game': [{'value': kode, 'count': jumlah} for kode, jumlah in per_game.items()],
+        'harga': [
+            {'min': bawah, 'max': atas, 'count': jumlah}
+            for (bawah, atas), jumlah in zip(HARGA_BUCKETS, per_harga)
+        ],
+        'level': [
+            {'min': bawah, 'max': atas, 'count': jumlah}
+            for (bawah, atas), jumlah in zip(LEVEL_BUCKETS, per_level)
+        ],
+    }
@@ -0,0 +1,26 @@
+"""
+Menyimpan galeri akun dari gambar yang sudah ada di media storage (public_id
+hasil upload langsung, lihat api/direct_upload.py). Semua baris dimasukkan
+dengan satu bulk_create.
+"""
+from django.utils import timezone
+
+from . import catalog_cache, images
+from .models import AkunGaming, AkunGamingImage
+
+
+def simpan(akun, nama_file):
+    """
+    Memasukkan baris galeri untuk file yang sudah diunggah dengan satu bulk_create.
+    bulk_create tidak mengirim sinyal, jadi efek sinyal galeri (diperbarui_pada
+    akun, cache katalog, antrean turunan gambar) diterapkan di sini.
+    """
+    if not nama_file:
+        return []
+    galeri = AkunGamingImage.objects.bulk_create(
+        [AkunGamingImage(akun=akun, gambar=nama) for nama in nama_file]
+    )
+    AkunGaming.objects.filter(pk=akun.pk).update(diperbarui_pada=timezone.now())
+    catalog_cache.bump_on_commit(*catalog_cache.akun_scopes(akun.pk, akun.game))
+    images.antrekan(galeri)
+    return galeri
@@ -0,0 +1,54 @@
+"""
+Resize dan encode gambar dengan Pillow, tanpa Django. Modul ini sengaja tidak
+mengimpor settings/model supaya bisa dijalankan di process pool (spawn) tanpa
+setup Django; pemanggilnya (api/images.py) yang memberikan ukuran dan kualitas.
+"""
+import io
+
+from PIL import Image, ImageOps
+
+FORMAT = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def _siapkan(gambar):
+    gambar = ImageOps.exif_transpose(gambar)
+    if gambar.mode not in ('RGB', 'RGBA'):
+        gambar = gambar.convert('RGBA' if 'transparency' in gambar.info or gambar.mode in ('LA', 'PA') else 'RGB')
+    return gambar
+
+
+def _tanpa_alpha(gambar):
+    # JPEG tidak punya kanal alpha: tempel di atas latar putih.
+    if gambar.mode != 'RGBA':
+        return gambar
+    latar = Image.new('RGB', gambar.size, (255, 255, 255))
+    latar.paste(gambar, mask=gambar.getchannel('A'))
+    return latar
+
+
+def _encode(gambar, ext, quality):
+    buffer = io.BytesIO()
+    if ext == 'jpeg':
+        _tanpa_alpha(gambar).save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        gambar.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def render(data, sizes, quality):
+    """
+    Membuat turunan dari bytes gambar asli untuk setiap {ukuran: lebar maksimum}.
+    Mengembalikan {ukuran: (width, height, {ext: bytes})}.
+    """
+    with Image.open(io.BytesIO(data)) as asli:
+        asli.load()
+        asli = _siapkan(asli)
+    hasil = {}
+    for ukuran, lebar_maks in sizes.items():
+        gambar = asli
+        if asli.width > lebar_maks:
+            # Tidak pernah memperbesar gambar kecil.
+            tinggi = max(1, round(asli.height * lebar_maks / asli.width))
+            gambar = asli.resize((lebar_maks, tinggi), Image.Resampling.LANCZOS)
+        hasil[ukuran] = (gambar.width, gambar.height, {ext: _encode(gambar, ext, quality) for ext in FORMAT})
+    return hasil
@@ -0,0 +1,253 @@
+"""
+Ukuran turunan gambar katalog (thumbnail, card, full) dalam WebP dan JPEG.
+
+Gambar asli tetap disimpan apa adanya di field `gambar`. Setelah upload, sinyal
+memasukkan objek ke AntreanGambar; worker (`manage.py process_image_jobs`)
+membuat turunannya dengan Pillow lalu menyimpan peta nama filenya di
+`gambar_turunan`:
+
+    {'sumber': 'account_images/a.png',
+     'thumbnail': {'width': 160, 'height': 90, 'webp': '...', 'jpeg': '...'}, ...}
+
+`sumber` mencatat gambar asli yang dipakai; jika gambar diganti, turunan lama
+dianggap tidak ada sampai worker selesai membuat yang baru. Serializer membaca
+peta ini lewat `srcset()` tanpa query atau akses storage.
+
+Render dan upload turunan berjalan tanpa kunci baris; kunci hanya dipegang
+sebentar saat hasilnya diterapkan (terapkan_turunan), dengan cek ulang `sumber`.
+"""
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connection as db_connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import image_render
+from .image_render import FORMAT
+from .models import AntreanGambar
+
+MAX_BACKOFF = timedelta(hours=1)
+# Model yang punya field `gambar` + `gambar_turunan`.
+MODEL_GAMBAR = ('api.akungaming', 'api.akungamingimage', 'api.topupproduct')
+
+
+def turunan_berlaku(instance):
+    """Peta turunan milik gambar saat ini, atau None jika belum/tidak ada."""
+    turunan = instance.gambar_turunan or {}
+    if not instance.gambar or turunan.get('sumber') != instance.gambar.name:
+        return None
+    return turunan
+
+
+def srcset(instance, request=None):
+    """{'thumbnail': {'width', 'height', 'webp': url, 'jpeg': url}, ...} atau None."""
+    turunan = turunan_berlaku(instance)
+    if turunan is None:
+        return None
+    storage = instance.gambar.storage
+    hasil = {}
+    for ukuran in settings.IMAGE_DERIVATIVE_SIZES:
+        data = turunan.get(ukuran)
+        if not data:
+            continue
+        hasil[ukuran] = {'width': data['width'], 'height': data['height']}
+        for ext in FORMAT:
+            url = storage.url(data[ext])
+            hasil[ukuran][ext] = request.build_absolute_uri(url) if request else url
+    return hasil
+
+
+# --- Pembuatan turunan ---
+
+def render_turunan(data):
+    """Membuat semua turunan dari bytes gambar asli (lihat image_render.render)."""
+    return image_render.render(data, settings.IMAGE_DERIVATIVE_SIZES, settings.IMAGE_DERIVATIVE_QUALITY)
+
+
+def _nama_turunan(instance, ukuran, ext, token):
+    # Hash nama sumber + token per render: file baru tidak pernah menimpa turunan yang
+    # masih direferensikan (cache/CDN, atau render lain untuk gambar yang sama).
+    jejak = hashlib.sha1(instance.gambar.name.encode()).hexdigest()[:10]
+    return f"turunan/{instance._meta.model_name}/{instance.pk}/{jejak}_{token}_{ukuran}.{ext}"
+
+
+def _file_turunan(turunan):
+    """Nama file yang direferensikan peta `gambar_turunan`."""
+    return {
+        data[ext]
+        for ukuran, data in (turunan or {}).items() if ukuran != 'sumber' and isinstance(data, dict)
+        for ext in FORMAT if data.get(ext)
+    }
+
+
+def _hapus_file(storage, nama_file):
+    for nama in nama_file:
+        storage.delete(nama)
+
+
+def unggah_turunan(instance, rendered):
+    """Mengunggah hasil render_turunan() ke storage. Mengembalikan peta `gambar_turunan`-nya."""
+    storage = instance.gambar.storage
+    token = secrets.token_hex(4)
+    turunan = {'sumber': instance.gambar.name}
+    try:
+        for ukuran, (lebar, tinggi, isi) in rendered.items():
+            turunan[ukuran] = {'width': lebar, 'height': tinggi}
+            for ext, data in isi.items():
+                turunan[ukuran][ext] = storage.save(_nama_turunan(instance, ukuran, ext, token), ContentFile(data))
+    except Exception:
+        _hapus_file(storage, _file_turunan(turunan))
+        raise
+    return turunan
+
+
+def baca_gambar(instance):
+    with instance.gambar.open('rb') as f:
+        return f.read()
+
+
+def _perlu_diterapkan(instance, sumber):
+    return (
+        instance is not None and instance.gambar and instance.gambar.name == sumber
+        and turunan_berlaku(instance) is None
+    )
+
+
+def terapkan_turunan(label, pk, sumber, rendered):
+    """
+    Menyimpan hasil render untuk gambar `sumber`. Dilewati jika objek sudah dihapus,
+    gambarnya sudah diganti dari `sumber`, atau turunannya sudah dibuat worker lain.
+
+    Upload ke storage dilakukan sebelum baris dikunci; kunci hanya dipegang selama
+    cek ulang dan penulisan `gambar_turunan`. File yang ternyata tidak dipakai, dan
+    turunan lama yang digantikan, dihapus setelah commit.
+    """
+    model = apps.get_model(label)
+    instance = model.objects.filter(pk=pk).first()
+    if not _perlu_diterapkan(instance, sumber):
+        return False
+    storage = instance.gambar.storage
+    turunan = unggah_turunan(instance, rendered)
+
+    lama = None
+    with transaction.atomic():
+        instance = model.objects.select_for_update().filter(pk=pk).first()
+        diterapkan = _perlu_diterapkan(instance, sumber)
+        if diterapkan:
+            lama = instance.gambar_turunan
+            instance.gambar_turunan = turunan
+            # save() (bukan update()) supaya diperbarui_pada maju dan cache katalog dibuang lewat sinyal.
+            instance.save(update_fields=['gambar_turunan', 'diperbarui_pada'])
+
+    if not diterapkan:
+        _hapus_file(storage, _file_turunan(turunan))
+        return False
+    _hapus_file(storage, _file_turunan(lama) - _file_turunan(turunan))
+    return True
+
+
+def proses_satu(label, pk):
+    """
+    Membuat turunan untuk satu objek (dipanggil worker). Gambar dibaca dan dirender
+    tanpa kunci; upload pengganti yang datang bersamaan membuat antrean baru dan
+    hasil render ini dibuang oleh cek `sumber`. False jika tidak ada yang perlu dibuat.
+    """
+    instance = apps.get_model(label).objects.filter(pk=pk).first()
+    if instance is None or not instance.gambar or turunan_berlaku(instance) is not None:
+        return False
+    return terapkan_turunan(label, pk, instance.gambar.name, render_turunan(baca_gambar(instance)))
+
+
+# --- Antrean ---
+
+def antrekan(instances):
+    """Memasukkan objek ke antrean (duplikat PENDING diabaikan lewat unique index parsial)."""
+    AntreanGambar.objects.bulk_create(
+        [AntreanGambar(model=obj._meta.label_lower, object_id=obj.pk) for obj in instances],
+        ignore_conflicts=True,
+    )
+
+
+def perlu_turunan(model):
+    """pk objek bergambar yang turunannya belum ada atau sudah basi (untuk backfill)."""
+    return [
+        pk for pk, gambar, sumber in
+        model.objects.exclude(gambar='').exclude(gambar__isnull=True)
+        .values_list('pk', 'gambar', 'gambar_turunan__sumber').iterator()
+        if gambar != sumber
+    ]
+
+
+def _backoff(percobaan):
+    detik = settings.IMAGE_JOB_BACKOFF_SECONDS * (2 ** (percobaan - 1))
+    return min(timedelta(seconds=detik), MAX_BACKOFF)
+
+
+def _klaim(batch_size):
+    """
+    Mengklaim satu batch dalam transaksi pendek: job PENDING yang jatuh tempo dan job
+    PROSES yang lease-nya habis (worker sebelumnya mati) menjadi PROSES dengan lease
+    baru. Kunci dilepas saat commit, sebelum gambar dirender.
+    """
+    sekarang = timezone.now()
+    klaim_hingga = sekarang + timedelta(seconds=settings.IMAGE_JOB_LEASE_SECONDS)
+    with transaction.atomic():
+        batch = list(
+            AntreanGambar.objects
+            .select_for_update(skip_locked=db_connection.features.has_select_for_update_skip_locked)
+            .filter(
+                Q(status='PENDING', proses_setelah__lte=sekarang)
+                | Q(status='PROSES', klaim_hingga__lte=sekarang)
+            )
+            .order_by('proses_setelah', 'id')[:batch_size]
+        )
+        if batch:
+            AntreanGambar.objects.filter(pk__in=[job.pk for job in batch]).update(
+                status='PROSES', klaim_hingga=klaim_hingga,
+            )
+    return batch, klaim_hingga
+
+
+def _catat(job, klaim_hingga, **fields):
+    """Mencatat hasil satu job, hanya jika klaimnya belum diambil alih worker lain."""
+    return AntreanGambar.objects.filter(pk=job.pk, status='PROSES', klaim_hingga=klaim_hingga).update(
+        klaim_hingga=None, diproses_pada=timezone.now(), **fields,
+    )
+
+
+def proses_antrean(batch_size=None):
+    """
+    Memproses satu batch AntreanGambar yang sudah jatuh tempo: klaim dulu, lalu
+    render dan upload di luar transaksi, dan hasil setiap job dicatat sendiri.
+    Mengembalikan (jumlah selesai, jumlah gagal).
+    """
+    batch_size = batch_size or settings.IMAGE_JOB_BATCH_SIZE
+    batch, klaim_hingga = _klaim(batch_size)
+    selesai = gagal = 0
+    for job in batch:
+        try:
+            proses_satu(job.model, job.object_id)
+        except Exception as e:
+            gagal += 1
+            percobaan = job.percobaan + 1
+            print(f"ERROR: Gagal membuat turunan gambar {job.model} #{job.object_id}: {e}")
+            if percobaan >= settings.IMAGE_JOB_MAX_ATTEMPTS:
+                _catat(job, klaim_hingga, status='FAILED', percobaan=percobaan, error_terakhir=str(e))
+                continue
+            try:
+                with transaction.atomic():
+                    _catat(job, klaim_hingga, status='PENDING', percobaan=percobaan, error_terakhir=str(e),
+                           proses_setelah=timezone.now() + _backoff(percobaan))
+            except IntegrityError:
+                # Gambar diganti selama diproses: sudah ada job PENDING baru untuk objek ini.
+                _catat(job, klaim_hingga, status='FAILED', percobaan=percobaan,
+                       error_terakhir=f"{e} (digantikan antrean yang lebih baru)")
+        else:
+            selesai += 1
+            _catat(job, klaim_hingga, status='DONE', error_terakhir='')
+    return selesai, gagal
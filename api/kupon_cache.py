@@ -0,0 +1,79 @@
+"""
+Cache lokal proses untuk kupon aktif.
+
+Validasi kupon dipanggil setiap kali user mengetik di field kupon, jadi saat promo
+endpoint-nya ramai. Semua kupon aktif dimuat sekaligus (jumlahnya kecil) ke dict
+per proses dengan key kode yang dinormalisasi, sehingga kode yang belum lengkap atau
+salah ketik juga terjawab tanpa query.
+
+Snapshot dibuang jika sudah lebih tua dari KUPON_CACHE_TTL, atau jika versi di
+cache bersama (CACHES) berubah. Versi dinaikkan saat kupon dibuat, diubah atau
+dihapus (signals.py).
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'kupon:versi'
+
+_lock = threading.Lock()
+_snapshot = None  # (kedaluwarsa, versi, {kode: Kupon})
+
+
+def normalisasi_kode(kode):
+    return (kode or '').strip().upper()
+
+
+def _versi():
+    versi = cache.get(VERSION_KEY)
+    if versi is None:
+        # add(): jika proses lain lebih dulu mengisi, versinya yang dipakai.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        versi = cache.get(VERSION_KEY)
+    return versi
+
+
+def _muat(versi):
+    from .models import Kupon
+    kupon_aktif = {normalisasi_kode(kupon.kode): kupon for kupon in Kupon.objects.filter(aktif=True)}
+    return time.monotonic() + settings.KUPON_CACHE_TTL, versi, kupon_aktif
+
+
+def get_kupon_aktif(kode):
+    """Kupon aktif dengan kode ini (tanpa membedakan huruf besar/kecil), atau None."""
+    global _snapshot
+    versi = _versi()
+    snapshot = _snapshot
+    if snapshot is None or snapshot[0] < time.monotonic() or snapshot[1] != versi:
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot[0] < time.monotonic() or snapshot[1] != versi:
+                snapshot = _snapshot = _muat(versi)
+    kupon = snapshot[2].get(normalisasi_kode(kode))
+    # Salinan, supaya instance di cache tidak ikut berubah oleh pemanggil.
+    return copy.copy(kupon) if kupon is not None else None
+
+
+def sudah_dipakai(kupon_id, user_id):
+    """Cek pemakaian lewat unique index (kupon_id, user_id) tabel perantara, tanpa join ke User."""
+    from .models import Kupon
+    return Kupon.digunakan_oleh.through.objects.filter(kupon_id=kupon_id, user_id=user_id).exists()
+
+
+def invalidate():
+    """Naikkan versi setelah transaksi commit, supaya semua proses memuat ulang snapshot."""
+    def bump():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    transaction.on_commit(bump)
+
+
+def reset():
+    global _snapshot
+    _snapshot = None
@@ -0,0 +1,107 @@
+"""
+Helper bersama untuk command benchmark (bench_*). Modul berawalan underscore
+tidak dianggap command oleh Django.
+"""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from api.models import AkunGaming, Pembelian, TopUpPembelian, TopUpProduct
+
+GAMES = [choice for choice, _ in AkunGaming.GAME_CHOICES]
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Membuat database test sementara (sudah dimigrasi) di server yang sama dengan
+    DATABASES['default'], lalu menghapusnya setelah selesai. Jadi benchmark bisa
+    dijalankan di SQLite maupun PostgreSQL tanpa menyentuh data asli.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def seed_users(count, batch_size=5000):
+    User.objects.bulk_create(
+        [User(username=f'bench{i}', email=f'bench{i}@example.com', password='!') for i in range(count)],
+        batch_size=batch_size,
+    )
+    return list(User.objects.filter(username__startswith='bench').values_list('id', flat=True))
+
+
+def seed_accounts(count, sold_ratio=0.3, batch_size=5000, rng=random, teks=None):
+    """`teks(i, rng)` opsional mengembalikan (nama_akun, deskripsi) untuk akun ke-i."""
+    teks = teks or (lambda i, rng: (f'Akun Bench {i}', 'Akun hasil seed benchmark.'))
+    for start in range(0, count, batch_size):
+        AkunGaming.objects.bulk_create([
+            AkunGaming(
+                game=rng.choice(GAMES),
+                nama_akun=nama_akun,
+                level=rng.randint(1, 200),
+                deskripsi=deskripsi,
+                harga=Decimal(rng.randrange(10_000, 5_000_000, 1_000)),
+                is_sold=rng.random() < sold_ratio,
+                akun_email='', akun_password='',
+            )
+            for nama_akun, deskripsi in (teks(i, rng) for i in range(start, min(start + batch_size, count)))
+        ])
+    return list(AkunGaming.objects.values_list('id', flat=True))
+
+
+def seed_orders(pembelian_count, topup_count, user_ids, akun_ids, batch_size=5000, rng=random):
+    produk_ids = list(TopUpProduct.objects.values_list('id', flat=True))
+    if not produk_ids:
+        TopUpProduct.objects.bulk_create([
+            TopUpProduct(game=game, nama_paket=f'{game} {n} Diamonds', harga=Decimal(n * 250))
+            for game in GAMES for n in (50, 100, 500)
+        ])
+        produk_ids = list(TopUpProduct.objects.values_list('id', flat=True))
+    statuses = ['COMPLETED'] * 6 + ['PENDING'] * 2 + ['CANCELED'] * 2
+
+    for start in range(0, pembelian_count, batch_size):
+        rows = []
+        for _ in range(start, min(start + batch_size, pembelian_count)):
+            status = rng.choice(statuses)
+            harga = Decimal(rng.randrange(10_000, 5_000_000, 1_000))
+            rows.append(Pembelian(
+                pembeli_id=rng.choice(user_ids), akun_id=rng.choice(akun_ids),
+                harga_total=harga, harga_asli=harga, status=status,
+                rating=rng.randint(1, 5) if status == 'COMPLETED' and rng.random() < 0.4 else None,
+            ))
+        Pembelian.objects.bulk_create(rows)
+
+    for start in range(0, topup_count, batch_size):
+        rows = []
+        for _ in range(start, min(start + batch_size, topup_count)):
+            harga = Decimal(rng.randrange(5_000, 500_000, 500))
+            rows.append(TopUpPembelian(
+                pembeli_id=rng.choice(user_ids), produk_id=rng.choice(produk_ids),
+                game_user_id=str(rng.randint(10_000, 99_999)),
+                harga_pembelian=harga, harga_asli=harga, status=rng.choice(statuses),
+            ))
+        TopUpPembelian.objects.bulk_create(rows)
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def measure(fn, repeat=20):
+    """Menjalankan fn beberapa kali dan mengembalikan median durasi dalam milidetik."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
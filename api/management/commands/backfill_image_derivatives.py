@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import image_render
+from api.images import MODEL_GAMBAR, baca_gambar, perlu_turunan, terapkan_turunan
+
+
+class Command(BaseCommand):
+    help = (
+        "Membuat turunan gambar untuk semua gambar yang belum punya (atau basi). "
+        "Resize/encode dijalankan paralel di process pool; baca dan simpan ke "
+        "storage dilakukan proses utama."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=50,
+                            help="Jumlah gambar yang dibaca dan dikirim ke pool sekaligus.")
+        parser.add_argument('--model', choices=MODEL_GAMBAR, action='append',
+                            help="Batasi ke model tertentu (boleh diulang).")
+
+    def handle(self, *args, **options):
+        labels = options['model'] or MODEL_GAMBAR
+        chunk_size = max(1, options['chunk_size'])
+        total = gagal = 0
+        sizes, quality = settings.IMAGE_DERIVATIVE_SIZES, settings.IMAGE_DERIVATIVE_QUALITY
+        # spawn: anak tidak mewarisi koneksi database proses utama. Anak hanya
+        # menjalankan image_render (Pillow murni), jadi tidak perlu setup Django.
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            for label in labels:
+                model = apps.get_model(label)
+                pks = perlu_turunan(model)
+                self.stdout.write(f"{label}: {len(pks)} gambar perlu turunan.")
+                for start in range(0, len(pks), chunk_size):
+                    futures = {}
+                    for instance in model.objects.filter(pk__in=pks[start:start + chunk_size]):
+                        try:
+                            data = baca_gambar(instance)
+                        except Exception as e:
+                            gagal += 1
+                            self.stderr.write(f"Gagal membaca {label} #{instance.pk}: {e}")
+                            continue
+                        futures[pool.submit(image_render.render, data, sizes, quality)] = (instance.pk, instance.gambar.name)
+                    for future in as_completed(futures):
+                        pk, sumber = futures[future]
+                        try:
+                            if terapkan_turunan(label, pk, sumber, future.result()):
+                                total += 1
+                        except Exception as e:
+                            gagal += 1
+                            self.stderr.write(f"Gagal membuat turunan {label} #{pk}: {e}")
+                    self.stdout.write(f"  {min(start + chunk_size, len(pks))}/{len(pks)}")
+        self.stdout.write(self.style.SUCCESS(f"Selesai: {total} gambar diproses, {gagal} gagal."))
@@ -0,0 +1,66 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from api.models import AkunGaming, Pembelian
+from api.payment import build_snap_client, reset_snap_client
+from api.standins import LocalSnapServer
+
+from ._bench import benchmark_database, seed_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Bandingkan latency checkout (Pembelian.create_pembelian) dengan Snap baru per "
+        "checkout vs klien Snap bersama ber-pool, memakai stand-in Snap lokal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkouts', type=int, default=100)
+        parser.add_argument('--handshake-delay', type=float, default=0.08,
+                            help="Latency simulasi TCP+TLS handshake per koneksi (detik).")
+        parser.add_argument('--response-delay', type=float, default=0.02,
+                            help="Latency simulasi pemrosesan Snap per request (detik).")
+
+    def handle(self, *args, **options):
+        jumlah = options['checkouts']
+        with LocalSnapServer(handshake_delay=options['handshake_delay'],
+                             response_delay=options['response_delay']) as snap_server, \
+                override_settings(MIDTRANS_SNAP_BASE_URL=snap_server.snap_base_url), \
+                benchmark_database():
+            reset_snap_client()
+            pembeli_id = seed_users(1)[0]
+            AkunGaming.objects.bulk_create([
+                AkunGaming(game='Mobile Legends', nama_akun=f'Akun {i}', deskripsi='-', harga=Decimal(100_000))
+                for i in range(jumlah * 2)
+            ])
+            akun_list = list(AkunGaming.objects.all())
+            pembeli = Pembelian._meta.get_field('pembeli').related_model.objects.get(pk=pembeli_id)
+
+            # Perilaku lama: Snap (dan koneksi HTTP) baru untuk setiap checkout.
+            import api.models as models_module
+            original = models_module.get_snap_client
+            models_module.get_snap_client = build_snap_client
+            try:
+                per_checkout, koneksi_lama = self.run(pembeli, akun_list[:jumlah], snap_server)
+            finally:
+                models_module.get_snap_client = original
+
+            reset_snap_client()
+            bersama, koneksi_baru = self.run(pembeli, akun_list[jumlah:], snap_server)
+            reset_snap_client()
+
+        self.stdout.write(f"Snap baru per checkout : median {per_checkout:7.1f} ms ({koneksi_lama} koneksi)")
+        self.stdout.write(f"Snap bersama (pooled)  : median {bersama:7.1f} ms ({koneksi_baru} koneksi)")
+
+    def run(self, pembeli, akun_list, snap_server):
+        koneksi_awal = snap_server.connections
+        durations = []
+        for akun in akun_list:
+            start = time.perf_counter()
+            Pembelian.create_pembelian(pembeli=pembeli, akun=akun)
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations), snap_server.connections - koneksi_awal
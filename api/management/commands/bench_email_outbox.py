@@ -0,0 +1,49 @@
+import time
+
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+
+from api.models import EmailOutbox
+from api.outbox import deliver_outbox, queue_email
+from api.standins import LocalSMTPServer
+
+from ._bench import benchmark_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Bandingkan throughput send_mail() per email (koneksi baru tiap email) dengan "
+        "outbox batch (satu koneksi), memakai SMTP stand-in lokal dengan latency handshake."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=200)
+        parser.add_argument('--handshake-delay', type=float, default=0.05,
+                            help="Latency simulasi TCP+TLS handshake per koneksi (detik).")
+        parser.add_argument('--batch-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        jumlah = options['emails']
+        with LocalSMTPServer(handshake_delay=options['handshake_delay']) as smtp, benchmark_database():
+            start = time.perf_counter()
+            for i in range(jumlah):
+                send_mail(f'Langsung {i}', 'Isi', 'toko@example.com', [f'user{i}@example.com'],
+                          connection=smtp.get_connection())
+            langsung = time.perf_counter() - start
+            koneksi_langsung = smtp.connections
+
+            for i in range(jumlah):
+                queue_email(f'Outbox {i}', 'Isi', [f'user{i}@example.com'], from_email='toko@example.com')
+            connection = smtp.get_connection()
+            start = time.perf_counter()
+            while deliver_outbox(options['batch_size'], connection=connection) != (0, 0):
+                pass
+            connection.close()
+            outbox = time.perf_counter() - start
+            terkirim = EmailOutbox.objects.filter(status='SENT').count()
+
+        self.stdout.write(f"send_mail per email : {jumlah / langsung:8.1f} email/detik ({koneksi_langsung} koneksi)")
+        self.stdout.write(
+            f"outbox batch        : {terkirim / outbox:8.1f} email/detik "
+            f"({smtp.connections - koneksi_langsung} koneksi, {terkirim} terkirim)"
+        )
@@ -0,0 +1,92 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+
+from api.models import AkunGaming, Pembelian, TopUpPembelian
+
+from ._bench import analyze, benchmark_database, measure, seed_accounts, seed_orders, seed_users
+
+# Index yang ditambahkan migrasi 0015_query_indexes.
+INDEX_NAMES = {
+    AkunGaming: ['akun_tersedia_baru_idx', 'akun_tersedia_harga_idx', 'akun_game_baru_idx', 'akun_game_harga_idx'],
+    Pembelian: ['pembelian_pembeli_tgl_idx', 'pembelian_status_total_idx', 'pembelian_ulasan_idx'],
+    TopUpPembelian: ['topup_pembeli_tgl_idx', 'topup_status_total_idx'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed dataset besar di database sementara, lalu tampilkan EXPLAIN dan latency "
+        "query utama toko sebelum dan sesudah index 0015_query_indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--akun', type=int, default=50_000)
+        parser.add_argument('--pembelian', type=int, default=100_000)
+        parser.add_argument('--topup', type=int, default=100_000)
+        parser.add_argument('--users', type=int, default=2_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with benchmark_database():
+            self.stdout.write(f"Database: {connection.vendor}. Seeding data...")
+            user_ids = seed_users(options['users'])
+            akun_ids = seed_accounts(options['akun'], rng=rng)
+            seed_orders(options['pembelian'], options['topup'], user_ids, akun_ids, rng=rng)
+            queries = self.get_queries(rng.choice(user_ids))
+
+            self.set_indexes(enabled=False)
+            analyze()
+            before = self.report('SEBELUM index', queries, options['repeat'])
+
+            self.set_indexes(enabled=True)
+            analyze()
+            after = self.report('SESUDAH index', queries, options['repeat'])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nRingkasan (median ms)'))
+        for label in queries:
+            self.stdout.write(f"  {label:<28} {before[label]:>9.2f} -> {after[label]:>9.2f}")
+
+    def get_queries(self, user_id):
+        return {
+            'katalog terbaru': lambda: AkunGaming.objects.filter(is_sold=False)
+                .order_by('-dibuat_pada', '-id')[:20],
+            'katalog game termurah': lambda: AkunGaming.objects.filter(is_sold=False, game='PUBG Mobile')
+                .order_by('harga', 'id')[:20],
+            'riwayat pembelian akun': lambda: Pembelian.objects.filter(pembeli_id=user_id)
+                .order_by('-dibuat_pada')[:20],
+            'riwayat top up': lambda: TopUpPembelian.objects.filter(pembeli_id=user_id)
+                .order_by('-tanggal_pembelian')[:20],
+            'dashboard revenue akun': lambda: Pembelian.objects.filter(status='COMPLETED')
+                .values('status').annotate(total=Sum('harga_total')),
+            'dashboard revenue top up': lambda: TopUpPembelian.objects.filter(status='COMPLETED')
+                .values('status').annotate(total=Sum('harga_pembelian')),
+            'ulasan per game': lambda: Pembelian.objects
+                .filter(akun__game='Mobile Legends', status='COMPLETED', rating__isnull=False)
+                .order_by('-dibuat_pada')[:20],
+        }
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as editor:
+            for model, names in INDEX_NAMES.items():
+                for index in model._meta.indexes:
+                    if index.name not in names:
+                        continue
+                    if enabled:
+                        editor.add_index(model, index)
+                    else:
+                        editor.remove_index(model, index)
+
+    def report(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {title} ==='))
+        timings = {}
+        for label, build in queries.items():
+            plan = build().explain()
+            timings[label] = measure(lambda: list(build()), repeat)
+            self.stdout.write(self.style.SQL_KEYWORD(f'\n[{label}] {timings[label]:.2f} ms'))
+            self.stdout.write(plan)
+        return timings
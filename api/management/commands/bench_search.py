@@ -0,0 +1,83 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from api.models import AkunGaming
+from api.search import cari_akun, get_search_backend
+
+from ._bench import GAMES, analyze, benchmark_database, measure, seed_accounts
+
+KATA_NAMA = [
+    'sultan', 'murah', 'mythic', 'legend', 'glory', 'epic', 'grandmaster', 'conqueror',
+    'skin', 'langka', 'full', 'hero', 'akun', 'pro', 'rank', 'season', 'collector', 'starlight',
+]
+KATA_DESKRIPSI = KATA_NAMA + [
+    'email', 'bisa', 'ganti', 'aman', 'bind', 'moonton', 'garena', 'fresh', 'winrate', 'tinggi',
+    'emblem', 'max', 'diamond', 'bonus', 'limited', 'event', 'lengkap', 'original', 'nego', 'cepat',
+] + [f'kode{n}' for n in range(2000)]
+
+
+def teks_acak(i, rng):
+    nama = ' '.join(rng.sample(KATA_NAMA, 3)) + f' {i}'
+    deskripsi = ' '.join(rng.choices(KATA_DESKRIPSI, k=rng.randint(20, 60)))
+    return nama, deskripsi
+
+
+class Command(BaseCommand):
+    help = (
+        "Bandingkan latency pencarian katalog (icontains vs backend search.py) "
+        "di database sementara."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        page_size = options['page_size']
+        with benchmark_database():
+            seed_accounts(options['size'], rng=rng, teks=teks_acak)
+            analyze()
+            self.stdout.write(
+                f"Database: {connection.vendor}, backend: {type(get_search_backend()).__name__}, "
+                f"akun: {options['size']}"
+            )
+            # Kolom halaman: satu halaman hasil; kolom count: menghitung semua hasil
+            # (yang dilakukan icontains untuk query yang jarang/tidak cocok).
+            self.stdout.write(
+                f"{'query':<32} {'cocok':>8} {'icontains':>12} {'search':>12} "
+                f"{'count icontains':>16} {'count search':>13}"
+            )
+
+            base = AkunGaming.objects.filter(is_sold=False)
+            game = GAMES[0]
+            kasus = [
+                ('mythic', None),
+                ('sultan skin', None),
+                ('kode1234', None),
+                ('leg', None),
+                ('glory winrate', game),
+                ('tidakadaxyz', None),
+            ]
+            for q, filter_game in kasus:
+                qs = base.filter(game=filter_game) if filter_game else base
+
+                lama_qs = qs
+                for kata in q.split():
+                    lama_qs = lama_qs.filter(Q(nama_akun__icontains=kata) | Q(deskripsi__icontains=kata))
+                baru_qs = cari_akun(qs, q)
+
+                old = measure(lambda: list(lama_qs.order_by('-dibuat_pada', '-id')[:page_size]), options['repeat'])
+                new = measure(lambda: list(baru_qs.order_by('-relevansi', '-id')[:page_size]), options['repeat'])
+                old_count = measure(lama_qs.count, options['repeat'])
+                new_count = measure(baru_qs.count, options['repeat'])
+                label = f'{q} ({filter_game})' if filter_game else q
+                self.stdout.write(
+                    f"{label:<32} {baru_qs.count():>8} {old:>10.2f}ms {new:>10.2f}ms "
+                    f"{old_count:>14.2f}ms {new_count:>11.2f}ms"
+                )
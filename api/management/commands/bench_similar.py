@@ -0,0 +1,41 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.models import AkunGaming
+
+from ._bench import analyze, benchmark_database, measure, seed_accounts
+
+
+class Command(BaseCommand):
+    help = (
+        "Bandingkan latency akun serupa (ORDER BY RANDOM() vs random_sample) "
+        "saat katalog tumbuh, di database sementara."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,10000,100000,200000',
+            help="Ukuran katalog (dipisah koma) yang diukur secara bertahap.",
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        with benchmark_database():
+            self.stdout.write(f"Database: {connection.vendor}")
+            self.stdout.write(f"{'akun':>10} {'order_by(?)':>14} {'random_sample':>14}")
+            seeded = 0
+            for size in sizes:
+                seed_accounts(size - seeded, rng=rng)
+                seeded = size
+                analyze()
+                akun = AkunGaming.objects.filter(is_sold=False).order_by('id').first()
+                base = AkunGaming.objects.filter(game=akun.game, is_sold=False).exclude(pk=akun.pk)
+
+                old = measure(lambda: list(base.order_by('?')[0:5]), options['repeat'])
+                new = measure(lambda: list(base.random_sample(5)), options['repeat'])
+                self.stdout.write(f"{size:>10} {old:>12.2f}ms {new:>12.2f}ms")
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.akun_import import FORMATS, impor_akun, tebak_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Import massal akun dari file CSV/NDJSON (gambar berupa URL atau nama file "
+        "di zip pendamping). Baris yang tidak valid dilaporkan dan dilewati."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File CSV atau NDJSON.")
+        parser.add_argument('--zip', dest='zip_path', help="Zip berisi file gambar yang dirujuk file import.")
+        parser.add_argument('--format', choices=FORMATS, help="Default: ditebak dari ekstensi file.")
+        parser.add_argument('--chunk-size', type=int, default=settings.AKUN_IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        format_file = options['format'] or tebak_format(options['path'])
+        if format_file is None:
+            raise CommandError("Format tidak bisa ditebak dari ekstensi; gunakan --format.")
+
+        zip_file = open(options['zip_path'], 'rb') if options['zip_path'] else None
+        try:
+            with open(options['path'], 'rb') as file:
+                for event in impor_akun(file, format_file, zip_file=zip_file, chunk_size=options['chunk_size']):
+                    if event['event'] == 'error':
+                        if event['baris'] is None:
+                            self.stderr.write(event['error'])
+                        else:
+                            self.stderr.write(f"Baris {event['baris']}: {event['error']}")
+                    elif event['event'] == 'progress':
+                        self.stdout.write(
+                            f"{event['diproses']} baris diproses: {event['berhasil']} berhasil, {event['gagal']} gagal."
+                        )
+                    else:
+                        self.stdout.write(self.style.SUCCESS(
+                            f"Selesai: {event['berhasil']} akun diimport, {event['gagal']} baris gagal "
+                            f"dari {event['diproses']} baris."
+                        ))
+        finally:
+            if zip_file:
+                zip_file.close()
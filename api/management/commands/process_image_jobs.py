@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.images import proses_antrean
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker turunan gambar: membuat thumbnail/card/full (WebP + JPEG) untuk "
+        "gambar yang baru diunggah, dengan retry dan backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.IMAGE_JOB_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Terus berjalan dan polling antrean.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Jeda polling (detik) saat antrean kosong.")
+
+    def handle(self, *args, **options):
+        total_selesai = total_gagal = 0
+        try:
+            while True:
+                selesai, gagal = proses_antrean(options['batch_size'])
+                total_selesai += selesai
+                total_gagal += gagal
+                if selesai or gagal:
+                    self.stdout.write(f"Batch: {selesai} selesai, {gagal} gagal.")
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Selesai: {total_selesai} selesai, {total_gagal} gagal."))
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.webhooks import proses_inbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker inbox webhook Midtrans: memproses notifikasi PENDING secara batch, "
+        "berurutan per order_id, dengan retry dan backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.WEBHOOK_INBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Terus berjalan dan polling inbox.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Jeda polling (detik) saat inbox kosong.")
+
+    def handle(self, *args, **options):
+        total_selesai = total_gagal = 0
+        try:
+            while True:
+                selesai, gagal = proses_inbox(options['batch_size'])
+                total_selesai += selesai
+                total_gagal += gagal
+                if selesai or gagal:
+                    self.stdout.write(f"Batch: {selesai} selesai, {gagal} gagal.")
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Selesai: {total_selesai} diproses, {total_gagal} gagal."))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import DashboardStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Membandingkan proyeksi DashboardStats dengan agregat live, lalu membangunnya "
+        "ulang dari nol."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Hanya cek selisih; exit non-zero jika proyeksi tidak cocok, tanpa menulis.",
+        )
+
+    def handle(self, *args, **options):
+        live = DashboardStats.hitung_live()
+        stored = DashboardStats.objects.filter(pk=1).first()
+
+        if stored is None:
+            selisih = {field: (None, live[field]) for field in DashboardStats.FIELDS}
+        else:
+            selisih = {
+                field: (getattr(stored, field), live[field])
+                for field in DashboardStats.FIELDS
+                if getattr(stored, field) != live[field]
+            }
+
+        for field, (tersimpan, seharusnya) in selisih.items():
+            self.stdout.write(f"  {field}: tersimpan={tersimpan} live={seharusnya}")
+
+        if options['check']:
+            if selisih:
+                raise CommandError(f"Proyeksi dashboard tidak cocok ({len(selisih)} field).")
+            self.stdout.write(self.style.SUCCESS("Proyeksi dashboard cocok dengan agregat live."))
+            return
+
+        DashboardStats.rebuild()
+        if selisih:
+            self.stdout.write(self.style.WARNING(f"Proyeksi dibangun ulang ({len(selisih)} field diperbaiki)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Proyeksi sudah cocok; dibangun ulang tanpa perubahan."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Kupon
+
+
+class Command(BaseCommand):
+    help = "Membangun ulang counter Kupon (jumlah_pengguna, total_diskon) dari data pesanan."
+
+    def handle(self, *args, **options):
+        Kupon.hitung_ulang_counter()
+        self.stdout.write(self.style.SUCCESS(f"Counter {Kupon.objects.count()} kupon dibangun ulang."))
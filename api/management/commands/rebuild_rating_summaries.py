@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.models import RingkasanRating
+
+
+class Command(BaseCommand):
+    help = "Membangun ulang RingkasanRating (jumlah, total, histogram per game) dari ulasan pesanan."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--game', help="Hanya game ini (default: semua game).")
+
+    def handle(self, *args, **options):
+        RingkasanRating.rebuild(options['game'])
+        for ringkasan in RingkasanRating.objects.order_by('game'):
+            self.stdout.write(f"  {ringkasan}")
+        self.stdout.write(self.style.SUCCESS("Ringkasan rating dibangun ulang."))
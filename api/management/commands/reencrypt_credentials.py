@@ -0,0 +1,73 @@
+from cryptography.fernet import InvalidToken
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.crypto import get_keys, rotate_token
+from api.models import AkunGaming
+
+FIELDS = ('akun_email', 'akun_password')
+
+
+class Command(BaseCommand):
+    help = (
+        "Mengenkripsi ulang akun_email/akun_password semua AkunGaming dengan kunci "
+        "terbaru di FERNET_KEYS, per chunk dengan bulk_update. Aman dijalankan ulang: "
+        "baris yang sudah memakai kunci terbaru dilewati."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Hanya hitung baris yang perlu dienkripsi ulang, tanpa menulis.",
+        )
+
+    def handle(self, *args, **options):
+        keys = get_keys()
+        if len(keys) < 2:
+            self.stdout.write(self.style.WARNING(
+                "FERNET_KEYS hanya berisi satu kunci; tidak ada kunci lama untuk dirotasi."
+            ))
+
+        chunk_size = options['chunk_size']
+        last_id = 0
+        diperiksa = diperbarui = 0
+        gagal = []
+        while True:
+            # Keyset per id: setiap chunk satu range scan pendek, dan lock baris
+            # hanya ditahan selama satu chunk.
+            with transaction.atomic():
+                chunk = list(
+                    AkunGaming.objects.select_for_update()
+                    .filter(pk__gt=last_id).order_by('pk').only('pk', *FIELDS)[:chunk_size]
+                )
+                if not chunk:
+                    break
+                last_id = chunk[-1].pk
+                diperiksa += len(chunk)
+
+                berubah = []
+                for akun in chunk:
+                    try:
+                        baru = {field: rotate_token(getattr(akun, field), keys) for field in FIELDS}
+                    except InvalidToken:
+                        gagal.append(akun.pk)
+                        continue
+                    if any(baru.values()):
+                        for field, token in baru.items():
+                            if token:
+                                setattr(akun, field, token)
+                        berubah.append(akun)
+
+                if berubah and not options['dry_run']:
+                    AkunGaming.objects.bulk_update(berubah, FIELDS)
+                diperbarui += len(berubah)
+            self.stdout.write(f"  s.d. id {last_id}: {diperiksa} diperiksa, {diperbarui} dienkripsi ulang")
+
+        aksi = "perlu dienkripsi ulang" if options['dry_run'] else "dienkripsi ulang"
+        self.stdout.write(self.style.SUCCESS(f"{diperbarui} dari {diperiksa} akun {aksi}."))
+        if gagal:
+            raise CommandError(
+                f"{len(gagal)} akun tidak bisa didekripsi dengan FERNET_KEYS saat ini "
+                f"(id: {', '.join(map(str, gagal[:20]))}{'...' if len(gagal) > 20 else ''})."
+            )
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.reservasi import lepas_kedaluwarsa
+
+
+class Command(BaseCommand):
+    help = (
+        "Melepas reservasi checkout akun yang sudah lewat TTL, supaya status "
+        "\"dipesan\" di katalog (dan cache/ETag-nya) ikut diperbarui."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.AKUN_RESERVASI_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Terus berjalan dan polling reservasi.")
+        parser.add_argument('--interval', type=float, default=30.0, help="Jeda polling (detik) saat tidak ada yang lewat.")
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                jumlah = lepas_kedaluwarsa(options['batch_size'])
+                total += jumlah
+                if jumlah:
+                    self.stdout.write(f"Batch: {jumlah} reservasi dilepas.")
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Selesai: {total} reservasi dilepas."))
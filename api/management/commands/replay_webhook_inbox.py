@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import MidtransInbox
+from api.webhooks import proses_inbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Memproses ulang notifikasi Midtrans yang tersimpan di inbox. Default: baris "
+        "terpilih dikembalikan ke PENDING (pemulihan setelah bug/gangguan). Dengan "
+        "--clone N, setiap baris disalin N kali sebagai notifikasi baru (uji beban; "
+        "dedupe memastikan pesanan tidak diproses dua kali)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--order-id', action='append', default=[], help="Bisa diulang.")
+        parser.add_argument('--status', choices=['PENDING', 'DONE', 'FAILED'], help="Filter status inbox.")
+        parser.add_argument('--dari-id', type=int)
+        parser.add_argument('--sampai-id', type=int)
+        parser.add_argument('--clone', type=int, default=0, metavar='N')
+        parser.add_argument(
+            '--proses', action='store_true',
+            help="Langsung kuras inbox setelahnya (tanpa worker terpisah) dan tampilkan throughput.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = MidtransInbox.objects.order_by('id')
+        if options['order_id']:
+            queryset = queryset.filter(order_id__in=options['order_id'])
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+        if options['dari_id'] is not None:
+            queryset = queryset.filter(id__gte=options['dari_id'])
+        if options['sampai_id'] is not None:
+            queryset = queryset.filter(id__lte=options['sampai_id'])
+        if not any((options['order_id'], options['status'], options['dari_id'], options['sampai_id'])):
+            raise CommandError("Pilih notifikasi dengan --order-id, --status, --dari-id atau --sampai-id.")
+
+        if options['clone']:
+            salinan = [
+                MidtransInbox(order_id=notifikasi.order_id, payload=notifikasi.payload)
+                for notifikasi in queryset.iterator()
+                for _ in range(options['clone'])
+            ]
+            MidtransInbox.objects.bulk_create(salinan, batch_size=500)
+            self.stdout.write(f"{len(salinan)} notifikasi disalin ke inbox.")
+        else:
+            jumlah = queryset.update(
+                status='PENDING', hasil='', percobaan=0, error_terakhir='', proses_setelah=timezone.now(),
+            )
+            self.stdout.write(f"{jumlah} notifikasi dikembalikan ke PENDING.")
+
+        if not options['proses']:
+            return
+        start = time.perf_counter()
+        total_selesai = total_gagal = 0
+        while True:
+            selesai, gagal = proses_inbox()
+            if not (selesai or gagal):
+                break
+            total_selesai += selesai
+            total_gagal += gagal
+        durasi = time.perf_counter() - start
+        per_detik = total_selesai / durasi if durasi else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_selesai} diproses, {total_gagal} gagal dalam {durasi:.2f} dtk ({per_detik:.0f}/dtk)."
+        ))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.standins import LocalSMTPServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Menjalankan SMTP stand-in lokal (tanpa TLS/AUTH). Arahkan aplikasi ke sini dengan "
+        "EMAIL_HOST=127.0.0.1 EMAIL_PORT=<port> EMAIL_USE_TLS=False."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--handshake-delay', type=float, default=0.0)
+
+    def handle(self, *args, **options):
+        with LocalSMTPServer(port=options['port'], handshake_delay=options['handshake_delay']) as smtp:
+            self.stdout.write(f"SMTP stand-in berjalan di 127.0.0.1:{smtp.port} (Ctrl+C untuk berhenti)")
+            diterima = 0
+            try:
+                while True:
+                    time.sleep(1)
+                    if len(smtp.messages) != diterima:
+                        diterima = len(smtp.messages)
+                        self.stdout.write(f"{diterima} pesan diterima, {smtp.connections} koneksi.")
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from api.outbox import deliver_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker email outbox: mengirim email PENDING secara batch lewat satu koneksi "
+        "SMTP yang dipakai ulang, dengan retry dan backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Terus berjalan dan polling outbox.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Jeda polling (detik) saat outbox kosong.")
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        total_terkirim = total_gagal = 0
+        try:
+            while True:
+                terkirim, gagal = deliver_outbox(options['batch_size'], connection=connection)
+                total_terkirim += terkirim
+                total_gagal += gagal
+                if terkirim or gagal:
+                    self.stdout.write(f"Batch: {terkirim} terkirim, {gagal} gagal.")
+                    continue
+                if not options['loop']:
+                    break
+                # Outbox kosong: tutup koneksi SMTP selama menunggu.
+                connection.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Selesai: {total_terkirim} terkirim, {total_gagal} gagal."))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_alter_topupproduct_game'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='akungaming',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['dibuat_pada', 'id'], name='akun_tersedia_baru_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='akungaming',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['harga', 'id'], name='akun_tersedia_harga_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='akungaming',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['game', 'dibuat_pada', 'id'], name='akun_game_baru_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='akungaming',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['game', 'harga', 'id'], name='akun_game_harga_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pembelian',
+            index=models.Index(fields=['pembeli', 'dibuat_pada'], name='pembelian_pembeli_tgl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pembelian',
+            index=models.Index(fields=['status', 'harga_total'], name='pembelian_status_total_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pembelian',
+            index=models.Index(condition=models.Q(('rating__isnull', False), ('status', 'COMPLETED')), fields=['dibuat_pada'], name='pembelian_ulasan_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topuppembelian',
+            index=models.Index(fields=['pembeli', 'tanggal_pembelian'], name='topup_pembeli_tgl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topuppembelian',
+            index=models.Index(fields=['status', 'harga_pembelian'], name='topup_status_total_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='akungaming',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['game', 'id'], name='akun_game_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_akun_game_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pembelian',
+            index=models.Index(fields=['dibuat_pada', 'id'], name='pembelian_tgl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topuppembelian',
+            index=models.Index(fields=['tanggal_pembelian', 'id'], name='topup_tgl_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_admin_order_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('akun_tersedia', models.IntegerField(default=0)),
+                ('akun_terjual', models.IntegerField(default=0)),
+                ('topup_berhasil', models.IntegerField(default=0)),
+                ('revenue_akun', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenue_topup', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('diperbarui_pada', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_dashboardstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subjek', models.CharField(max_length=255)),
+                ('pesan', models.TextField()),
+                ('pengirim', models.CharField(blank=True, max_length=254)),
+                ('penerima', models.CharField(max_length=254)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('percobaan', models.PositiveSmallIntegerField(default=0)),
+                ('kirim_setelah', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error_terakhir', models.TextField(blank=True)),
+                ('dibuat_pada', models.DateTimeField(auto_now_add=True)),
+                ('terkirim_pada', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['kirim_setelah', 'id'], name='outbox_antrean_idx')],
+            },
+        ),
+    ]
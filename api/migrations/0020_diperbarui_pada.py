@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='akungaming',
+            name='diperbarui_pada',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='akungamingimage',
+            name='diperbarui_pada',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='topupproduct',
+            name='diperbarui_pada',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='akungaming',
+            index=models.Index(fields=['game', 'diperbarui_pada'], name='akun_game_diperbarui_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_diperbarui_pada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MidtransNotifikasi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=64)),
+                ('transaction_status', models.CharField(max_length=20)),
+                ('order_id', models.CharField(db_index=True, max_length=50)),
+                ('diterima_pada', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('transaction_id', 'transaction_status'), name='notifikasi_unik')],
+            },
+        ),
+    ]
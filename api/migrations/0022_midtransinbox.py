@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_midtransnotifikasi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MidtransInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('hasil', models.CharField(blank=True, max_length=20)),
+                ('percobaan', models.PositiveSmallIntegerField(default=0)),
+                ('proses_setelah', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error_terakhir', models.TextField(blank=True)),
+                ('diterima_pada', models.DateTimeField(auto_now_add=True)),
+                ('diproses_pada', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['proses_setelah', 'id'], name='inbox_antrean_idx'), models.Index(condition=models.Q(('status', 'PENDING')), fields=['order_id', 'id'], name='inbox_order_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:37
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def isi_counter_kupon(apps, schema_editor):
+    Kupon = apps.get_model('api', 'Kupon')
+    Pembelian = apps.get_model('api', 'Pembelian')
+    TopUpPembelian = apps.get_model('api', 'TopUpPembelian')
+    Through = Kupon.digunakan_oleh.through
+
+    pengguna = Through.objects.filter(kupon_id=OuterRef('pk')).order_by().values('kupon_id') \
+                              .annotate(n=Count('id')).values('n')
+    diskon_akun = Pembelian.objects.filter(kupon_id=OuterRef('pk'), status='COMPLETED', harga_asli__isnull=False) \
+                                   .order_by().values('kupon_id') \
+                                   .annotate(d=Sum(F('harga_asli') - F('harga_total'))).values('d')
+    diskon_topup = TopUpPembelian.objects.filter(kupon_id=OuterRef('pk'), status='COMPLETED', harga_asli__isnull=False) \
+                                         .order_by().values('kupon_id') \
+                                         .annotate(d=Sum(F('harga_asli') - F('harga_pembelian'))).values('d')
+    nol = Value(0, output_field=DecimalField(max_digits=14, decimal_places=2))
+    Kupon.objects.update(
+        jumlah_pengguna=Coalesce(Subquery(pengguna), 0),
+        total_diskon=Coalesce(Subquery(diskon_akun), nol) + Coalesce(Subquery(diskon_topup), nol),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_midtransinbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kupon',
+            name='jumlah_pengguna',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='kupon',
+            name='total_diskon',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(isi_counter_kupon, migrations.RunPython.noop),
+    ]
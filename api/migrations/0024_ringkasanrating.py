@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_kupon_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RingkasanRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.CharField(max_length=50, unique=True)),
+                ('jumlah', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('bintang_1', models.PositiveIntegerField(default=0)),
+                ('bintang_2', models.PositiveIntegerField(default=0)),
+                ('bintang_3', models.PositiveIntegerField(default=0)),
+                ('bintang_4', models.PositiveIntegerField(default=0)),
+                ('bintang_5', models.PositiveIntegerField(default=0)),
+                ('diperbarui_pada', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:40
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# PostgreSQL: search_vector diisi trigger, jadi tetap sinkron juga untuk
+# bulk_create/update() yang tidak melewati save().
+POSTGRES_PASANG = [
+    """
+    CREATE FUNCTION api_akungaming_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.nama_akun, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.deskripsi, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_akungaming_search_vector_trg
+    BEFORE INSERT OR UPDATE OF nama_akun, deskripsi ON api_akungaming
+    FOR EACH ROW EXECUTE FUNCTION api_akungaming_search_vector()
+    """,
+    # Isi baris yang sudah ada (trigger ikut mengisi search_vector).
+    "UPDATE api_akungaming SET nama_akun = nama_akun",
+    "CREATE INDEX akun_search_vector_idx ON api_akungaming USING GIN (search_vector)",
+]
+POSTGRES_LEPAS = [
+    "DROP INDEX IF EXISTS akun_search_vector_idx",
+    "DROP TRIGGER IF EXISTS api_akungaming_search_vector_trg ON api_akungaming",
+    "DROP FUNCTION IF EXISTS api_akungaming_search_vector()",
+]
+
+# SQLite: tabel FTS5 external-content (isi teks tetap di api_akungaming, rowid = id),
+# disinkronkan trigger insert/update/delete.
+SQLITE_PASANG = [
+    """
+    CREATE VIRTUAL TABLE api_akungaming_fts USING fts5(
+        nama_akun, deskripsi, content='api_akungaming', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER api_akungaming_fts_ai AFTER INSERT ON api_akungaming BEGIN
+        INSERT INTO api_akungaming_fts(rowid, nama_akun, deskripsi) VALUES (new.id, new.nama_akun, new.deskripsi);
+    END
+    """,
+    """
+    CREATE TRIGGER api_akungaming_fts_ad AFTER DELETE ON api_akungaming BEGIN
+        INSERT INTO api_akungaming_fts(api_akungaming_fts, rowid, nama_akun, deskripsi)
+        VALUES ('delete', old.id, old.nama_akun, old.deskripsi);
+    END
+    """,
+    """
+    CREATE TRIGGER api_akungaming_fts_au AFTER UPDATE OF nama_akun, deskripsi ON api_akungaming BEGIN
+        INSERT INTO api_akungaming_fts(api_akungaming_fts, rowid, nama_akun, deskripsi)
+        VALUES ('delete', old.id, old.nama_akun, old.deskripsi);
+        INSERT INTO api_akungaming_fts(rowid, nama_akun, deskripsi) VALUES (new.id, new.nama_akun, new.deskripsi);
+    END
+    """,
+    "INSERT INTO api_akungaming_fts(api_akungaming_fts) VALUES ('rebuild')",
+]
+SQLITE_LEPAS = [
+    "DROP TRIGGER IF EXISTS api_akungaming_fts_au",
+    "DROP TRIGGER IF EXISTS api_akungaming_fts_ad",
+    "DROP TRIGGER IF EXISTS api_akungaming_fts_ai",
+    "DROP TABLE IF EXISTS api_akungaming_fts",
+]
+
+
+def _jalankan(schema_editor, per_vendor):
+    for sql in per_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def pasang_pencarian(apps, schema_editor):
+    _jalankan(schema_editor, {'postgresql': POSTGRES_PASANG, 'sqlite': SQLITE_PASANG})
+
+
+def lepas_pencarian(apps, schema_editor):
+    _jalankan(schema_editor, {'postgresql': POSTGRES_LEPAS, 'sqlite': SQLITE_LEPAS})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_ringkasanrating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='akungaming',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(pasang_pencarian, lepas_pencarian),
+    ]
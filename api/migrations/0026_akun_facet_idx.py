@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_akun_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='akungaming',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['game', 'harga', 'level'], name='akun_facet_idx'),
+        ),
+    ]
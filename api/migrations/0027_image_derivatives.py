@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_akun_facet_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='akungaming',
+            name='gambar_turunan',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='akungamingimage',
+            name='gambar_turunan',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='topupproduct',
+            name='gambar_turunan',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.CreateModel(
+            name='AntreanGambar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('percobaan', models.PositiveSmallIntegerField(default=0)),
+                ('proses_setelah', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error_terakhir', models.TextField(blank=True)),
+                ('dibuat_pada', models.DateTimeField(auto_now_add=True)),
+                ('diproses_pada', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['proses_setelah', 'id'], name='gambar_antrean_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'PENDING')), fields=('model', 'object_id'), name='gambar_antrean_unik')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_image_derivatives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='akungaming',
+            name='dipesan_hingga',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='akungaming',
+            name='dipesan_oleh',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='akungaming',
+            index=models.Index(condition=models.Q(('dipesan_hingga__isnull', False)), fields=['dipesan_hingga'], name='akun_reservasi_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_akun_reservasi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='klaim_hingga',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='emailoutbox',
+            index=models.Index(condition=models.Q(('status', 'SENDING')), fields=['klaim_hingga'], name='outbox_klaim_idx'),
+        ),
+    ]
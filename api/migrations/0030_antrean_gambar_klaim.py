@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_email_outbox_klaim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='antreangambar',
+            name='klaim_hingga',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='antreangambar',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('PROSES', 'Proses'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='antreangambar',
+            index=models.Index(condition=models.Q(('status', 'PROSES')), fields=['klaim_hingga'], name='gambar_klaim_idx'),
+        ),
+    ]
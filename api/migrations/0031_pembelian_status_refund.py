@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_antrean_gambar_klaim'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pembelian',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('CANCELED', 'Canceled'), ('REFUND', 'Perlu Refund')], default='PENDING', max_length=10),
+        ),
+    ]
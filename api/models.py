@@ -1,10 +1,17 @@
+import random
 import uuid
+from datetime import timedelta
 from decimal import Decimal
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import BooleanField, Count, Exists, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.conf import settings
-import midtransclient
+from django.utils import timezone
+from . import kupon_cache
+from .payment import get_snap_client
 
 class Kupon(models.Model):
     kode = models.CharField(max_length=50, unique=True)
@@ -15,10 +22,82 @@ class Kupon(models.Model):
     aktif = models.BooleanField(default=True)
     dibuat_pada = models.DateTimeField(auto_now_add=True)
     digunakan_oleh = models.ManyToManyField(User, related_name='kupon_digunakan', blank=True)
+    # Counter denormalisasi untuk tabel kupon admin (tanpa COUNT per baris).
+    # jumlah_pengguna mengikuti digunakan_oleh lewat sinyal m2m_changed (signals.py);
+    # total_diskon ditambah saat pesanan berkupon lunas (catat_diskon).
+    jumlah_pengguna = models.PositiveIntegerField(default=0)
+    total_diskon = models.DecimalField(max_digits=14, decimal_places=2, default=0)
 
     def __str__(self):
         return f"{self.kode} ({self.diskon_persen}%)"
 
+    @classmethod
+    def tambah_pengguna(cls, kupon_ids, jumlah):
+        cls.objects.filter(pk__in=kupon_ids).update(jumlah_pengguna=F('jumlah_pengguna') + jumlah)
+
+    @classmethod
+    def catat_diskon(cls, pembelian):
+        """Menambah total_diskon kupon dengan potongan harga pesanan (Akun atau Top Up)."""
+        if not pembelian.kupon_id or pembelian.harga_asli is None:
+            return
+        harga_bayar = pembelian.harga_pembelian if isinstance(pembelian, TopUpPembelian) else pembelian.harga_total
+        cls.objects.filter(pk=pembelian.kupon_id).update(
+            total_diskon=F('total_diskon') + (pembelian.harga_asli - harga_bayar)
+        )
+
+    @classmethod
+    def hitung_ulang_counter(cls):
+        """Membangun ulang jumlah_pengguna dan total_diskon dari data pesanan."""
+        Through = cls.digunakan_oleh.through
+        pengguna = Through.objects.filter(kupon_id=OuterRef('pk')).order_by().values('kupon_id') \
+                                  .annotate(n=Count('id')).values('n')
+        diskon_akun = Pembelian.objects.filter(kupon_id=OuterRef('pk'), status='COMPLETED', harga_asli__isnull=False) \
+                                       .order_by().values('kupon_id') \
+                                       .annotate(d=Sum(F('harga_asli') - F('harga_total'))).values('d')
+        diskon_topup = TopUpPembelian.objects.filter(kupon_id=OuterRef('pk'), status='COMPLETED', harga_asli__isnull=False) \
+                                             .order_by().values('kupon_id') \
+                                             .annotate(d=Sum(F('harga_asli') - F('harga_pembelian'))).values('d')
+        nol = Value(0, output_field=models.DecimalField(max_digits=14, decimal_places=2))
+        cls.objects.update(
+            jumlah_pengguna=Coalesce(Subquery(pengguna), 0),
+            total_diskon=Coalesce(Subquery(diskon_akun), nol) + Coalesce(Subquery(diskon_topup), nol),
+        )
+
+class AkunGamingQuerySet(models.QuerySet):
+    def for_listing(self, user=None):
+        """
+        Menyiapkan queryset untuk list akun: status favorit dihitung dengan satu
+        subquery Exists dan galeri gambar di-prefetch, jadi serializer tidak
+        menjalankan query per baris.
+        """
+        if user is not None and user.is_authenticated:
+            favorit = Exists(self.model.favorited_by.through.objects.filter(
+                akungaming_id=OuterRef('pk'), user_id=user.pk
+            ))
+        else:
+            favorit = Value(False, output_field=BooleanField())
+        return self.annotate(is_favorited=favorit).prefetch_related('images')
+
+    def random_sample(self, size, window_factor=4):
+        """
+        Mengambil `size` akun acak tanpa ORDER BY RANDOM(). Dipilih satu pivot id
+        acak di rentang id queryset, lalu dibaca satu jendela kecil id setelah pivot
+        (berputar ke awal jika kurang) lewat index (game, id), dan jendela itu yang
+        diacak. Biayanya tidak bergantung pada jumlah akun di katalog.
+        """
+        ids_queryset = self.order_by('id').values_list('id', flat=True)
+        # first()/last() = ORDER BY id LIMIT 1, dijawab langsung dari index.
+        min_id = ids_queryset.first()
+        if min_id is None:
+            return self.none()
+        max_id = ids_queryset.last()
+        window = size * window_factor
+        pivot = random.randint(min_id, max_id)
+        ids = list(ids_queryset.filter(id__gte=pivot)[:window])
+        if len(ids) < window:
+            ids += list(ids_queryset.filter(id__lt=pivot)[:window - len(ids)])
+        return self.filter(id__in=random.sample(ids, min(size, len(ids))))
+
 class AkunGaming(models.Model):
     GAME_CHOICES = [
         ('Mobile Legends', 'Mobile Legends'),
@@ -33,15 +112,50 @@ class AkunGaming(models.Model):
     deskripsi = models.TextField()
     harga = models.DecimalField(max_digits=10, decimal_places=2)
     gambar = models.ImageField(upload_to='account_images/',blank=True, null=True)
+    # Ukuran turunan gambar (thumbnail/card/full, WebP + JPEG), diisi api/images.py.
+    gambar_turunan = models.JSONField(default=dict, blank=True, editable=False)
     is_sold = models.BooleanField(default=False)
+    # Reservasi checkout (lihat api/reservasi.py): akun ditahan untuk satu pembeli
+    # sampai dipesan_hingga. Reservasi yang sudah lewat dianggap tidak ada.
+    dipesan_oleh = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    dipesan_hingga = models.DateTimeField(null=True, blank=True)
     dibuat_pada = models.DateTimeField(auto_now_add=True)
+    # Ikut diperbarui saat galeri berubah (lihat signals.py); dipakai untuk ETag/Last-Modified.
+    diperbarui_pada = models.DateTimeField(auto_now=True)
+    # Diisi trigger database di PostgreSQL (nama_akun bobot A, deskripsi bobot B), lihat
+    # api/search.py. Di SQLite pencarian memakai tabel FTS5 terpisah dan kolom ini kosong.
+    search_vector = SearchVectorField(null=True, editable=False)
     favorited_by = models.ManyToManyField(User, related_name='favorite_accounts', blank=True)
     akun_email = models.CharField(max_length=255, blank=True, null=True, help_text="Email/Username akun game (akan dienkripsi)")
     akun_password = models.CharField(max_length=255, blank=True, null=True, help_text="Password akun game (akan dienkripsi)")
 
+    objects = AkunGamingQuerySet.as_manager()
+
+    class Meta:
+        # Index parsial hanya untuk akun yang belum terjual: itulah satu-satunya
+        # bagian tabel yang dibaca katalog, dan urutannya cocok dengan sort katalog.
+        indexes = [
+            models.Index(fields=['dibuat_pada', 'id'], condition=Q(is_sold=False), name='akun_tersedia_baru_idx'),
+            models.Index(fields=['harga', 'id'], condition=Q(is_sold=False), name='akun_tersedia_harga_idx'),
+            models.Index(fields=['game', 'dibuat_pada', 'id'], condition=Q(is_sold=False), name='akun_game_baru_idx'),
+            models.Index(fields=['game', 'harga', 'id'], condition=Q(is_sold=False), name='akun_game_harga_idx'),
+            # Probing id acak untuk akun serupa (AkunGamingQuerySet.random_sample).
+            models.Index(fields=['game', 'id'], condition=Q(is_sold=False), name='akun_game_id_idx'),
+            # Validator ETag/Last-Modified list katalog (api/conditional.py): index-only scan.
+            models.Index(fields=['game', 'diperbarui_pada'], name='akun_game_diperbarui_idx'),
+            # Query GROUP BY facet katalog (api/facets.py) cukup membaca index ini.
+            models.Index(fields=['game', 'harga', 'level'], condition=Q(is_sold=False), name='akun_facet_idx'),
+            # Mencari reservasi yang sudah kedaluwarsa (manage.py release_expired_reservations).
+            models.Index(fields=['dipesan_hingga'], condition=Q(dipesan_hingga__isnull=False), name='akun_reservasi_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nama_akun} - {self.game}"
 
+    @property
+    def sedang_dipesan(self):
+        return self.dipesan_hingga is not None and self.dipesan_hingga > timezone.now()
+
 class TopUpProduct(models.Model):
     GAME_CHOICES = [
         ('Mobile Legends', 'Mobile Legends'),
@@ -54,12 +168,17 @@ class TopUpProduct(models.Model):
     nama_paket = models.CharField(max_length=100)
     harga = models.DecimalField(max_digits=10, decimal_places=2)
     gambar = models.ImageField(upload_to='topup_images/', blank=True, null=True)
+    gambar_turunan = models.JSONField(default=dict, blank=True, editable=False)
+    diperbarui_pada = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.game} - {self.nama_paket}"
 
 class Pembelian(models.Model):
-    STATUS_CHOICES = [('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('CANCELED', 'Canceled')]
+    # REFUND: dibayar, tetapi akunnya sudah terjual ke pesanan lain atau dihapus (lihat api/webhooks.py).
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('CANCELED', 'Canceled'), ('REFUND', 'Perlu Refund'),
+    ]
     pembeli = models.ForeignKey(User, on_delete=models.CASCADE)
     akun = models.ForeignKey(AkunGaming, on_delete=models.SET_NULL, null=True, blank=True)
     harga_total = models.DecimalField(max_digits=10, decimal_places=2)
@@ -72,6 +191,22 @@ class Pembelian(models.Model):
     rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)], null=True, blank=True)
     ulasan = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Riwayat pembelian user, terbaru dulu.
+            models.Index(fields=['pembeli', 'dibuat_pada'], name='pembelian_pembeli_tgl_idx'),
+            # Feed pesanan admin (semua user), terbaru dulu.
+            models.Index(fields=['dibuat_pada', 'id'], name='pembelian_tgl_idx'),
+            # Agregat dashboard (status='COMPLETED') dibaca langsung dari index.
+            models.Index(fields=['status', 'harga_total'], name='pembelian_status_total_idx'),
+            # Ulasan per game: hanya pesanan lunas yang sudah diberi rating.
+            models.Index(
+                fields=['dibuat_pada'],
+                condition=Q(status='COMPLETED', rating__isnull=False),
+                name='pembelian_ulasan_idx',
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if isinstance(self.kode_transaksi, uuid.UUID):
              self.kode_transaksi = f"AKUN-{self.kode_transaksi}"
@@ -81,49 +216,69 @@ class Pembelian(models.Model):
         return f"Transaksi {self.kode_transaksi} oleh {self.pembeli.username}"
 
     @classmethod
-    def create_pembelian(cls, pembeli, akun, kode_kupon_str=None):
+    def siapkan_pembelian(cls, pembeli, akun, kode_kupon_str=None):
+        """
+        Menghitung harga dan membuat transaksi Midtrans untuk pesanan yang belum
+        disimpan. Mengembalikan (pembelian, midtrans_token); pemanggil menyimpan
+        pesanan (bersama email/outbox-nya) dalam transaksi database yang pendek,
+        jadi request ke Midtrans tidak berjalan di dalam transaksi.
+        """
         harga_asli = akun.harga
         harga_final = harga_asli
         kupon_obj = None
 
         if kode_kupon_str:
-            try:
-                kupon = Kupon.objects.get(kode__iexact=kode_kupon_str, aktif=True)
-                if kupon.digunakan_oleh.filter(id=pembeli.id).exists():
-                    raise ValueError('Kupon ini sudah pernah Anda gunakan.')
-                diskon = (harga_asli * Decimal(kupon.diskon_persen / 100))
-                harga_final = harga_asli - diskon
-                kupon_obj = kupon
-            except Kupon.DoesNotExist:
+            kupon = kupon_cache.get_kupon_aktif(kode_kupon_str)
+            if kupon is None:
                 raise ValueError('Kupon yang Anda kirim tidak valid.')
+            if kupon_cache.sudah_dipakai(kupon.pk, pembeli.id):
+                raise ValueError('Kupon ini sudah pernah Anda gunakan.')
+            diskon = (harga_asli * Decimal(kupon.diskon_persen / 100))
+            harga_final = harga_asli - diskon
+            kupon_obj = kupon
 
-        pembelian = cls.objects.create(
+        pembelian = cls(
             pembeli=pembeli,
             akun=akun,
             harga_total=harga_final,
             harga_asli=harga_asli,
             kupon=kupon_obj,
+            kode_transaksi=f"AKUN-{uuid.uuid4()}",
             status='PENDING'
         )
 
+        # Pembayaran harus kedaluwarsa paling lambat bersama reservasi akun (lihat
+        # api/reservasi.py), supaya akun yang sudah dilepas ke pembeli lain tidak bisa
+        # dibayar dua kali. start_time dikirim eksplisit (bukan saat Midtrans menerima
+        # request) dan durasinya dibulatkan ke bawah dari sisa reservasi.
+        mulai = timezone.now().replace(microsecond=0)
+        batas = akun.dipesan_hingga or mulai + timedelta(seconds=settings.AKUN_RESERVASI_TTL_SECONDS)
+        durasi = int((batas - mulai).total_seconds() // 60)
+        if durasi < 1:
+            raise ValueError('Waktu reservasi akun sudah habis, silakan checkout ulang.')
+        expiry = {
+            'start_time': timezone.localtime(mulai).strftime('%Y-%m-%d %H:%M:%S %z'),
+            'unit': 'minute',
+            'duration': durasi,
+        }
+
         try:
-            snap = midtransclient.Snap(
-                is_production=settings.MIDTRANS_IS_PRODUCTION,
-                server_key=settings.MIDTRANS_SERVER_KEY,
-                client_key=settings.MIDTRANS_CLIENT_KEY
-            )
+            snap = get_snap_client()
             transaction_details = {
-                'order_id': str(pembelian.kode_transaksi),
+                'order_id': pembelian.kode_transaksi,
                 'gross_amount': int(pembelian.harga_total)
             }
-            transaction = snap.create_transaction({'transaction_details': transaction_details})
-            midtrans_token = transaction['token']
-            pembelian.midtrans_token = midtrans_token
-            pembelian.save()
-            return pembelian, midtrans_token
+            transaksi_midtrans = snap.create_transaction({'transaction_details': transaction_details, 'expiry': expiry})
         except Exception as e:
-            pembelian.delete()
             raise ValueError(f"Gagal membuat token pembayaran Midtrans: {e}") from e
+        pembelian.midtrans_token = transaksi_midtrans['token']
+        return pembelian, pembelian.midtrans_token
+
+    @classmethod
+    def create_pembelian(cls, pembeli, akun, kode_kupon_str=None):
+        pembelian, midtrans_token = cls.siapkan_pembelian(pembeli, akun, kode_kupon_str)
+        pembelian.save()
+        return pembelian, midtrans_token
 
 class TopUpPembelian(models.Model):
     STATUS_CHOICES = [('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('CANCELED', 'Canceled')]
@@ -139,6 +294,13 @@ class TopUpPembelian(models.Model):
     midtrans_token = models.CharField(max_length=255, null=True, blank=True)
     tanggal_pembelian = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['pembeli', 'tanggal_pembelian'], name='topup_pembeli_tgl_idx'),
+            models.Index(fields=['tanggal_pembelian', 'id'], name='topup_tgl_idx'),
+            models.Index(fields=['status', 'harga_pembelian'], name='topup_status_total_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if isinstance(self.kode_transaksi, uuid.UUID):
             self.kode_transaksi = f"TOPUP-{self.kode_transaksi}"
@@ -158,15 +320,14 @@ class TopUpPembelian(models.Model):
         kupon_obj = None
 
         if kode_kupon_str:
-            try:
-                kupon = Kupon.objects.get(kode__iexact=kode_kupon_str, aktif=True)
-                if kupon.digunakan_oleh.filter(id=pembeli.id).exists():
-                    raise ValueError('Kupon ini sudah pernah Anda gunakan.')
-                diskon = (harga_asli * Decimal(kupon.diskon_persen / 100))
-                harga_final = harga_asli - diskon
-                kupon_obj = kupon
-            except Kupon.DoesNotExist:
+            kupon = kupon_cache.get_kupon_aktif(kode_kupon_str)
+            if kupon is None:
                 raise ValueError('Kupon yang Anda kirim tidak valid.')
+            if kupon_cache.sudah_dipakai(kupon.pk, pembeli.id):
+                raise ValueError('Kupon ini sudah pernah Anda gunakan.')
+            diskon = (harga_asli * Decimal(kupon.diskon_persen / 100))
+            harga_final = harga_asli - diskon
+            kupon_obj = kupon
 
         pembelian = cls.objects.create(
             pembeli=pembeli,
@@ -180,11 +341,7 @@ class TopUpPembelian(models.Model):
         )
 
         try:
-            snap = midtransclient.Snap(
-                is_production=settings.MIDTRANS_IS_PRODUCTION,
-                server_key=settings.MIDTRANS_SERVER_KEY,
-                client_key=settings.MIDTRANS_CLIENT_KEY
-            )
+            snap = get_snap_client()
             transaction_details = {
                 'order_id': str(pembelian.kode_transaksi),
                 'gross_amount': int(pembelian.harga_pembelian)
@@ -202,6 +359,275 @@ class TopUpPembelian(models.Model):
 class AkunGamingImage(models.Model):
     akun = models.ForeignKey(AkunGaming, related_name='images', on_delete=models.CASCADE)
     gambar = models.ImageField(upload_to='account_gallery/')
+    gambar_turunan = models.JSONField(default=dict, blank=True, editable=False)
+    diperbarui_pada = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Gambar untuk {self.akun.nama_akun}"
+
+class DashboardStats(models.Model):
+    """
+    Proyeksi statistik dashboard admin (satu baris, pk=1). Diperbarui secara atomik
+    dengan F() saat pesanan lunas/dibatalkan dan saat akun dibuat/terjual/dihapus,
+    jadi dashboard cukup membaca satu baris. Bisa dibangun ulang lewat
+    `manage.py rebuild_dashboard_stats`.
+    """
+    akun_tersedia = models.IntegerField(default=0)
+    akun_terjual = models.IntegerField(default=0)
+    topup_berhasil = models.IntegerField(default=0)
+    revenue_akun = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenue_topup = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    diperbarui_pada = models.DateTimeField(auto_now=True)
+
+    FIELDS = ['akun_tersedia', 'akun_terjual', 'topup_berhasil', 'revenue_akun', 'revenue_topup']
+
+    def __str__(self):
+        return f"Statistik dashboard ({self.diperbarui_pada:%Y-%m-%d %H:%M})"
+
+    @classmethod
+    def hitung_live(cls):
+        """Menghitung statistik langsung dari tabel (lima agregat, mahal)."""
+        return {
+            'akun_tersedia': AkunGaming.objects.filter(is_sold=False).count(),
+            'akun_terjual': AkunGaming.objects.filter(is_sold=True).count(),
+            'topup_berhasil': TopUpPembelian.objects.filter(status='COMPLETED').count(),
+            'revenue_akun': Pembelian.objects.filter(status='COMPLETED').aggregate(total=Sum('harga_total'))['total'] or Decimal('0'),
+            'revenue_topup': TopUpPembelian.objects.filter(status='COMPLETED').aggregate(total=Sum('harga_pembelian'))['total'] or Decimal('0'),
+        }
+
+    @classmethod
+    def rebuild(cls):
+        with transaction.atomic():
+            stats, _ = cls.objects.update_or_create(pk=1, defaults=cls.hitung_live())
+        return stats
+
+    @classmethod
+    def get(cls):
+        stats = cls.objects.filter(pk=1).first()
+        return stats if stats is not None else cls.rebuild()
+
+    @classmethod
+    def tambah(cls, **delta):
+        """
+        Menambahkan delta ke baris statistik (UPDATE ... SET x = x + delta).
+        Panggil setelah perubahannya disimpan, di transaksi yang sama.
+        """
+        delta = {field: value for field, value in delta.items() if value}
+        if not delta:
+            return
+        updated = cls.objects.filter(pk=1).update(
+            diperbarui_pada=timezone.now(),
+            **{field: F(field) + value for field, value in delta.items()}
+        )
+        if not updated:
+            cls.rebuild()
+
+    @classmethod
+    def catat_akun_terjual(cls, terjual=True):
+        arah = 1 if terjual else -1
+        cls.tambah(akun_tersedia=-arah, akun_terjual=arah)
+
+    @classmethod
+    def catat_status_pesanan(cls, pembelian, status_lama):
+        """Mencatat perubahan revenue saat pesanan masuk atau keluar dari status COMPLETED."""
+        if status_lama == pembelian.status:
+            return
+        if pembelian.status == 'COMPLETED':
+            arah = 1
+        elif status_lama == 'COMPLETED':
+            arah = -1
+        else:
+            return
+        if isinstance(pembelian, TopUpPembelian):
+            cls.tambah(topup_berhasil=arah, revenue_topup=arah * pembelian.harga_pembelian)
+        else:
+            cls.tambah(revenue_akun=arah * pembelian.harga_total)
+
+class EmailOutbox(models.Model):
+    """
+    Email transaksional yang menunggu dikirim. Ditulis di transaksi yang sama dengan
+    perubahan datanya (email tidak terkirim untuk transaksi yang di-rollback), lalu
+    dikirim secara batch lewat satu koneksi SMTP oleh `manage.py send_outbox_emails`.
+    Baris yang sedang dikirim berstatus SENDING sampai `klaim_hingga`; jika worker
+    mati sebelum mencatat hasilnya, baris itu diklaim ulang setelah lease habis.
+    """
+    STATUS_CHOICES = [('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')]
+    subjek = models.CharField(max_length=255)
+    pesan = models.TextField()
+    pengirim = models.CharField(max_length=254, blank=True)
+    penerima = models.CharField(max_length=254)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    percobaan = models.PositiveSmallIntegerField(default=0)
+    kirim_setelah = models.DateTimeField(default=timezone.now)
+    error_terakhir = models.TextField(blank=True)
+    dibuat_pada = models.DateTimeField(auto_now_add=True)
+    terkirim_pada = models.DateTimeField(null=True, blank=True)
+    klaim_hingga = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Antrean worker: hanya baris PENDING, urut jatuh tempo.
+            models.Index(fields=['kirim_setelah', 'id'], condition=Q(status='PENDING'), name='outbox_antrean_idx'),
+            # Klaim worker yang lease-nya sudah habis.
+            models.Index(fields=['klaim_hingga'], condition=Q(status='SENDING'), name='outbox_klaim_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.status}] {self.subjek} -> {self.penerima}"
+
+class MidtransNotifikasi(models.Model):
+    """
+    Notifikasi Midtrans yang sudah diproses, satu baris per (transaction_id, status).
+    Midtrans mengirim ulang notifikasi yang sama; kiriman duplikat cukup dicek
+    lewat unique index ini lalu langsung dijawab 200 tanpa mengulang efek sampingnya.
+    """
+    transaction_id = models.CharField(max_length=64)
+    transaction_status = models.CharField(max_length=20)
+    order_id = models.CharField(max_length=50, db_index=True)
+    diterima_pada = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['transaction_id', 'transaction_status'], name='notifikasi_unik'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} {self.transaction_status} ({self.transaction_id})"
+
+class MidtransInbox(models.Model):
+    """
+    Notifikasi Midtrans mentah yang sudah lolos verifikasi signature. Webhook hanya
+    menyimpan baris ini lalu langsung menjawab 200; pemrosesannya (update status,
+    email, dll) dilakukan `manage.py process_webhook_inbox`, berurutan per order_id.
+    """
+    STATUS_CHOICES = [('PENDING', 'Pending'), ('DONE', 'Done'), ('FAILED', 'Failed')]
+    order_id = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    hasil = models.CharField(max_length=20, blank=True)
+    percobaan = models.PositiveSmallIntegerField(default=0)
+    proses_setelah = models.DateTimeField(default=timezone.now)
+    error_terakhir = models.TextField(blank=True)
+    diterima_pada = models.DateTimeField(auto_now_add=True)
+    diproses_pada = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Antrean worker: hanya baris PENDING, urut jatuh tempo.
+            models.Index(fields=['proses_setelah', 'id'], condition=Q(status='PENDING'), name='inbox_antrean_idx'),
+            # Cek "masih ada notifikasi lebih lama untuk order ini?" (urutan per order).
+            models.Index(fields=['order_id', 'id'], condition=Q(status='PENDING'), name='inbox_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.status}] {self.order_id} {self.payload.get('transaction_status', '')}"
+
+class RingkasanRating(models.Model):
+    """
+    Ringkasan rating ulasan per game (jumlah, total, histogram bintang 1-5). Diperbarui
+    dengan F() saat ulasan dikirim, jadi header rating halaman game cukup membaca
+    satu baris. Bisa dibangun ulang lewat `manage.py rebuild_rating_summaries`.
+    """
+    game = models.CharField(max_length=50, unique=True)
+    jumlah = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    bintang_1 = models.PositiveIntegerField(default=0)
+    bintang_2 = models.PositiveIntegerField(default=0)
+    bintang_3 = models.PositiveIntegerField(default=0)
+    bintang_4 = models.PositiveIntegerField(default=0)
+    bintang_5 = models.PositiveIntegerField(default=0)
+    diperbarui_pada = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rating {self.game}: {self.rata_rata} ({self.jumlah} ulasan)"
+
+    @property
+    def rata_rata(self):
+        if not self.jumlah:
+            return None
+        return round(Decimal(self.total) / self.jumlah, 2)
+
+    @property
+    def histogram(self):
+        return {str(bintang): getattr(self, f'bintang_{bintang}') for bintang in range(1, 6)}
+
+    @staticmethod
+    def ulasan_qs():
+        return Pembelian.objects.filter(status='COMPLETED', rating__isnull=False, akun__isnull=False)
+
+    @classmethod
+    def hitung_live(cls, game):
+        agregat = {'jumlah': Count('id'), 'total': Sum('rating')}
+        for bintang in range(1, 6):
+            agregat[f'bintang_{bintang}'] = Count('id', filter=Q(rating=bintang))
+        hasil = cls.ulasan_qs().filter(akun__game=game).aggregate(**agregat)
+        hasil['total'] = hasil['total'] or 0
+        return hasil
+
+    @classmethod
+    def rebuild(cls, game=None):
+        """Membangun ulang ringkasan satu game, atau semua game jika `game` kosong."""
+        games = [game] if game else set(cls.ulasan_qs().values_list('akun__game', flat=True).distinct()) \
+                                    | set(cls.objects.values_list('game', flat=True))
+        with transaction.atomic():
+            for nama in games:
+                cls.objects.update_or_create(game=nama, defaults=cls.hitung_live(nama))
+
+    @classmethod
+    def get(cls, game):
+        ringkasan = cls.objects.filter(game=game).first()
+        if ringkasan is not None:
+            return ringkasan
+        if game not in dict(AkunGaming.GAME_CHOICES):
+            # Jangan buat baris untuk nama game sembarang dari URL.
+            return cls(game=game)
+        cls.rebuild(game)
+        return cls.objects.get(game=game)
+
+    @classmethod
+    def tambah(cls, game, rating, arah=1):
+        """
+        Mencatat ulasan baru (arah=1) atau ulasan yang hilang (arah=-1). Panggil setelah
+        perubahannya disimpan, di transaksi yang sama.
+        """
+        updated = cls.objects.filter(game=game).update(
+            jumlah=F('jumlah') + arah,
+            total=F('total') + arah * rating,
+            diperbarui_pada=timezone.now(),
+            **{f'bintang_{rating}': F(f'bintang_{rating}') + arah},
+        )
+        if not updated:
+            cls.rebuild(game)
+
+class AntreanGambar(models.Model):
+    """
+    Gambar yang menunggu dibuatkan ukuran turunannya. Diisi sinyal saat gambar
+    diunggah atau diganti, lalu diproses `manage.py process_image_jobs` di luar
+    request (api/images.py). Paling banyak satu baris PENDING per objek. Job yang
+    sedang dikerjakan berstatus PROSES sampai `klaim_hingga`.
+    """
+    STATUS_CHOICES = [('PENDING', 'Pending'), ('PROSES', 'Proses'), ('DONE', 'Done'), ('FAILED', 'Failed')]
+    model = models.CharField(max_length=50)  # _meta.label_lower, misal 'api.akungaming'
+    object_id = models.BigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    percobaan = models.PositiveSmallIntegerField(default=0)
+    proses_setelah = models.DateTimeField(default=timezone.now)
+    error_terakhir = models.TextField(blank=True)
+    dibuat_pada = models.DateTimeField(auto_now_add=True)
+    diproses_pada = models.DateTimeField(null=True, blank=True)
+    klaim_hingga = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Antrean worker: hanya baris PENDING, urut jatuh tempo.
+            models.Index(fields=['proses_setelah', 'id'], condition=Q(status='PENDING'), name='gambar_antrean_idx'),
+            # Klaim worker yang lease-nya sudah habis.
+            models.Index(fields=['klaim_hingga'], condition=Q(status='PROSES'), name='gambar_klaim_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id'], condition=Q(status='PENDING'),
+                                    name='gambar_antrean_unik'),
+        ]
 
     def __str__(self):
-        return f"Gambar untuk {self.akun.nama_akun}"
\ No newline at end of file
+        return f"[{self.status}] {self.model} #{self.object_id}"
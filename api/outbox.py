@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+MAX_BACKOFF = timedelta(hours=1)
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """
+    Pengganti send_mail(): menyimpan email ke outbox (satu baris per penerima) di
+    transaksi yang sedang berjalan. Pengirimannya dilakukan worker, bukan request.
+    """
+    EmailOutbox.objects.bulk_create([
+        EmailOutbox(subjek=subject, pesan=message, pengirim=from_email or '', penerima=penerima)
+        for penerima in recipient_list if penerima
+    ])
+
+
+def _backoff(percobaan):
+    detik = settings.EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** (percobaan - 1))
+    return min(timedelta(seconds=detik), MAX_BACKOFF)
+
+
+def _klaim(batch_size):
+    """
+    Mengklaim satu batch dalam transaksi pendek: baris PENDING yang jatuh tempo dan
+    baris SENDING yang lease-nya habis (worker sebelumnya mati) diubah menjadi
+    SENDING dengan lease baru. Kunci baris dilepas saat commit, sebelum SMTP dipanggil.
+    """
+    sekarang = timezone.now()
+    klaim_hingga = sekarang + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        # skip_locked: beberapa worker bisa mengklaim bersamaan tanpa mengambil baris yang sama.
+        batch = list(
+            EmailOutbox.objects
+            .select_for_update(skip_locked=db_connection.features.has_select_for_update_skip_locked)
+            .filter(
+                Q(status='PENDING', kirim_setelah__lte=sekarang)
+                | Q(status='SENDING', klaim_hingga__lte=sekarang)
+            )
+            .order_by('kirim_setelah', 'id')[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in batch]).update(
+                status='SENDING', klaim_hingga=klaim_hingga,
+            )
+    return batch, klaim_hingga
+
+
+def _catat(email, klaim_hingga, **fields):
+    """
+    Mencatat hasil satu email dengan satu UPDATE. Syarat lease memastikan worker yang
+    klaimnya sudah diambil alih tidak menimpa hasil worker lain.
+    """
+    return EmailOutbox.objects.filter(pk=email.pk, status='SENDING', klaim_hingga=klaim_hingga).update(
+        klaim_hingga=None, **fields,
+    )
+
+
+def deliver_outbox(batch_size=None, connection=None):
+    """
+    Mengirim satu batch email yang sudah jatuh tempo lewat satu koneksi SMTP.
+    Batch diklaim dulu (SENDING + lease) lalu dikirim di luar transaksi, dan hasil
+    setiap email dicatat sendiri-sendiri; jika worker mati di tengah batch, hanya
+    email yang belum tercatat yang dikirim ulang setelah lease habis.
+    Koneksi yang diberikan pemanggil dibiarkan terbuka agar bisa dipakai ulang antar
+    batch. Email yang gagal dijadwalkan ulang dengan backoff eksponensial, dan
+    ditandai FAILED setelah EMAIL_OUTBOX_MAX_ATTEMPTS percobaan.
+    Mengembalikan (jumlah terkirim, jumlah gagal).
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    batch, klaim_hingga = _klaim(batch_size)
+    if not batch:
+        return 0, 0
+
+    email_connection = connection or get_connection(fail_silently=False)
+    terkirim = gagal = 0
+    try:
+        for email in batch:
+            pesan = EmailMessage(
+                email.subjek, email.pesan,
+                email.pengirim or settings.DEFAULT_FROM_EMAIL, [email.penerima],
+                connection=email_connection,
+            )
+            try:
+                email_connection.open()
+                email_connection.send_messages([pesan])
+            except Exception as e:
+                gagal += 1
+                percobaan = email.percobaan + 1
+                if percobaan >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                    hasil = {'status': 'FAILED'}
+                else:
+                    hasil = {'status': 'PENDING', 'kirim_setelah': timezone.now() + _backoff(percobaan)}
+                _catat(email, klaim_hingga, percobaan=percobaan, error_terakhir=str(e), **hasil)
+                # Koneksi mungkin sudah putus; buka ulang untuk email berikutnya.
+                email_connection.close()
+                print(f"ERROR: Gagal mengirim email outbox #{email.id} ke {email.penerima}: {e}")
+            else:
+                terkirim += 1
+                _catat(email, klaim_hingga, status='SENT', terkirim_pada=timezone.now(), error_terakhir='')
+    finally:
+        if connection is None:
+            email_connection.close()
+    return terkirim, gagal
@@ -0,0 +1,233 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Pagination keyset (cursor) untuk list yang diurutkan berdasarkan kunci stabil,
+    misal ('-dibuat_pada', '-id'). Setiap halaman dibaca dengan satu range scan
+    (WHERE kunci < posisi ... LIMIT n), jadi halaman ke-1000 sama murahnya dengan
+    halaman pertama. Field terakhir pada ordering harus unik (biasanya 'id').
+
+    Mode ini opt-in: aktif jika request membawa parameter `cursor` atau `page_size`.
+    Responsnya mengikuti bentuk DRF: {'next': url, 'previous': url, 'results': [...]}
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    default_page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Cursor tidak valid.'
+
+    def __init__(self, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.next_position = None
+        self.previous_position = None
+
+    @classmethod
+    def is_requested(cls, request):
+        params = request.query_params
+        return cls.cursor_query_param in params or cls.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.default_page_size
+        if page_size <= 0:
+            return self.default_page_size
+        return min(page_size, self.max_page_size)
+
+    # --- Cursor encode/decode ---
+
+    def decode_cursor(self, sections):
+        encoded = self.request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            index = int(payload['s'])
+            reverse = bool(payload['r'])
+            _, queryset, ordering = sections[index]
+            values = payload['p']
+            if len(values) != len(ordering):
+                raise ValueError('Panjang posisi tidak cocok dengan ordering.')
+            position = [
+                self._to_python(queryset, field, value)
+                for field, value in zip(ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, IndexError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return index, position, reverse
+
+    def encode_cursor(self, index, position, reverse):
+        payload = {'s': index, 'r': reverse, 'p': [self._to_primitive(v) for v in position]}
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode())
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded.decode())
+
+    @staticmethod
+    def _to_primitive(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _to_python(queryset, field, value):
+        name = field.lstrip('-')
+        try:
+            return queryset.model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            pass
+        # Kolom hasil annotate(): pakai output_field dari anotasinya.
+        annotation = queryset.query.annotations.get(name)
+        if annotation is None:
+            return value
+        return annotation.output_field.to_python(value)
+
+    # --- Query ---
+
+    @staticmethod
+    def _position_of(obj, ordering):
+        if isinstance(obj, dict):
+            return [obj[field.lstrip('-')] for field in ordering]
+        return [getattr(obj, field.lstrip('-')) for field in ordering]
+
+    @staticmethod
+    def _keyset_filter(ordering, position, reverse):
+        """
+        Membangun filter "setelah posisi" untuk ordering komposit, misal
+        (a < x) OR (a = x AND b < y) untuk ('-a', '-b').
+        """
+        condition = Q()
+        equal_prefix = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal_prefix, **{f'{name}__{lookup}': value})
+            equal_prefix[name] = value
+        return condition
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+    def _fetch(self, sections, index, position, reverse, limit):
+        rows = []
+        indexes = range(index, -1, -1) if reverse else range(index, len(sections))
+        for i in indexes:
+            _, queryset, ordering = sections[i]
+            if i == index and position is not None:
+                queryset = queryset.filter(self._keyset_filter(ordering, position, reverse))
+            order_by = self._reverse_ordering(ordering) if reverse else ordering
+            rows.extend((i, obj) for obj in queryset.order_by(*order_by)[:limit - len(rows)])
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def paginate_sections(self, sections):
+        """
+        `sections` adalah daftar (nama, queryset, ordering) yang dibaca berurutan.
+        Mengembalikan list (nama, obj) untuk halaman ini.
+        """
+        cursor = self.decode_cursor(sections)
+        if cursor is None:
+            index, position, reverse = 0, None, False
+        else:
+            index, position, reverse = cursor
+
+        rows = self._fetch(sections, index, position, reverse, self.page_size + 1)
+        rows = self._finish_page(sections, rows, cursor is not None, reverse)
+        return [(sections[i][0], obj) for i, obj in rows]
+
+    def _finish_page(self, sections, rows, has_cursor, reverse):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if rows:
+            first_index, first_obj = rows[0]
+            last_index, last_obj = rows[-1]
+            first = (first_index, self._position_of(first_obj, sections[first_index][2]))
+            last = (last_index, self._position_of(last_obj, sections[last_index][2]))
+            if reverse:
+                self.previous_position = first if has_more else None
+                self.next_position = last
+            else:
+                self.next_position = last if has_more else None
+                self.previous_position = first if has_cursor else None
+        return rows
+
+    def paginate_queryset(self, queryset, ordering):
+        return [obj for _, obj in self.paginate_sections([(None, queryset, ordering)])]
+
+    def paginate_union(self, querysets, ordering):
+        """
+        Paginasi keyset atas UNION ALL beberapa queryset values() yang kolomnya sama.
+        Filter posisi dipasang di tiap cabang supaya masing-masing memakai index
+        sendiri, lalu penggabungan dan pengurutan dilakukan database dalam satu query.
+        Jika backend mendukung (PostgreSQL), tiap cabang juga dibatasi LIMIT.
+        """
+        sections = [(None, querysets[0], ordering)]
+        cursor = self.decode_cursor(sections)
+        position, reverse = (None, False) if cursor is None else cursor[1:]
+        rows = self._union_rows(querysets, ordering, position, reverse, self.page_size + 1)
+        rows = self._finish_page(sections, [(0, row) for row in rows], cursor is not None, reverse)
+        return [row for _, row in rows]
+
+    @classmethod
+    def iterate_union(cls, querysets, ordering, chunk_size=1000):
+        """
+        Generator yang membaca UNION ALL per chunk dengan keyset, untuk export.
+        Memori yang dipakai tidak lebih dari satu chunk, berapapun jumlah barisnya.
+        """
+        position = None
+        while True:
+            rows = cls._union_rows(querysets, ordering, position, False, chunk_size)
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            position = cls._position_of(rows[-1], ordering)
+
+    @classmethod
+    def _union_rows(cls, querysets, ordering, position, reverse, limit):
+        order_by = cls._reverse_ordering(ordering) if reverse else ordering
+        branches = []
+        for queryset in querysets:
+            if position is not None:
+                queryset = queryset.filter(cls._keyset_filter(ordering, position, reverse))
+            if len(querysets) > 1 and connection.features.supports_slicing_ordering_in_compound:
+                queryset = queryset.order_by(*order_by)[:limit]
+            branches.append(queryset)
+        combined = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+        return list(combined.order_by(*order_by)[:limit])
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(*self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(*self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
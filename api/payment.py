@@ -0,0 +1,83 @@
+"""
+Klien payment gateway (Midtrans Snap) bersama untuk satu proses. Semua checkout
+memakai satu requests.Session dengan connection pool, jadi koneksi TCP+TLS ke
+Midtrans dipakai ulang, dan setiap request dibatasi connect/read timeout supaya
+Midtrans yang lambat tidak menahan worker gunicorn.
+"""
+import threading
+
+import midtransclient
+import requests
+from django.conf import settings
+from midtransclient.config import ApiConfig
+from requests.adapters import HTTPAdapter
+
+_lock = threading.Lock()
+_snap_client = None
+
+
+class _TimeoutSession(requests.Session):
+    """Session yang memberi timeout default ke setiap request (midtransclient tidak mengirim timeout)."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class _ApiConfig(ApiConfig):
+    """ApiConfig dengan base URL Snap yang bisa diganti (misal ke stand-in lokal)."""
+
+    def __init__(self, *args, snap_base_url=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.snap_base_url = snap_base_url
+
+    def get_snap_base_url(self):
+        return self.snap_base_url or super().get_snap_base_url()
+
+
+def build_snap_client(snap_base_url=None, timeout=None, pool_size=None):
+    """Membuat Snap baru dengan session ber-pool dan timeout dari settings."""
+    snap = midtransclient.Snap(
+        is_production=settings.MIDTRANS_IS_PRODUCTION,
+        server_key=settings.MIDTRANS_SERVER_KEY,
+        client_key=settings.MIDTRANS_CLIENT_KEY
+    )
+    snap.api_config = _ApiConfig(
+        settings.MIDTRANS_IS_PRODUCTION,
+        settings.MIDTRANS_SERVER_KEY,
+        settings.MIDTRANS_CLIENT_KEY,
+        snap_base_url=snap_base_url or settings.MIDTRANS_SNAP_BASE_URL,
+    )
+
+    pool_size = pool_size or settings.MIDTRANS_POOL_SIZE
+    session = _TimeoutSession(timeout or (settings.MIDTRANS_CONNECT_TIMEOUT, settings.MIDTRANS_READ_TIMEOUT))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # HttpClient midtransclient memanggil `self.http_client.request(...)`, yang
+    # antarmukanya sama dengan requests.Session.
+    snap.http_client.http_client = session
+    return snap
+
+
+def get_snap_client():
+    """Mengembalikan Snap bersama untuk proses ini (dibuat sekali, saat pertama dipakai)."""
+    global _snap_client
+    if _snap_client is None:
+        with _lock:
+            if _snap_client is None:
+                _snap_client = build_snap_client()
+    return _snap_client
+
+
+def reset_snap_client():
+    """Menutup dan membuang Snap bersama, misal setelah settings Midtrans diubah."""
+    global _snap_client
+    with _lock:
+        if _snap_client is not None:
+            _snap_client.http_client.http_client.close()
+        _snap_client = None
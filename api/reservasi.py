@@ -0,0 +1,121 @@
+"""
+Reservasi akun saat checkout.
+
+Setiap AkunGaming unik, jadi sebelum pesanan dan token Midtrans dibuat, akun
+ditahan untuk satu pembeli selama AKUN_RESERVASI_TTL_SECONDS lewat satu UPDATE
+bersyarat (belum terjual DAN belum dipesan, atau reservasinya sudah lewat).
+UPDATE itu atomik di database, jadi dari beberapa checkout bersamaan hanya satu
+yang mendapat baris; sisanya langsung ditolak tanpa memanggil Midtrans.
+Statement ini berjalan di luar transaksi panjang, jadi tidak ada kunci baris
+yang tertahan selama request ke Midtrans.
+
+Reservasi dilepas saat pembuatan token gagal, saat pesanan dibatalkan lewat
+webhook, dan saat lunas (akun menjadi terjual). Reservasi yang lewat TTL
+langsung dianggap tidak ada oleh pesan(); `manage.py release_expired_reservations`
+mengosongkan kolomnya dan membuang cache katalog supaya status "dipesan"
+di katalog ikut hilang.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import catalog_cache
+from .models import AkunGaming, Pembelian
+
+
+class AkunTidakTersedia(Exception):
+    def __init__(self, pesan, dipesan_hingga=None):
+        super().__init__(pesan)
+        self.dipesan_hingga = dipesan_hingga
+
+
+def _bump(akun_id, game):
+    catalog_cache.bump_on_commit(*catalog_cache.akun_scopes(akun_id, game))
+
+
+def pesan(akun_id, pembeli):
+    """
+    Menahan akun untuk `pembeli`. Pembeli yang sama boleh memesan ulang akun yang
+    sedang ditahan untuknya. Mengembalikan AkunGaming; melempar AkunTidakTersedia.
+    """
+    sekarang = timezone.now()
+    bebas = Q(dipesan_hingga__isnull=True) | Q(dipesan_hingga__lte=sekarang) | Q(dipesan_oleh=pembeli)
+    with transaction.atomic():
+        jumlah = AkunGaming.objects.filter(bebas, pk=akun_id, is_sold=False).update(
+            dipesan_oleh=pembeli,
+            dipesan_hingga=sekarang + timedelta(seconds=settings.AKUN_RESERVASI_TTL_SECONDS),
+            diperbarui_pada=sekarang,
+        )
+        akun = AkunGaming.objects.filter(pk=akun_id).first()
+        if akun is None:
+            raise AkunTidakTersedia('Akun tidak ditemukan.')
+        if not jumlah:
+            if akun.is_sold:
+                raise AkunTidakTersedia('Akun sudah terjual')
+            raise AkunTidakTersedia('Akun sedang dipesan pembeli lain.', akun.dipesan_hingga)
+        _bump(akun.pk, akun.game)
+    return akun
+
+
+def lepas(akun_id, pembeli_id):
+    """Melepas reservasi akun milik `pembeli_id` (tidak mengubah reservasi pembeli lain)."""
+    queryset = AkunGaming.objects.filter(pk=akun_id, dipesan_oleh_id=pembeli_id)
+    game = queryset.values_list('game', flat=True).first()
+    jumlah = queryset.update(dipesan_oleh=None, dipesan_hingga=None, diperbarui_pada=timezone.now())
+    if jumlah:
+        _bump(akun_id, game)
+    return bool(jumlah)
+
+
+def lepas_untuk_pesanan(pembelian):
+    """
+    Melepas reservasi saat pesanan dibatalkan, kecuali pembeli yang sama punya
+    pesanan PENDING lain untuk akun itu (checkout baru setelah reservasi lama lewat).
+    """
+    if not pembelian.akun_id:
+        return False
+    lain = Pembelian.objects.filter(
+        akun_id=pembelian.akun_id, pembeli_id=pembelian.pembeli_id, status='PENDING',
+    ).exclude(pk=pembelian.pk)
+    if lain.exists():
+        return False
+    return lepas(pembelian.akun_id, pembelian.pembeli_id)
+
+
+def pesanan_berjalan(akun, pembeli):
+    """
+    Pesanan PENDING `pembeli` untuk akun yang masih ia tahan, atau None. Checkout
+    ulang memakai token Midtrans pesanan ini alih-alih membuat transaksi baru.
+    """
+    if not akun.sedang_dipesan or akun.dipesan_oleh_id != pembeli.pk:
+        return None
+    return (
+        Pembelian.objects
+        .filter(akun=akun, pembeli=pembeli, status='PENDING', midtrans_token__isnull=False)
+        .order_by('-dibuat_pada').first()
+    )
+
+
+def lepas_kedaluwarsa(batch_size=None):
+    """Mengosongkan satu batch reservasi yang sudah lewat. Mengembalikan jumlahnya."""
+    batch_size = batch_size or settings.AKUN_RESERVASI_BATCH_SIZE
+    sekarang = timezone.now()
+    with transaction.atomic():
+        baris = list(
+            AkunGaming.objects.filter(dipesan_hingga__lte=sekarang)
+            .order_by('dipesan_hingga').values_list('id', 'game')[:batch_size]
+        )
+        if not baris:
+            return 0
+        # Syarat diulang: reservasi baru yang masuk sejak SELECT tidak ikut dilepas.
+        jumlah = AkunGaming.objects.filter(pk__in=[pk for pk, _ in baris], dipesan_hingga__lte=sekarang).update(
+            dipesan_oleh=None, dipesan_hingga=None, diperbarui_pada=sekarang,
+        )
+        scopes = set()
+        for pk, game in baris:
+            scopes.update(catalog_cache.akun_scopes(pk, game))
+        catalog_cache.bump_on_commit(*scopes)
+    return jumlah
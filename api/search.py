@@ -0,0 +1,156 @@
+"""
+Pencarian teks katalog akun (nama_akun dan deskripsi) dengan ranking relevansi.
+
+Satu antarmuka, backend dipilih sesuai database:
+  - PostgreSQL: kolom `search_vector` (tsvector, diisi trigger) + index GIN,
+    diranking dengan ts_rank.
+  - SQLite: tabel FTS5 external-content `api_akungaming_fts` yang disinkronkan
+    trigger, diranking dengan bm25.
+  - Lainnya: icontains tanpa index (cadangan untuk pengembangan).
+
+Semua backend mengembalikan queryset yang sudah difilter dan dianotasi
+`relevansi` (makin besar makin relevan), jadi tetap bisa digabung dengan filter
+game, sort dan pagination keyset yang sudah ada. Setiap kata pada query dicocokkan
+sebagai prefix (cocok untuk pencarian sambil mengetik) dan semua kata harus ada.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+MAX_KATA = 8
+BOBOT_NAMA = 10.0
+BOBOT_DESKRIPSI = 5.0
+
+
+def tokenisasi(query):
+    return re.findall(r'\w+', (query or '').lower())[:MAX_KATA]
+
+
+class SearchBackend:
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+
+    def cari(self, queryset, kata):
+        """Filter `queryset` ke akun yang cocok dengan semua `kata` dan anotasi `relevansi`."""
+        raise NotImplementedError
+
+    def pastikan_struktur(self):
+        """Membuat ulang struktur index jika hilang (idempoten)."""
+
+    def rebuild(self):
+        """Mengisi ulang index dari isi tabel akun."""
+
+
+class PostgresSearchBackend(SearchBackend):
+    config = 'simple'
+
+    def cari(self, queryset, kata):
+        # Token hanya berisi \w, jadi aman disusun sebagai tsquery mentah.
+        query = SearchQuery(' & '.join(f'{k}:*' for k in kata), search_type='raw', config=self.config)
+        return queryset.filter(search_vector=query).annotate(
+            relevansi=SearchRank(F('search_vector'), query),
+        )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("UPDATE api_akungaming SET nama_akun = nama_akun")
+
+
+class SQLiteFTSBackend(SearchBackend):
+    tabel = 'api_akungaming_fts'
+    triggers = {
+        'api_akungaming_fts_ai': """
+            CREATE TRIGGER api_akungaming_fts_ai AFTER INSERT ON api_akungaming BEGIN
+                INSERT INTO api_akungaming_fts(rowid, nama_akun, deskripsi) VALUES (new.id, new.nama_akun, new.deskripsi);
+            END
+        """,
+        'api_akungaming_fts_ad': """
+            CREATE TRIGGER api_akungaming_fts_ad AFTER DELETE ON api_akungaming BEGIN
+                INSERT INTO api_akungaming_fts(api_akungaming_fts, rowid, nama_akun, deskripsi)
+                VALUES ('delete', old.id, old.nama_akun, old.deskripsi);
+            END
+        """,
+        'api_akungaming_fts_au': """
+            CREATE TRIGGER api_akungaming_fts_au AFTER UPDATE OF nama_akun, deskripsi ON api_akungaming BEGIN
+                INSERT INTO api_akungaming_fts(api_akungaming_fts, rowid, nama_akun, deskripsi)
+                VALUES ('delete', old.id, old.nama_akun, old.deskripsi);
+                INSERT INTO api_akungaming_fts(rowid, nama_akun, deskripsi) VALUES (new.id, new.nama_akun, new.deskripsi);
+            END
+        """,
+    }
+
+    def cari(self, queryset, kata):
+        fts_query = ' '.join(f'"{k}"*' for k in kata)
+        # Join langsung ke tabel FTS (rowid = id) supaya bm25 dihitung sekali per
+        # baris yang cocok, bukan lewat subquery per baris.
+        return queryset.extra(
+            tables=[self.tabel],
+            where=[f'{self.tabel}.rowid = api_akungaming.id', f'{self.tabel} MATCH %s'],
+            params=[fts_query],
+        ).annotate(
+            relevansi=RawSQL(f'-bm25({self.tabel}, %s, %s)', (BOBOT_NAMA, BOBOT_DESKRIPSI), output_field=FloatField()),
+        )
+
+    def pastikan_struktur(self):
+        # Di SQLite, perubahan skema api_akungaming (remake table) ikut menghapus trigger.
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+                [f'{self.tabel}%'],
+            )
+            ada = {row[0] for row in cursor.fetchall()}
+            if self.tabel not in ada:
+                return False
+            hilang = [nama for nama in self.triggers if nama not in ada]
+            for nama in hilang:
+                cursor.execute(self.triggers[nama])
+        if hilang:
+            self.rebuild()
+        return bool(hilang)
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.tabel}({self.tabel}) VALUES ('rebuild')")
+
+
+class IContainsSearchBackend(SearchBackend):
+    def cari(self, queryset, kata):
+        for k in kata:
+            queryset = queryset.filter(Q(nama_akun__icontains=k) | Q(deskripsi__icontains=k))
+        nama_cocok = Q()
+        for k in kata:
+            nama_cocok &= Q(nama_akun__icontains=k)
+        return queryset.annotate(
+            relevansi=Case(When(nama_cocok, then=Value(BOBOT_NAMA)), default=Value(BOBOT_DESKRIPSI),
+                           output_field=FloatField()),
+        )
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteFTSBackend,
+}
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    return BACKENDS.get(connections[using].vendor, IContainsSearchBackend)(using)
+
+
+def pastikan_indeks_pencarian(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Handler post_migrate: memasang ulang trigger index yang hilang."""
+    if get_search_backend(using).pastikan_struktur():
+        print(f"SEARCH: Trigger index pencarian dipasang ulang dan index dibangun ulang ({using}).")
+
+
+def cari_akun(queryset, query):
+    """
+    Menerapkan pencarian `query` ke queryset AkunGaming. Query tanpa kata apa pun
+    (misal hanya tanda baca) tidak memfilter dan tidak menambah `relevansi`.
+    """
+    kata = tokenisasi(query)
+    if not kata:
+        return queryset
+    return get_search_backend().cari(queryset, kata)
@@ -1,22 +1,15 @@
+import logging
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from django.conf import settings
-from cryptography.fernet import Fernet
 from .models import AkunGaming, TopUpProduct, Pembelian, Kupon, TopUpPembelian, AkunGamingImage
+from .images import srcset
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import password_validation
+from .crypto import DEKRIPSI_GAGAL, DekripsiGagal, decrypt_data
+
+logger = logging.getLogger(__name__)
 
-def decrypt_data(encrypted_data):
-    """Mendekripsi data menggunakan FERNET_KEY."""
-    if not encrypted_data:
-        return None
-    try:
-        f = Fernet(settings.FERNET_KEY)
-        return f.decrypt(encrypted_data.encode()).decode()
-    except Exception as e:
-        print(f"Decryption Error: {e}")
-        return "Gagal Mendekripsi Data"
-    
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
@@ -64,21 +57,44 @@ class ChangePasswordSerializer(serializers.Serializer):
             user.save()
         return user
 
-class AkunGamingImageSerializer(serializers.ModelSerializer):
+class GambarSrcsetMixin(serializers.Serializer):
+    """
+    `gambar_srcset`: URL turunan gambar per ukuran (thumbnail/card/full) dalam
+    WebP dan JPEG, dibaca dari gambar_turunan tanpa query. None selama turunannya
+    belum dibuat worker; klien memakai `gambar` sebagai cadangan.
+    """
+    gambar_srcset = serializers.SerializerMethodField()
+
+    def get_gambar_srcset(self, obj):
+        return srcset(obj, self.context.get('request'))
+
+class AkunGamingImageSerializer(GambarSrcsetMixin, serializers.ModelSerializer):
     class Meta:
         model = AkunGamingImage
-        fields = ['id', 'gambar']
+        fields = ['id', 'gambar', 'gambar_srcset']
 
-class AkunGamingSerializer(serializers.ModelSerializer):
+class AkunGamingSerializer(GambarSrcsetMixin, serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
+    # Sedang ditahan checkout pembeli lain (lihat api/reservasi.py).
+    is_reserved = serializers.SerializerMethodField()
+    reserved_until = serializers.SerializerMethodField()
     images = AkunGamingImageSerializer(many=True, read_only=True)
 
     class Meta:
         model = AkunGaming
-        fields = ['id', 'nama_akun', 'game', 'deskripsi', 'harga', 'gambar',
-                  'level', 'is_sold', 'is_favorited', 'images']
+        fields = ['id', 'nama_akun', 'game', 'deskripsi', 'harga', 'gambar', 'gambar_srcset',
+                  'level', 'is_sold', 'is_reserved', 'reserved_until', 'is_favorited', 'images']
+
+    def get_is_reserved(self, obj):
+        return obj.sedang_dipesan
+
+    def get_reserved_until(self, obj):
+        return serializers.DateTimeField().to_representation(obj.dipesan_hingga) if obj.sedang_dipesan else None
 
     def get_is_favorited(self, obj):
+        # Queryset dari AkunGaming.objects.for_listing() sudah membawa anotasi ini.
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             return obj.favorited_by.filter(pk=request.user.pk).exists()
@@ -124,10 +140,10 @@ class PembelianSerializer(serializers.ModelSerializer):
         read_only_fields = ['kode_transaksi', 'pembeli', 'akun', 'dibuat_pada', 'midtrans_token', 'kupon']
 
 
-class TopUpProductSerializer(serializers.ModelSerializer):
+class TopUpProductSerializer(GambarSrcsetMixin, serializers.ModelSerializer):
     class Meta:
         model = TopUpProduct
-        fields = ['id', 'game', 'nama_paket', 'harga', 'gambar']
+        fields = ['id', 'game', 'nama_paket', 'harga', 'gambar', 'gambar_srcset']
 
 class TopUpPembelianSerializer(serializers.ModelSerializer):
     produk = TopUpProductSerializer(read_only=True)
@@ -153,15 +169,10 @@ class UlasanSerializer(serializers.ModelSerializer):
         fields = ['pembeli_username', 'rating', 'ulasan', 'dibuat_pada']
 
 class KuponAdminSerializer(serializers.ModelSerializer):
-    jumlah_pengguna = serializers.SerializerMethodField()
-
     class Meta:
         model = Kupon
-        fields = ['id', 'kode', 'diskon_persen', 'aktif', 'dibuat_pada', 'jumlah_pengguna']
-        read_only_fields = ['dibuat_pada', 'jumlah_pengguna']
-
-    def get_jumlah_pengguna(self, obj):
-        return obj.digunakan_oleh.count()
+        fields = ['id', 'kode', 'diskon_persen', 'aktif', 'dibuat_pada', 'jumlah_pengguna', 'total_diskon']
+        read_only_fields = ['dibuat_pada', 'jumlah_pengguna', 'total_diskon']
     
 # backend/api/serializers.py
 # ... (serializer Anda yang lain) ...
@@ -222,12 +233,17 @@ class PembelianDetailSerializer(serializers.ModelSerializer):
     def get_tipe(self, obj):
         return 'Akun'
         
+    def _kredensial(self, obj, field):
+        if obj.status != 'COMPLETED' or not obj.akun:
+            return "Tersedia setelah pembayaran lunas"
+        try:
+            return decrypt_data(getattr(obj.akun, field))
+        except DekripsiGagal:
+            logger.exception("Gagal mendekripsi %s akun %s (pesanan %s)", field, obj.akun_id, obj.kode_transaksi)
+            return DEKRIPSI_GAGAL
+
     def get_akun_email_decrypted(self, obj):
-        if obj.status == 'COMPLETED' and obj.akun:
-            return decrypt_data(obj.akun.akun_email)
-        return "Tersedia setelah pembayaran lunas"
+        return self._kredensial(obj, 'akun_email')
 
     def get_akun_password_decrypted(self, obj):
-        if obj.status == 'COMPLETED' and obj.akun:
-            return decrypt_data(obj.akun.akun_password)
-        return "Tersedia setelah pembayaran lunas"
\ No newline at end of file
+        return self._kredensial(obj, 'akun_password')
\ No newline at end of file
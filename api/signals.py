@@ -0,0 +1,138 @@
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import catalog_cache, images, kupon_cache
+from .models import (
+    AkunGaming, AkunGamingImage, DashboardStats, Kupon, Pembelian, RingkasanRating, TopUpProduct,
+)
+
+
+@receiver(post_save, sender=AkunGaming)
+def akun_dibuat(sender, instance, created, **kwargs):
+    if created:
+        DashboardStats.tambah(**{'akun_terjual' if instance.is_sold else 'akun_tersedia': 1})
+
+
+@receiver(post_delete, sender=AkunGaming)
+def akun_dihapus(sender, instance, **kwargs):
+    DashboardStats.tambah(**{'akun_terjual' if instance.is_sold else 'akun_tersedia': -1})
+
+
+@receiver(pre_delete, sender=AkunGaming)
+def ulasan_akun_dihapus(sender, instance, **kwargs):
+    # Pesanan akun ini akan kehilangan akun-nya (SET_NULL) dan keluar dari daftar
+    # ulasan game, jadi keluarkan juga dari RingkasanRating.
+    per_rating = RingkasanRating.ulasan_qs().filter(akun=instance).order_by() \
+                                .values('rating').annotate(n=Count('id'))
+    for baris in per_rating:
+        RingkasanRating.tambah(instance.game, baris['rating'], arah=-baris['n'])
+
+
+# --- Invalidasi cache katalog (lihat api/catalog_cache.py) ---
+
+@receiver(pre_save, sender=AkunGaming)
+@receiver(pre_save, sender=TopUpProduct)
+def simpan_game_lama(sender, instance, **kwargs):
+    # Jika game diganti, list game lama juga harus dibuat basi.
+    instance._game_lama = None
+    if instance.pk and not instance._state.adding:
+        instance._game_lama = sender.objects.filter(pk=instance.pk).values_list('game', flat=True).first()
+
+
+@receiver(post_save, sender=AkunGaming)
+def akun_berubah(sender, instance, **kwargs):
+    # Termasuk saat webhook menandai akun terjual (akun.save()).
+    scopes = catalog_cache.akun_scopes(instance.pk, instance.game)
+    if getattr(instance, '_game_lama', None):
+        scopes += catalog_cache.akun_scopes(game=instance._game_lama)
+    catalog_cache.bump_on_commit(*scopes)
+
+
+@receiver(post_delete, sender=AkunGaming)
+def akun_dihapus_dari_katalog(sender, instance, **kwargs):
+    catalog_cache.bump_on_commit(
+        *catalog_cache.akun_scopes(instance.pk, instance.game),
+        catalog_cache.ulasan_scope(instance.game),
+    )
+
+
+@receiver(post_save, sender=AkunGamingImage)
+@receiver(post_delete, sender=AkunGamingImage)
+def galeri_berubah(sender, instance, **kwargs):
+    # Galeri bagian dari respons akun: majukan diperbarui_pada akun untuk ETag/Last-Modified.
+    AkunGaming.objects.filter(pk=instance.akun_id).update(diperbarui_pada=timezone.now())
+    game = AkunGaming.objects.filter(pk=instance.akun_id).values_list('game', flat=True).first()
+    catalog_cache.bump_on_commit(*catalog_cache.akun_scopes(instance.akun_id, game))
+
+
+@receiver(post_save, sender=TopUpProduct)
+def topup_berubah(sender, instance, **kwargs):
+    scopes = catalog_cache.topup_scopes(instance.pk, instance.game)
+    if getattr(instance, '_game_lama', None):
+        scopes += catalog_cache.topup_scopes(game=instance._game_lama)
+    catalog_cache.bump_on_commit(*scopes)
+
+
+@receiver(post_delete, sender=TopUpProduct)
+def topup_dihapus(sender, instance, **kwargs):
+    catalog_cache.bump_on_commit(*catalog_cache.topup_scopes(instance.pk, instance.game))
+
+
+@receiver(post_save, sender=Pembelian)
+def ulasan_berubah(sender, instance, **kwargs):
+    if instance.rating is None or not instance.akun_id:
+        return
+    game = AkunGaming.objects.filter(pk=instance.akun_id).values_list('game', flat=True).first()
+    if game:
+        catalog_cache.bump_on_commit(catalog_cache.ulasan_scope(game))
+
+
+# --- Invalidasi cache kupon aktif (lihat api/kupon_cache.py) ---
+
+@receiver(post_save, sender=Kupon)
+@receiver(post_delete, sender=Kupon)
+def kupon_berubah(sender, instance, **kwargs):
+    kupon_cache.invalidate()
+
+
+# --- Counter pemakaian kupon (Kupon.jumlah_pengguna) ---
+
+@receiver(m2m_changed, sender=Kupon.digunakan_oleh.through)
+def pengguna_kupon_berubah(sender, instance, action, reverse, pk_set, **kwargs):
+    # Sisi pemilik relasi: kupon (kupon.digunakan_oleh) atau user (user.kupon_digunakan).
+    pemilik, lawan = ('user_id', 'kupon_id') if reverse else ('kupon_id', 'user_id')
+    if action in ('pre_remove', 'pre_clear'):
+        # pk_set remove() berisi semua pk yang diminta (termasuk yang tidak terhubung),
+        # dan clear() tidak mengirim pk_set: catat relasi yang benar-benar akan dihapus.
+        relasi = sender.objects.filter(**{pemilik: instance.pk})
+        if pk_set is not None:
+            relasi = relasi.filter(**{f'{lawan}__in': pk_set})
+        instance._pk_dihapus = set(relasi.values_list(lawan, flat=True))
+        return
+    if action in ('post_remove', 'post_clear'):
+        pk_set, arah = getattr(instance, '_pk_dihapus', set()), -1
+    elif action == 'post_add':
+        # pk_set post_add hanya berisi relasi baru, jadi add() berulang tidak dihitung dua kali.
+        arah = 1
+    else:
+        return
+    if not pk_set:
+        return
+    if reverse:
+        # user.kupon_digunakan.add(kupon, ...): satu pengguna untuk setiap kupon.
+        Kupon.tambah_pengguna(pk_set, arah)
+    else:
+        Kupon.tambah_pengguna([instance.pk], arah * len(pk_set))
+
+
+# --- Antrean turunan gambar (lihat api/images.py) ---
+
+@receiver(post_save, sender=AkunGaming)
+@receiver(post_save, sender=AkunGamingImage)
+@receiver(post_save, sender=TopUpProduct)
+def gambar_diunggah(sender, instance, **kwargs):
+    # Juga terpanggil saat worker menyimpan gambar_turunan; saat itu turunannya sudah berlaku.
+    if instance.gambar and images.turunan_berlaku(instance) is None:
+        images.antrekan([instance])
@@ -0,0 +1,165 @@
+"""
+Stand-in lokal untuk layanan eksternal, dipakai untuk pengujian dan benchmark
+tanpa menyentuh layanan sungguhan.
+"""
+import json
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        if server.handshake_delay:
+            # Simulasi biaya TCP + TLS handshake ke server SMTP sungguhan.
+            time.sleep(server.handshake_delay)
+        with server.lock:
+            server.connections += 1
+        self.reply('220 localhost SMTP stand-in')
+
+        in_data, lines = False, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line in (b'.\r\n', b'.\n'):
+                    with server.lock:
+                        server.messages.append(b''.join(lines))
+                    in_data, lines = False, []
+                    self.reply('250 OK: queued')
+                else:
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                continue
+
+            command = line.strip().split(b' ', 1)[0].upper()
+            if command == b'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif command == b'HELO':
+                self.reply('250 localhost')
+            elif command in (b'MAIL', b'RCPT', b'RSET', b'NOOP'):
+                self.reply('250 OK')
+            elif command == b'DATA':
+                in_data = True
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    Server SMTP minimal (tanpa TLS/AUTH) yang menyimpan semua pesan di memori.
+    Dipakai sebagai context manager:
+
+        with LocalSMTPServer(handshake_delay=0.05) as smtp:
+            connection = smtp.get_connection()
+            ...
+            smtp.messages  # isi pesan mentah yang diterima
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, handshake_delay=0.0):
+        super().__init__((host, port), _SMTPHandler)
+        self.handshake_delay = handshake_delay
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def get_connection(self, **kwargs):
+        from django.core.mail import get_connection
+        return get_connection(
+            'django.core.mail.backends.smtp.EmailBackend',
+            host=self.server_address[0], port=self.port,
+            username='', password='', use_tls=False, use_ssl=False, **kwargs
+        )
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class _SnapHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        if self.server.handshake_delay:
+            # Simulasi biaya TCP + TLS handshake per koneksi baru.
+            time.sleep(self.server.handshake_delay)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if self.server.response_delay:
+            time.sleep(self.server.response_delay)
+        with self.server.lock:
+            self.server.requests.append(body)
+        token = uuid.uuid4().hex
+        payload = json.dumps({
+            'token': token,
+            'redirect_url': f'http://{self.server.server_address[0]}:{self.server.port}/snap/v2/vtweb/{token}',
+        }).encode()
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalSnapServer(ThreadingHTTPServer):
+    """
+    Stand-in HTTP untuk Midtrans Snap API (POST /snap/v1/transactions) yang selalu
+    mengembalikan token baru. Arahkan klien ke `snap_base_url`, misal lewat
+    MIDTRANS_SNAP_BASE_URL atau build_snap_client(snap_base_url=...).
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, handshake_delay=0.0, response_delay=0.0):
+        super().__init__((host, port), _SnapHandler)
+        self.handshake_delay = handshake_delay
+        self.response_delay = response_delay
+        self.requests = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def snap_base_url(self):
+        return f'http://{self.server_address[0]}:{self.port}/snap/v1'
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -1,3 +1,1374 @@
-from django.test import TestCase
+import base64
+import csv
+from datetime import datetime, timedelta
+from decimal import Decimal
+import io
+from io import StringIO
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+import zipfile
 
-# Create your tests here.
+from PIL import Image
+from cryptography.fernet import Fernet
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from . import (
+    akun_import, catalog_cache, galeri, images, kupon_cache, payment, reservasi, search, webhooks,
+)
+from .crypto import decrypt_data, DEKRIPSI_GAGAL, DekripsiGagal, encrypt_data, rotate_token
+from .models import (
+    AkunGaming, AkunGamingImage, AntreanGambar, DashboardStats, EmailOutbox, Kupon, MidtransInbox,
+    MidtransNotifikasi, Pembelian, RingkasanRating, TopUpPembelian, TopUpProduct,
+)
+from .outbox import deliver_outbox, queue_email
+from .standins import LocalSnapServer
+
+
+class BaseApiTest(APITestCase):
+    """Cache bersama dan snapshot kupon dikosongkan supaya tidak bocor antar test."""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        kupon_cache.reset()
+
+
+def buat_user(username='pembeli', **kwargs):
+    kwargs.setdefault('email', f'{username}@example.com')
+    return User.objects.create_user(username=username, password='rahasia-123', **kwargs)
+
+
+def buat_akun(**kwargs):
+    data = {'nama_akun': 'Akun', 'deskripsi': 'Deskripsi akun', 'harga': Decimal('100000'), 'game': 'Mobile Legends'}
+    data.update(kwargs)
+    return AkunGaming.objects.create(**data)
+
+
+class KeysetPaginationTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        # Harga kembar: urutan harus stabil lewat id sebagai pemutus.
+        self.akun = [buat_akun(nama_akun=f'Akun {i}', harga=Decimal(1000 * (i // 2 + 1))) for i in range(7)]
+
+    def ambil_semua(self, url):
+        hasil, halaman = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            halaman.append(response.data)
+            hasil += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return hasil, halaman
+
+    def test_next_menelusuri_semua_tanpa_duplikat(self):
+        hasil, halaman = self.ambil_semua('/api/accounts/?page_size=3')
+        self.assertEqual(hasil, [akun.pk for akun in reversed(self.akun)])
+        self.assertEqual([len(h['results']) for h in halaman], [3, 3, 1])
+        self.assertIsNone(halaman[0]['previous'])
+
+    def test_urutan_harga_kembar_stabil(self):
+        hasil, _ = self.ambil_semua('/api/accounts/?sort=termurah&page_size=2')
+        self.assertEqual(hasil, [akun.pk for akun in sorted(self.akun, key=lambda a: (a.harga, a.pk))])
+
+    def test_previous_kembali_ke_halaman_sebelumnya(self):
+        pertama = self.client.get('/api/accounts/?page_size=3').data
+        kedua = self.client.get(pertama['next']).data
+        kembali = self.client.get(kedua['previous']).data
+        self.assertEqual(kembali['results'], pertama['results'])
+        self.assertIsNotNone(kembali['next'])
+
+    def test_cursor_buram_dan_cursor_rusak_ditolak(self):
+        pertama = self.client.get('/api/accounts/?page_size=3').data
+        cursor = pertama['next'].split('cursor=')[1].split('&')[0]
+        self.assertRegex(cursor, r'^[A-Za-z0-9_=-]+$')
+        self.assertNotIn('dibuat_pada', cursor)
+        rusak = base64.urlsafe_b64encode(json.dumps({'s': 0, 'r': False, 'p': ['bukan-tanggal', 1]}).encode()).decode()
+        for nilai in ('xyz', rusak):
+            response = self.client.get(f'/api/accounts/?cursor={nilai}')
+            self.assertEqual(response.status_code, 404)
+
+    def test_tanpa_parameter_tetap_list_biasa(self):
+        response = self.client.get('/api/accounts/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 7)
+
+
+class AkunListQueryTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.user = buat_user()
+        self.client.force_authenticate(self.user)
+
+    def tambah_akun(self, jumlah):
+        for i in range(jumlah):
+            akun = buat_akun(nama_akun=f'Akun {i}')
+            AkunGamingImage.objects.create(akun=akun, gambar=f'account_gallery/{akun.pk}.png')
+            if i % 2:
+                akun.favorited_by.add(self.user)
+
+    def jumlah_query(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_jumlah_query_tidak_bergantung_jumlah_akun(self):
+        self.tambah_akun(2)
+        sedikit, _ = self.jumlah_query('/api/accounts/')
+        self.tambah_akun(6)
+        banyak, response = self.jumlah_query('/api/accounts/')
+        self.assertEqual(len(response.data), 8)
+        self.assertEqual(sedikit, banyak)
+
+    def test_status_favorit_dan_galeri_ikut_terisi(self):
+        self.tambah_akun(4)
+        _, response = self.jumlah_query('/api/accounts/')
+        favorit = {akun.pk for akun in self.user.favorite_accounts.all()}
+        for item in response.data:
+            self.assertEqual(item['is_favorited'], item['id'] in favorit)
+            self.assertEqual(len(item['images']), 1)
+
+
+class QueryIndexTest(BaseApiTest):
+    INDEXES = {
+        AkunGaming: ['akun_tersedia_baru_idx', 'akun_tersedia_harga_idx', 'akun_game_baru_idx', 'akun_game_harga_idx'],
+        Pembelian: ['pembelian_pembeli_tgl_idx', 'pembelian_status_total_idx', 'pembelian_ulasan_idx'],
+    }
+
+    def test_index_terpasang_di_database(self):
+        with connection.cursor() as cursor:
+            for model, nama in self.INDEXES.items():
+                constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+                for index in nama:
+                    self.assertIn(index, constraints)
+
+    def test_query_katalog_memakai_index_parsial(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Rencana query diperiksa di SQLite.')
+        buat_akun()
+        katalog = AkunGaming.objects.filter(is_sold=False, game='Mobile Legends').order_by('-dibuat_pada', '-id')[:20]
+        self.assertIn('akun_game_baru_idx', katalog.explain())
+        termurah = AkunGaming.objects.filter(is_sold=False).order_by('harga', 'id')[:20]
+        self.assertIn('akun_tersedia_harga_idx', termurah.explain())
+
+
+class SimilarAccountsTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.akun = buat_akun()
+        self.sama = [buat_akun(nama_akun=f'ML {i}') for i in range(8)]
+        buat_akun(nama_akun='Terjual', is_sold=True)
+        buat_akun(nama_akun='PUBG', game='PUBG Mobile')
+
+    def test_hanya_akun_game_sama_yang_tersedia(self):
+        sama = {akun.pk for akun in self.sama}
+        for _ in range(10):
+            response = self.client.get(f'/api/accounts/{self.akun.pk}/similar/')
+            self.assertEqual(response.status_code, 200)
+            ids = [item['id'] for item in response.data]
+            self.assertEqual(len(ids), 5)
+            self.assertEqual(len(set(ids)), 5)
+            self.assertLessEqual(set(ids), sama)
+
+    def test_tanpa_order_by_random(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/api/accounts/{self.akun.pk}/similar/')
+        self.assertFalse(any('RANDOM' in query['sql'].upper() for query in queries))
+
+    def test_katalog_kecil_dan_kosong(self):
+        qs = AkunGaming.objects.filter(game='PUBG Mobile')
+        self.assertEqual(qs.random_sample(5).count(), 1)
+        self.assertEqual(AkunGaming.objects.filter(game='Lainnya').random_sample(5).count(), 0)
+
+
+def buat_pembelian(pembeli, akun=None, status='PENDING', **kwargs):
+    akun = akun or buat_akun()
+    kwargs.setdefault('harga_total', akun.harga)
+    kwargs.setdefault('harga_asli', akun.harga)
+    return Pembelian.objects.create(pembeli=pembeli, akun=akun, status=status, **kwargs)
+
+
+def buat_topup(pembeli, produk=None, status='PENDING', **kwargs):
+    produk = produk or TopUpProduct.objects.create(game='Mobile Legends', nama_paket='86 Diamond', harga=Decimal('20000'))
+    kwargs.setdefault('harga_pembelian', produk.harga)
+    return TopUpPembelian.objects.create(
+        pembeli=pembeli, produk=produk, game_user_id='12345', status=status, **kwargs
+    )
+
+
+class RiwayatPembelianTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.user = buat_user()
+        self.client.force_authenticate(self.user)
+        awal = timezone.now() - timedelta(days=1)
+        self.urutan = []
+        for i in range(5):
+            if i % 2:
+                obj = buat_topup(self.user)
+                TopUpPembelian.objects.filter(pk=obj.pk).update(tanggal_pembelian=awal + timedelta(minutes=i))
+                self.urutan.append(('TopUp', obj.pk))
+            else:
+                obj = buat_pembelian(self.user)
+                Pembelian.objects.filter(pk=obj.pk).update(dibuat_pada=awal + timedelta(minutes=i))
+                self.urutan.append(('Akun', obj.pk))
+        self.urutan.reverse()
+        buat_pembelian(buat_user('lain'))
+
+    def test_gabungan_terurut_dan_hanya_milik_user(self):
+        response = self.client.get('/api/pembelian/history/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(item['tipe'], item['id']) for item in response.data], self.urutan)
+
+    def test_paginasi_keyset_melewati_dua_tabel(self):
+        hasil, url = [], '/api/pembelian/history/?page_size=2'
+        while url:
+            data = self.client.get(url).data
+            hasil += [(item['tipe'], item['id']) for item in data['results']]
+            url = data['next']
+        self.assertEqual(hasil, self.urutan)
+
+    def test_item_dihapus_tetap_muncul(self):
+        Pembelian.objects.filter(pembeli=self.user).update(akun=None)
+        response = self.client.get('/api/pembelian/history/')
+        self.assertIn('Akun Dihapus', {item['nama_item'] for item in response.data})
+
+
+class AdminOrderFeedTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(buat_user('admin', is_staff=True))
+        self.budi, self.sari = buat_user('budi'), buat_user('sari')
+        self.akun_lunas = buat_pembelian(self.budi, status='COMPLETED', harga_total=Decimal('50000'))
+        self.akun_pending = buat_pembelian(self.sari, akun=buat_akun(game='PUBG Mobile'))
+        self.topup = buat_topup(self.budi, status='COMPLETED')
+
+    def kode(self, data):
+        return {item['kode_transaksi'] for item in data}
+
+    def test_filter_di_database(self):
+        data = self.client.get('/api/admin/all-orders/?status=completed&page_size=10').data['results']
+        self.assertEqual(self.kode(data), {self.akun_lunas.kode_transaksi, self.topup.kode_transaksi})
+        data = self.client.get('/api/admin/all-orders/?tipe=AKUN&game=PUBG Mobile&page_size=10').data['results']
+        self.assertEqual(self.kode(data), {self.akun_pending.kode_transaksi})
+        data = self.client.get('/api/admin/all-orders/?pembeli=budi&tipe=TOPUP&page_size=10').data['results']
+        self.assertEqual(self.kode(data), {self.topup.kode_transaksi})
+
+    def test_sort_termahal_dipaginasi(self):
+        hasil, url = [], '/api/admin/all-orders/?sort=termahal&page_size=1'
+        while url:
+            data = self.client.get(url).data
+            hasil += [Decimal(str(item['total'])) for item in data['results']]
+            url = data['next']
+        self.assertEqual(len(hasil), 3)
+        self.assertEqual(hasil, sorted(hasil, reverse=True))
+
+    def test_tanggal_tidak_valid_ditolak(self):
+        response = self.client.get('/api/admin/all-orders/?dari=kemarin')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_csv_dan_ndjson(self):
+        response = self.client.get('/api/admin/orders/export/?status=COMPLETED')
+        self.assertTrue(response.streaming)
+        baris = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual({row['kode_transaksi'] for row in baris}, {self.akun_lunas.kode_transaksi, self.topup.kode_transaksi})
+
+        response = self.client.get('/api/admin/orders/export/?output=ndjson')
+        baris = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(baris), 3)
+
+    def test_hanya_admin(self):
+        self.client.force_authenticate(self.budi)
+        self.assertEqual(self.client.get('/api/admin/orders/export/').status_code, 403)
+
+
+class DashboardStatsTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.user = buat_user()
+        self.akun = buat_akun()
+        DashboardStats.rebuild()
+
+    def notifikasi(self, pembelian, status='settlement'):
+        return webhooks.proses_notifikasi({
+            'order_id': pembelian.kode_transaksi, 'transaction_status': status,
+            'transaction_id': f'trx-{pembelian.kode_transaksi}-{status}',
+        })
+
+    def assertCocok(self):
+        stats = DashboardStats.objects.get(pk=1)
+        self.assertEqual({field: getattr(stats, field) for field in DashboardStats.FIELDS}, DashboardStats.hitung_live())
+
+    def test_akun_dibuat_dan_dihapus(self):
+        akun = buat_akun()
+        self.assertEqual(DashboardStats.objects.get(pk=1).akun_tersedia, 2)
+        akun.delete()
+        self.assertEqual(DashboardStats.objects.get(pk=1).akun_tersedia, 1)
+        self.assertCocok()
+
+    def test_webhook_lunas_dan_batal(self):
+        pembelian = buat_pembelian(self.user, akun=self.akun, harga_total=Decimal('90000'))
+        topup = buat_topup(self.user)
+        batal = buat_topup(self.user)
+        self.assertEqual(self.notifikasi(pembelian), 'COMPLETED')
+        self.assertEqual(self.notifikasi(topup), 'COMPLETED')
+        self.assertEqual(self.notifikasi(batal, 'expire'), 'CANCELED')
+
+        stats = DashboardStats.objects.get(pk=1)
+        self.assertEqual((stats.akun_tersedia, stats.akun_terjual, stats.topup_berhasil), (0, 1, 1))
+        self.assertEqual(stats.revenue_akun, Decimal('90000'))
+        self.assertEqual(stats.revenue_topup, Decimal('20000'))
+        self.assertCocok()
+
+    def test_endpoint_membaca_proyeksi(self):
+        self.client.force_authenticate(buat_user('admin', is_staff=True))
+        DashboardStats.objects.filter(pk=1).update(revenue_akun=Decimal('1000'), revenue_topup=Decimal('500'))
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/admin/dashboard-stats/')
+        self.assertEqual(response.data['total_revenue'], 1500.0)
+
+    def test_rebuild_command(self):
+        DashboardStats.objects.filter(pk=1).update(akun_tersedia=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_dashboard_stats', '--check', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_dashboard_stats', stdout=out)
+        self.assertIn('akun_tersedia: tersimpan=7 live=1', out.getvalue())
+        self.assertCocok()
+        call_command('rebuild_dashboard_stats', '--check', stdout=StringIO())
+
+    def test_perubahan_lewat_django_admin(self):
+        self.client.force_login(buat_user('admin', is_staff=True, is_superuser=True))
+        AkunGaming.objects.filter(pk=self.akun.pk).update(dipesan_oleh=self.user, dipesan_hingga=timezone.now())
+        response = self.client.post(f'/admin/api/akungaming/{self.akun.pk}/change/', {
+            'nama_akun': self.akun.nama_akun, 'game': self.akun.game, 'level': 1, 'deskripsi': 'x',
+            'harga': '100000', 'is_sold': 'on', 'akun_email': '', 'akun_password': '',
+            'images-TOTAL_FORMS': 0, 'images-INITIAL_FORMS': 0,
+        })
+        self.assertEqual(response.status_code, 302)
+        akun = AkunGaming.objects.get(pk=self.akun.pk)
+        self.assertEqual((akun.is_sold, akun.dipesan_oleh, akun.dipesan_hingga), (True, None, None))
+
+        pembelian = buat_pembelian(self.user, akun=akun, harga_total=Decimal('70000'))
+        response = self.client.post(f'/admin/api/pembelian/{pembelian.pk}/change/', {'status': 'COMPLETED'})
+        self.assertEqual(response.status_code, 302)
+        stats = DashboardStats.objects.get(pk=1)
+        self.assertEqual((stats.akun_terjual, stats.revenue_akun), (1, Decimal('70000')))
+        self.assertCocok()
+
+
+class KoneksiGagal(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP putus')
+
+
+class EmailOutboxTest(BaseApiTest):
+    def test_antrekan_lalu_kirim(self):
+        queue_email('Halo', 'Isi', ['a@example.com', '', 'b@example.com'])
+        self.assertEqual(EmailOutbox.objects.filter(status='PENDING').count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(deliver_outbox(), (2, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['a@example.com', 'b@example.com'])
+        self.assertFalse(EmailOutbox.objects.exclude(status='SENT').exists())
+        self.assertFalse(EmailOutbox.objects.filter(klaim_hingga__isnull=False).exists())
+        self.assertEqual(deliver_outbox(), (0, 0))
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_gagal_dijadwalkan_ulang_lalu_failed(self):
+        queue_email('Halo', 'Isi', ['a@example.com'])
+        self.assertEqual(deliver_outbox(connection=KoneksiGagal()), (0, 1))
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.status, email.percobaan), ('PENDING', 1))
+        self.assertGreater(email.kirim_setelah, timezone.now())
+        self.assertIn('SMTP putus', email.error_terakhir)
+
+        # Belum jatuh tempo.
+        self.assertEqual(deliver_outbox(), (0, 0))
+        EmailOutbox.objects.update(kirim_setelah=timezone.now())
+        self.assertEqual(deliver_outbox(connection=KoneksiGagal()), (0, 1))
+        self.assertEqual(EmailOutbox.objects.get().status, 'FAILED')
+
+    def test_lease_habis_diklaim_ulang(self):
+        queue_email('Halo', 'Isi', ['a@example.com', 'b@example.com'])
+        sekarang = timezone.now()
+        aktif, mati = EmailOutbox.objects.order_by('id')
+        EmailOutbox.objects.filter(pk=aktif.pk).update(status='SENDING', klaim_hingga=sekarang + timedelta(minutes=5))
+        EmailOutbox.objects.filter(pk=mati.pk).update(status='SENDING', klaim_hingga=sekarang - timedelta(seconds=1))
+
+        self.assertEqual(deliver_outbox(), (1, 0))
+        self.assertEqual([m.to for m in mail.outbox], [['b@example.com']])
+        self.assertEqual(EmailOutbox.objects.get(pk=aktif.pk).status, 'SENDING')
+
+
+class SnapClientTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.user = buat_user()
+        self.produk = TopUpProduct.objects.create(game='Mobile Legends', nama_paket='86 Diamond', harga=Decimal('20000'))
+        payment.reset_snap_client()
+        self.addCleanup(payment.reset_snap_client)
+
+    def test_klien_bersama_memakai_ulang_koneksi(self):
+        with LocalSnapServer() as server, override_settings(MIDTRANS_SNAP_BASE_URL=server.snap_base_url):
+            for _ in range(3):
+                TopUpPembelian.create_pembelian_topup(self.user, self.produk, '12345')
+            self.assertIs(payment.get_snap_client(), payment.get_snap_client())
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(TopUpPembelian.objects.filter(midtrans_token__isnull=False).count(), 3)
+
+    @override_settings(MIDTRANS_READ_TIMEOUT=0.2)
+    def test_read_timeout_membatalkan_pesanan(self):
+        with LocalSnapServer(response_delay=1) as server, \
+                override_settings(MIDTRANS_SNAP_BASE_URL=server.snap_base_url):
+            with self.assertRaisesMessage(ValueError, 'Gagal membuat token pembayaran Midtrans'):
+                TopUpPembelian.create_pembelian_topup(self.user, self.produk, '12345')
+        self.assertFalse(TopUpPembelian.objects.exists())
+
+
+class KredensialTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.kunci_lama = settings.FERNET_KEYS[0]
+        self.kunci_baru = Fernet.generate_key().decode()
+
+    def test_rotasi_kunci(self):
+        token_lama = encrypt_data('rahasia')
+        with override_settings(FERNET_KEYS=[self.kunci_baru, self.kunci_lama]):
+            self.assertEqual(decrypt_data(token_lama), 'rahasia')
+            token_baru = rotate_token(token_lama)
+            self.assertIsNone(rotate_token(token_baru))
+        with override_settings(FERNET_KEYS=[self.kunci_baru]):
+            self.assertEqual(decrypt_data(token_baru), 'rahasia')
+            with self.assertRaises(DekripsiGagal):
+                decrypt_data(token_lama)
+
+    def test_reencrypt_credentials(self):
+        akun = buat_akun(akun_email=encrypt_data('email@game'), akun_password=encrypt_data('sandi'))
+        with override_settings(FERNET_KEYS=[self.kunci_baru, self.kunci_lama]):
+            call_command('reencrypt_credentials', stdout=StringIO())
+        akun.refresh_from_db()
+        with override_settings(FERNET_KEYS=[self.kunci_baru]):
+            self.assertEqual(decrypt_data(akun.akun_email), 'email@game')
+            self.assertEqual(decrypt_data(akun.akun_password), 'sandi')
+
+    def test_kredensial_rusak_tidak_dikirim(self):
+        user = buat_user()
+        akun = buat_akun(akun_email='token-rusak', akun_password=encrypt_data('sandi'))
+        pembelian = buat_pembelian(user, akun=akun)
+        data = {'order_id': pembelian.kode_transaksi, 'transaction_status': 'settlement', 'transaction_id': 'trx-1'}
+        with self.assertRaises(DekripsiGagal):
+            webhooks.proses_notifikasi(data)
+
+        # Seluruh notifikasi di-rollback, jadi bisa diulang setelah kuncinya dibetulkan.
+        self.assertEqual(Pembelian.objects.get(pk=pembelian.pk).status, 'PENDING')
+        self.assertFalse(AkunGaming.objects.get(pk=akun.pk).is_sold)
+        self.assertFalse(EmailOutbox.objects.exists())
+        self.assertFalse(MidtransNotifikasi.objects.exists())
+
+        AkunGaming.objects.filter(pk=akun.pk).update(akun_email=encrypt_data('email@game'))
+        self.assertEqual(webhooks.proses_notifikasi(data), 'COMPLETED')
+        self.assertIn('email@game', EmailOutbox.objects.get().pesan)
+
+    def test_detail_menampilkan_placeholder(self):
+        user = buat_user()
+        pembelian = buat_pembelian(user, akun=buat_akun(akun_email='token-rusak'), status='COMPLETED')
+        self.client.force_authenticate(user)
+        with self.assertLogs('api.serializers', 'ERROR'):
+            response = self.client.get(f'/api/pembelian/detail/{pembelian.kode_transaksi}/')
+        self.assertEqual(response.data['akun_email_decrypted'], DEKRIPSI_GAGAL)
+
+
+class KatalogCacheTest(BaseApiTest):
+    url = '/api/reviews/Mobile Legends/'
+
+    def setUp(self):
+        super().setUp()
+        self.user = buat_user()
+        self.pembelian = buat_pembelian(self.user, status='COMPLETED')
+
+    def get(self, url=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or self.url)
+        return response, len(queries)
+
+    def test_anonim_di_cache_sampai_scope_naik(self):
+        pertama, jumlah = self.get()
+        self.assertGreater(jumlah, 0)
+        kedua, jumlah = self.get()
+        self.assertEqual(jumlah, 0)
+        self.assertEqual(kedua.data, pertama.data)
+
+        # Parameter asing tidak membuat entri baru.
+        self.assertEqual(self.get(self.url + '?utm=x')[1], 0)
+
+        # Ulasan baru menaikkan versi scope game itu setelah commit.
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/pembelian/review/{self.pembelian.pk}/', {'rating': 5, 'ulasan': 'Mantap'})
+        self.assertEqual(response.status_code, 201)
+        self.client.force_authenticate(None)
+
+        ketiga, jumlah = self.get()
+        self.assertGreater(jumlah, 0)
+        self.assertEqual([item['rating'] for item in ketiga.data], [5])
+
+    def test_bump_menunggu_commit(self):
+        scope = catalog_cache.ulasan_scope('Mobile Legends')
+        versi = catalog_cache.get_versions([scope])
+        with self.captureOnCommitCallbacks() as callbacks:
+            Pembelian.objects.filter(pk=self.pembelian.pk).update(rating=4)
+            Pembelian.objects.get(pk=self.pembelian.pk).save()
+        self.assertEqual(catalog_cache.get_versions([scope]), versi)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(catalog_cache.get_versions([scope]), versi)
+
+    def test_user_login_tidak_di_cache(self):
+        self.client.force_authenticate(self.user)
+        self.get()
+        self.assertGreater(self.get()[1], 0)
+
+
+class ConditionalKatalogTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.akun = buat_akun()
+
+    def revalidasi(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_list_304_sampai_akun_berubah(self):
+        url = '/api/accounts/?game=Mobile Legends'
+        pertama = self.client.get(url)
+        self.assertEqual(pertama.status_code, 200)
+        self.assertIn('Last-Modified', pertama)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidasi(url, pertama).status_code, 304)
+
+        # Game lain tidak mengubah validator list game ini.
+        buat_akun(game='PUBG Mobile')
+        self.assertEqual(self.revalidasi(url, pertama).status_code, 304)
+
+        self.akun.harga = Decimal('75000')
+        self.akun.save()
+        self.assertEqual(self.revalidasi(url, pertama).status_code, 200)
+
+    def test_detail_reservasi_lewat_mengubah_validator(self):
+        url = f'/api/accounts/{self.akun.pk}/'
+        AkunGaming.objects.filter(pk=self.akun.pk).update(
+            dipesan_oleh=buat_user(), dipesan_hingga=timezone.now() + timedelta(minutes=10),
+        )
+        pertama = self.client.get(url)
+        self.assertTrue(pertama.data['is_reserved'])
+        self.assertEqual(self.revalidasi(url, pertama).status_code, 304)
+
+        # Reservasi lewat tanpa diperbarui_pada ikut berubah.
+        AkunGaming.objects.filter(pk=self.akun.pk).update(dipesan_hingga=timezone.now() - timedelta(seconds=1))
+        kedua = self.revalidasi(url, pertama)
+        self.assertEqual(kedua.status_code, 200)
+        self.assertFalse(kedua.data['is_reserved'])
+
+        self.assertFalse(self.client.get('/api/accounts/').data[0]['is_reserved'])
+
+    def test_favorit_mengubah_etag_user(self):
+        self.client.force_authenticate(buat_user())
+        url = f'/api/accounts/{self.akun.pk}/'
+        pertama = self.client.get(url)
+        self.assertEqual(self.revalidasi(url, pertama).status_code, 304)
+        self.client.post(f'/api/accounts/{self.akun.pk}/toggle-favorite/')
+        kedua = self.revalidasi(url, pertama)
+        self.assertEqual(kedua.status_code, 200)
+        self.assertTrue(kedua.data['is_favorited'])
+
+    def test_detail_tidak_ada(self):
+        self.assertEqual(self.client.get('/api/accounts/999/').status_code, 404)
+
+
+def notifikasi_midtrans(pembelian, status='settlement', transaction_id=None):
+    return {
+        'order_id': pembelian.kode_transaksi, 'transaction_status': status,
+        'transaction_id': transaction_id or f'trx-{pembelian.kode_transaksi}', 'status_code': '200',
+        'gross_amount': f'{pembelian.harga_total:.2f}' if isinstance(pembelian, Pembelian)
+        else f'{pembelian.harga_pembelian:.2f}',
+    }
+
+
+class WebhookIdempotenTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.user = buat_user()
+        self.kupon = Kupon.objects.create(kode='HEMAT10', diskon_persen=10)
+        self.pembelian = buat_pembelian(self.user, kupon=self.kupon)
+
+    def test_kiriman_ulang_tidak_mengulang_efek(self):
+        data = notifikasi_midtrans(self.pembelian)
+        self.assertEqual(webhooks.proses_notifikasi(data), 'COMPLETED')
+        with self.assertNumQueries(1):
+            self.assertEqual(webhooks.proses_notifikasi(data), 'duplikat')
+
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+        self.assertEqual(MidtransNotifikasi.objects.count(), 1)
+        self.kupon.refresh_from_db()
+        self.assertEqual(self.kupon.jumlah_pengguna, 1)
+        self.assertTrue(AkunGaming.objects.get(pk=self.pembelian.akun_id).is_sold)
+
+    def test_status_final_tidak_mundur(self):
+        self.assertEqual(webhooks.proses_notifikasi(notifikasi_midtrans(self.pembelian)), 'COMPLETED')
+        self.assertEqual(webhooks.proses_notifikasi(notifikasi_midtrans(self.pembelian, 'expire')), 'ditolak')
+        self.assertEqual(Pembelian.objects.get(pk=self.pembelian.pk).status, 'COMPLETED')
+
+        batal = buat_topup(self.user)
+        self.assertEqual(webhooks.proses_notifikasi(notifikasi_midtrans(batal, 'cancel')), 'CANCELED')
+        self.assertEqual(webhooks.proses_notifikasi(notifikasi_midtrans(batal, 'settlement')), 'ditolak')
+        self.assertEqual(TopUpPembelian.objects.get(pk=batal.pk).status, 'CANCELED')
+        self.assertFalse(EmailOutbox.objects.filter(subjek__contains=batal.kode_transaksi).exists())
+
+    def test_status_lain_dan_order_asing(self):
+        self.assertEqual(webhooks.proses_notifikasi(notifikasi_midtrans(self.pembelian, 'pending')), 'diabaikan')
+        with self.assertRaises(webhooks.PesananTidakDitemukan):
+            webhooks.proses_notifikasi({'order_id': 'AKUN-tidak-ada', 'transaction_status': 'settlement'})
+
+    def test_akun_sudah_terjual_jadi_refund(self):
+        pembeli_lain = buat_user('pembeli2')
+        lebih_dulu = buat_pembelian(pembeli_lain, akun=self.pembelian.akun)
+        self.assertEqual(webhooks.proses_notifikasi(notifikasi_midtrans(lebih_dulu)), 'COMPLETED')
+        revenue = DashboardStats.objects.get(pk=1).revenue_akun
+
+        self.assertEqual(webhooks.proses_notifikasi(notifikasi_midtrans(self.pembelian)), 'REFUND')
+        self.assertEqual(Pembelian.objects.get(pk=self.pembelian.pk).status, 'REFUND')
+        # Tanpa kredensial, kupon, maupun revenue untuk pesanan yang ditolak.
+        email = EmailOutbox.objects.get(penerima__contains=self.user.email)
+        self.assertIn('Refund', email.subjek)
+        self.assertNotIn('Password', email.pesan)
+        self.kupon.refresh_from_db()
+        self.assertEqual(self.kupon.jumlah_pengguna, 0)
+        self.assertEqual(DashboardStats.objects.get(pk=1).revenue_akun, revenue)
+
+        self.assertEqual(webhooks.proses_notifikasi(notifikasi_midtrans(self.pembelian, 'expire')), 'ditolak')
+
+
+class WebhookInboxTest(BaseApiTest):
+    url = '/api/webhook/midtrans/'
+
+    def setUp(self):
+        super().setUp()
+        self.pembelian = buat_pembelian(buat_user())
+
+    def kirim(self, data, **kwargs):
+        data = dict(data, signature_key=webhooks.buat_signature_key(
+            data['order_id'], data['status_code'], data['gross_amount']), **kwargs)
+        return self.client.post(self.url, data, format='json')
+
+    def test_endpoint_hanya_menyimpan_ke_inbox(self):
+        data = notifikasi_midtrans(self.pembelian)
+        self.assertEqual(self.kirim(data).status_code, 200)
+        self.assertEqual(MidtransInbox.objects.get().order_id, self.pembelian.kode_transaksi)
+        self.assertEqual(Pembelian.objects.get(pk=self.pembelian.pk).status, 'PENDING')
+        self.assertFalse(EmailOutbox.objects.exists())
+
+        self.assertEqual(webhooks.proses_inbox(), (1, 0))
+        self.assertEqual(Pembelian.objects.get(pk=self.pembelian.pk).status, 'COMPLETED')
+        self.assertEqual(MidtransInbox.objects.get().hasil, 'COMPLETED')
+
+        # Kiriman ulang yang sudah diproses tidak masuk inbox lagi.
+        self.assertEqual(self.kirim(data).status_code, 200)
+        self.assertEqual(MidtransInbox.objects.count(), 1)
+
+    def test_signature_salah_ditolak(self):
+        response = self.client.post(self.url, dict(notifikasi_midtrans(self.pembelian), signature_key='x'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MidtransInbox.objects.exists())
+
+    def test_urutan_per_order_dijaga(self):
+        lunas = webhooks.simpan_ke_inbox(notifikasi_midtrans(self.pembelian))
+        kedaluwarsa = webhooks.simpan_ke_inbox(notifikasi_midtrans(self.pembelian, 'expire'))
+        lain = buat_topup(self.pembelian.pembeli)
+        webhooks.simpan_ke_inbox(notifikasi_midtrans(lain))
+
+        # Notifikasi yang lebih lama masih menunggu retry: notifikasi berikutnya untuk
+        # order yang sama ikut menunggu, order lain tetap jalan.
+        MidtransInbox.objects.filter(pk=lunas.pk).update(proses_setelah=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(webhooks.proses_inbox(), (1, 0))
+        self.assertEqual(MidtransInbox.objects.get(pk=kedaluwarsa.pk).status, 'PENDING')
+
+        MidtransInbox.objects.filter(pk=lunas.pk).update(proses_setelah=timezone.now())
+        self.assertEqual(webhooks.proses_inbox(), (1, 0))
+        self.assertEqual(webhooks.proses_inbox(), (1, 0))
+        self.assertEqual(MidtransInbox.objects.get(pk=kedaluwarsa.pk).hasil, 'ditolak')
+        self.assertEqual(Pembelian.objects.get(pk=self.pembelian.pk).status, 'COMPLETED')
+
+    def test_order_tidak_dikenal_gagal(self):
+        webhooks.simpan_ke_inbox({'order_id': 'AKUN-tidak-ada', 'transaction_status': 'settlement'})
+        self.assertEqual(webhooks.proses_inbox(), (0, 1))
+        self.assertEqual(MidtransInbox.objects.get().status, 'FAILED')
+
+    def test_replay_clone(self):
+        webhooks.simpan_ke_inbox(notifikasi_midtrans(self.pembelian))
+        webhooks.proses_inbox()
+        call_command('replay_webhook_inbox', '--status', 'DONE', '--clone', '3', '--proses', stdout=StringIO())
+        self.assertEqual(
+            list(MidtransInbox.objects.order_by('id').values_list('hasil', flat=True)),
+            ['COMPLETED', 'duplikat', 'duplikat', 'duplikat'],
+        )
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+
+class KuponCacheTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.kupon = Kupon.objects.create(kode='Hemat10', diskon_persen=10)
+
+    def test_snapshot_dipakai_ulang(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(kupon_cache.get_kupon_aktif(' hemat10 ').pk, self.kupon.pk)
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(kupon_cache.get_kupon_aktif('HEMAT10'))
+            self.assertIsNone(kupon_cache.get_kupon_aktif('HEMAT1'))
+
+    def test_toggle_admin_membuang_snapshot(self):
+        kupon_cache.get_kupon_aktif('HEMAT10')
+        self.client.force_authenticate(buat_user('admin', is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/admin/coupon/{self.kupon.pk}/toggle-active/')
+        self.assertIsNone(kupon_cache.get_kupon_aktif('HEMAT10'))
+
+    @override_settings(KUPON_CACHE_TTL=0)
+    def test_ttl_habis_dimuat_ulang(self):
+        kupon_cache.get_kupon_aktif('HEMAT10')
+        Kupon.objects.filter(pk=self.kupon.pk).update(aktif=False)
+        self.assertIsNone(kupon_cache.get_kupon_aktif('HEMAT10'))
+
+    def test_validasi_kupon_akun(self):
+        user = buat_user()
+        akun = buat_akun()
+        self.client.force_authenticate(user)
+        response = self.client.post('/api/validate-coupon-akun/', {'kode_kupon': 'hemat10', 'account_id': akun.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['valid'])
+
+        self.kupon.digunakan_oleh.add(user)
+        response = self.client.post('/api/validate-coupon-akun/', {'kode_kupon': 'hemat10', 'account_id': akun.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Kupon ini sudah pernah Anda gunakan.')
+
+
+class KuponCounterTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.kupon = Kupon.objects.create(kode='HEMAT10', diskon_persen=10)
+        self.budi, self.sari = buat_user('budi'), buat_user('sari')
+
+    def jumlah(self):
+        return Kupon.objects.get(pk=self.kupon.pk).jumlah_pengguna
+
+    def test_m2m_changed_menjaga_counter(self):
+        self.kupon.digunakan_oleh.add(self.budi, self.sari)
+        self.kupon.digunakan_oleh.add(self.budi)
+        self.assertEqual(self.jumlah(), 2)
+        self.kupon.digunakan_oleh.remove(self.budi, buat_user('lain'))
+        self.assertEqual(self.jumlah(), 1)
+        self.budi.kupon_digunakan.add(self.kupon)
+        self.assertEqual(self.jumlah(), 2)
+        self.kupon.digunakan_oleh.clear()
+        self.assertEqual(self.jumlah(), 0)
+
+    def test_webhook_mencatat_diskon(self):
+        pembelian = buat_pembelian(self.budi, kupon=self.kupon, harga_asli=Decimal('100000'), harga_total=Decimal('90000'))
+        webhooks.proses_notifikasi(notifikasi_midtrans(pembelian))
+        kupon = Kupon.objects.get(pk=self.kupon.pk)
+        self.assertEqual((kupon.jumlah_pengguna, kupon.total_diskon), (1, Decimal('10000')))
+
+        Kupon.objects.filter(pk=self.kupon.pk).update(jumlah_pengguna=9, total_diskon=0)
+        call_command('rebuild_kupon_counters', stdout=StringIO())
+        kupon = Kupon.objects.get(pk=self.kupon.pk)
+        self.assertEqual((kupon.jumlah_pengguna, kupon.total_diskon), (1, Decimal('10000')))
+
+    def test_daftar_admin_query_tetap(self):
+        self.client.force_authenticate(buat_user('admin', is_staff=True))
+        for i in range(5):
+            Kupon.objects.create(kode=f'PROMO{i}', diskon_persen=5).digunakan_oleh.add(self.budi)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/admin/all-coupons/?sort=terpopuler&page_size=4')
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertTrue(all(item['jumlah_pengguna'] == 1 for item in response.data['results']))
+        sisa = self.client.get(response.data['next']).data['results']
+        self.assertEqual(len(sisa), 2)
+        self.assertEqual(sisa[-1]['jumlah_pengguna'], 0)
+
+    def test_counter_tidak_bisa_diubah_lewat_admin(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'rahasia-123')
+        self.client.force_login(admin)
+        response = self.client.post(f'/admin/api/kupon/{self.kupon.pk}/change/', {
+            'kode': 'HEMAT10', 'diskon_persen': 10, 'aktif': 'on', 'digunakan_oleh': [self.budi.pk],
+            'jumlah_pengguna': 99, 'total_diskon': '123.00',
+        })
+        self.assertEqual(response.status_code, 302)
+        kupon = Kupon.objects.get(pk=self.kupon.pk)
+        self.assertEqual((kupon.jumlah_pengguna, kupon.total_diskon), (1, Decimal('0')))
+
+
+class RingkasanRatingTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.user = buat_user()
+        self.client.force_authenticate(self.user)
+
+    def ulas(self, rating, game='Mobile Legends'):
+        pembelian = buat_pembelian(self.user, akun=buat_akun(game=game), status='COMPLETED')
+        return self.client.post(f'/api/pembelian/review/{pembelian.pk}/', {'rating': rating, 'ulasan': f'Bintang {rating}'})
+
+    def test_ringkasan_diperbarui_saat_ulasan_dikirim(self):
+        for rating in (5, 4, 4):
+            self.assertEqual(self.ulas(rating).status_code, 201)
+        self.ulas(1, game='PUBG Mobile')
+
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/reviews/Mobile Legends/summary/').data
+        self.assertEqual(data['jumlah'], 3)
+        self.assertEqual(data['rata_rata'], Decimal('4.33'))
+        self.assertEqual(data['histogram'], {'1': 0, '2': 0, '3': 0, '4': 2, '5': 1})
+
+        ringkasan = RingkasanRating.objects.get(game='Mobile Legends')
+        self.assertEqual(
+            {field: getattr(ringkasan, field) for field in RingkasanRating.hitung_live('Mobile Legends')},
+            RingkasanRating.hitung_live('Mobile Legends'),
+        )
+
+    def test_ulasan_tidak_valid(self):
+        self.assertEqual(self.ulas(6).status_code, 400)
+        pembelian = buat_pembelian(self.user, status='COMPLETED')
+        self.client.post(f'/api/pembelian/review/{pembelian.pk}/', {'rating': 3})
+        response = self.client.post(f'/api/pembelian/review/{pembelian.pk}/', {'rating': 5})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(RingkasanRating.objects.get(game='Mobile Legends').jumlah, 1)
+
+    def test_akun_dihapus_keluar_dari_ringkasan(self):
+        self.ulas(5)
+        self.ulas(3)
+        Pembelian.objects.filter(rating=5).first().akun.delete()
+        self.assertEqual(RingkasanRating.objects.get(game='Mobile Legends').histogram['5'], 0)
+        self.assertEqual(RingkasanRating.objects.get(game='Mobile Legends').jumlah, 1)
+
+    def test_game_tanpa_ulasan_dan_rebuild(self):
+        data = self.client.get('/api/reviews/Game Asing/summary/').data
+        self.assertEqual((data['jumlah'], data['rata_rata']), (0, None))
+        self.assertFalse(RingkasanRating.objects.filter(game='Game Asing').exists())
+
+        self.ulas(2)
+        RingkasanRating.objects.update(jumlah=0, total=0, bintang_2=0)
+        call_command('rebuild_rating_summaries', stdout=StringIO())
+        self.assertEqual(RingkasanRating.objects.get(game='Mobile Legends').jumlah, 1)
+
+    def test_ulasan_dipaginasi(self):
+        for rating in (1, 2, 3, 4, 5):
+            self.ulas(rating)
+        self.client.force_authenticate(None)
+        hasil, url = [], '/api/reviews/Mobile Legends/?page_size=2'
+        while url:
+            data = self.client.get(url).data
+            hasil += [item['rating'] for item in data['results']]
+            url = data['next']
+        self.assertEqual(hasil, [5, 4, 3, 2, 1])
+
+
+class PencarianAkunTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.sultan = buat_akun(nama_akun='Akun Sultan Mythic', deskripsi='Banyak skin langka')
+        self.deskripsi = buat_akun(nama_akun='Akun Murah', deskripsi='Rank mythic, sultan skin')
+        self.pubg = buat_akun(nama_akun='Sultan PUBG', deskripsi='Conqueror', game='PUBG Mobile')
+        buat_akun(nama_akun='Akun Biasa', deskripsi='Epic')
+
+    def nama(self, url):
+        return [item['nama_akun'] for item in self.client.get(url).data]
+
+    def test_prefix_dan_semua_kata(self):
+        self.assertEqual(set(self.nama('/api/accounts/?q=sult myth')), {'Akun Sultan Mythic', 'Akun Murah'})
+        self.assertEqual(self.nama('/api/accounts/?q=sultan conq'), ['Sultan PUBG'])
+        self.assertEqual(self.nama('/api/accounts/?q=tidakada'), [])
+
+    def test_relevansi_nama_didahulukan(self):
+        self.assertEqual(self.nama('/api/accounts/?q=sultan mythic'), ['Akun Sultan Mythic', 'Akun Murah'])
+
+    def test_digabung_dengan_filter_dan_sort(self):
+        self.assertEqual(self.nama('/api/accounts/?q=sultan&game=PUBG Mobile'), ['Sultan PUBG'])
+        AkunGaming.objects.filter(pk=self.sultan.pk).update(harga=Decimal('500000'))
+        self.assertEqual(self.nama('/api/accounts/?q=sultan&sort=termahal')[0], 'Akun Sultan Mythic')
+        halaman = self.client.get('/api/accounts/?q=sultan&page_size=2').data
+        self.assertEqual(len(halaman['results']), 2)
+        self.assertEqual(len(self.client.get(halaman['next']).data['results']), 1)
+
+    def test_index_mengikuti_perubahan(self):
+        self.pubg.nama_akun = 'Akun Conqueror'
+        self.pubg.save()
+        self.assertEqual(self.nama('/api/accounts/?q=sultan&game=PUBG Mobile'), [])
+        self.deskripsi.delete()
+        self.assertEqual(self.nama('/api/accounts/?q=sultan myth'), ['Akun Sultan Mythic'])
+
+    def test_query_tanpa_kata_tidak_memfilter(self):
+        self.assertEqual(len(self.nama('/api/accounts/?q=%21%21')), 4)
+
+    def test_backend_icontains(self):
+        hasil = search.IContainsSearchBackend().cari(AkunGaming.objects.all(), ['sultan', 'myth'])
+        self.assertEqual(
+            [akun.nama_akun for akun in hasil.order_by('-relevansi', 'id')], ['Akun Sultan Mythic', 'Akun Murah'],
+        )
+
+
+class FacetKatalogTest(BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        buat_akun(harga=Decimal('50000'), level=10)
+        buat_akun(harga=Decimal('150000'), level=40)
+        buat_akun(harga=Decimal('300000'), level=120)
+        buat_akun(harga=Decimal('150000'), level=70, game='PUBG Mobile')
+        buat_akun(harga=Decimal('900000'), level=70, game='PUBG Mobile', is_sold=True)
+
+    def test_facet_mengabaikan_filternya_sendiri(self):
+        data = self.client.get('/api/accounts/?facets=1&game=Mobile Legends&min_harga=100000').data
+        facets = data['facets']
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(facets['total'], 2)
+
+        per_game = {item['value']: item['count'] for item in facets['game']}
+        self.assertEqual((per_game['Mobile Legends'], per_game['PUBG Mobile'], per_game['HAIKYU!!']), (2, 1, 0))
+        # Bucket harga tidak memakai min_harga, tapi tetap hanya game yang dipilih.
+        self.assertEqual([item['count'] for item in facets['harga']], [1, 1, 1, 0, 0, 0])
+        self.assertEqual([item['count'] for item in facets['level']], [0, 1, 0, 1, 0])
+
+    def test_filter_rentang(self):
+        url = '/api/accounts/?min_level=30&max_level=100&max_harga=150000'
+        self.assertEqual(sorted(item['level'] for item in self.client.get(url).data), [40, 70])
+
+    def test_filter_tidak_valid(self):
+        self.assertEqual(self.client.get('/api/accounts/?min_harga=murah').status_code, 400)
+        self.assertEqual(self.client.get('/api/accounts/?min_level=50&max_level=10').status_code, 400)
+        self.assertEqual(self.client.get('/api/accounts/?max_harga=-1').status_code, 400)
+
+    def test_satu_query_group_by(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/accounts/?facets=1&page_size=2')
+        self.assertEqual(sum('GROUP BY' in query['sql'] for query in queries.captured_queries), 1)
+
+
+def gambar_png(ukuran=(800, 600), warna='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', ukuran, warna).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name='gambar.png')
+
+
+class MediaSementaraMixin:
+    """MEDIA_ROOT sementara per test, supaya file upload tidak tertinggal di repo."""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        pengaturan = override_settings(MEDIA_ROOT=self.media)
+        pengaturan.enable()
+        self.addCleanup(pengaturan.disable)
+        self.storage = AkunGaming._meta.get_field('gambar').storage
+
+
+class TurunanGambarTest(MediaSementaraMixin, BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.akun = buat_akun(gambar=gambar_png())
+
+    def test_upload_diantrekan_lalu_diproses(self):
+        job = AntreanGambar.objects.get()
+        self.assertEqual((job.model, job.object_id, job.status), ('api.akungaming', self.akun.pk, 'PENDING'))
+        self.assertIsNone(self.client.get(f'/api/accounts/{self.akun.pk}/').data['gambar_srcset'])
+
+        self.assertEqual(images.proses_antrean(), (1, 0))
+        self.assertEqual(AntreanGambar.objects.get().status, 'DONE')
+        srcset = self.client.get(f'/api/accounts/{self.akun.pk}/').data['gambar_srcset']
+        self.assertEqual(set(srcset), {'thumbnail', 'card', 'full'})
+        self.assertEqual((srcset['thumbnail']['width'], srcset['thumbnail']['height']), (160, 120))
+        self.assertEqual(srcset['full']['width'], 800)  # tidak diperbesar
+        self.assertTrue(srcset['card']['webp'].endswith('.webp'))
+
+    def test_gambar_diganti_saat_render(self):
+        rendered = images.render_turunan(images.baca_gambar(self.akun))
+        sumber_lama = self.akun.gambar.name
+        self.akun.gambar = gambar_png(warna='blue')
+        self.akun.save()
+
+        self.assertFalse(images.terapkan_turunan('api.akungaming', self.akun.pk, sumber_lama, rendered))
+        self.assertEqual(AkunGaming.objects.get(pk=self.akun.pk).gambar_turunan, {})
+        # File hasil upload yang tidak dipakai ikut dihapus.
+        turunan = os.path.join(self.media, 'turunan')
+        self.assertEqual([nama for _, _, files in os.walk(turunan) for nama in files], [])
+
+    def test_gambar_rusak_dijadwalkan_ulang(self):
+        AkunGaming.objects.filter(pk=self.akun.pk).update(gambar=self.storage.save('account_images/rusak.png', ContentFile(b'bukan gambar')))
+        self.assertEqual(images.proses_antrean(), (0, 1))
+        job = AntreanGambar.objects.get()
+        self.assertEqual((job.status, job.percobaan), ('PENDING', 1))
+        self.assertGreater(job.proses_setelah, timezone.now())
+
+    def test_lease_habis_diklaim_ulang(self):
+        AntreanGambar.objects.update(status='PROSES', klaim_hingga=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(images.proses_antrean(), (1, 0))
+        self.assertIsNotNone(images.turunan_berlaku(AkunGaming.objects.get(pk=self.akun.pk)))
+
+
+def zip_gambar(*nama_file):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as arsip:
+        for nama in nama_file:
+            arsip.writestr(nama, gambar_png(ukuran=(40, 30)).read())
+    return SimpleUploadedFile('gambar.zip', buffer.getvalue(), content_type='application/zip')
+
+
+class ImportAkunTest(MediaSementaraMixin, BaseApiTest):
+    header = 'nama_akun,game,harga,level,akun_email,akun_password,gambar,images\n'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(buat_user('admin', is_staff=True))
+
+    def impor(self, baris, *gambar, chunk_size=10):
+        csv_file = SimpleUploadedFile('akun.csv', (self.header + baris).encode())
+        response = self.client.post('/api/admin/akun/import/', {
+            'file': csv_file, 'zip': zip_gambar(*gambar), 'chunk_size': chunk_size,
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def file_tersimpan(self):
+        return sorted(nama for _, _, files in os.walk(self.media) for nama in files)
+
+    def test_error_per_baris(self):
+        events = self.impor(
+            'Sultan,Mobile Legends,150000,80,sultan@game,sandi,a.png,b.png|a.png\n'
+            'Salah Game,Valorant,100000,1,x@game,sandi,a.png,\n'
+            'Tanpa Gambar,Mobile Legends,100000,1,y@game,sandi,hilang.png,\n'
+            'Harga Aneh,Mobile Legends,gratis,1,z@game,sandi,a.png,\n',
+            'a.png', 'b.png',
+        )
+        errors = {event['baris']: event['error'] for event in events if event['event'] == 'error'}
+        self.assertEqual(set(errors), {3, 4, 5})
+        self.assertIn("Game 'Valorant' tidak dikenal", errors[3])
+        self.assertIn("Gambar 'hilang.png' tidak bisa dipakai: tidak ada di zip", errors[4])
+        self.assertEqual(errors[5], 'harga harus berupa angka.')
+        self.assertEqual(events[-1], {'event': 'selesai', 'diproses': 4, 'berhasil': 1, 'gagal': 3})
+
+        akun = AkunGaming.objects.get()
+        self.assertEqual(decrypt_data(akun.akun_email), 'sultan@game')
+        self.assertEqual(AkunGamingImage.objects.filter(akun=akun).count(), 2)
+        # a.png dipakai cover dan galeri (field berbeda), b.png hanya galeri.
+        self.assertEqual(len(self.file_tersimpan()), 3)
+
+    def test_file_baris_gagal_dihapus(self):
+        asli = akun_import._simpan_chunk
+
+        def simpan_chunk(rows):
+            if any(akun.nama_akun == 'Rusak' for akun, _ in rows):
+                raise ValueError('constraint')
+            return asli(rows)
+
+        with mock.patch.object(akun_import, '_simpan_chunk', simpan_chunk):
+            events = self.impor(
+                'Bagus,Mobile Legends,100000,1,a@game,sandi,bersama.png,\n'
+                'Rusak,Mobile Legends,100000,1,b@game,sandi,bersama.png,sendiri.png\n',
+                'bersama.png', 'sendiri.png',
+            )
+        errors = [event for event in events if event['event'] == 'error']
+        self.assertEqual(errors[0]['baris'], None)
+        self.assertIn('Bulk insert chunk gagal', errors[0]['error'])
+        self.assertEqual((errors[1]['baris'], errors[1]['error']), (3, 'Gagal menyimpan: constraint'))
+
+        akun = AkunGaming.objects.get()
+        # Cover bersama tetap ada karena dipakai baris yang berhasil; galeri baris gagal dihapus.
+        self.assertEqual(self.file_tersimpan(), [os.path.basename(akun.gambar.name)])
+
+    def test_format_dan_zip_tidak_valid(self):
+        response = self.client.post('/api/admin/akun/import/', {'file': SimpleUploadedFile('akun.txt', b'x')})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/admin/akun/import/', {
+            'file': SimpleUploadedFile('akun.csv', self.header.encode()),
+            'zip': SimpleUploadedFile('gambar.zip', b'bukan zip'),
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkAdminTest(BaseApiTest):
+    url = '/api/admin/bulk/'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(buat_user('admin', is_staff=True))
+        self.ml = [buat_akun(harga=Decimal('100000')), buat_akun(harga=Decimal('200000'))]
+        self.pubg = buat_akun(harga=Decimal('50000'), game='PUBG Mobile')
+        self.terjual = buat_akun(harga=Decimal('100000'), is_sold=True)
+
+    def kirim(self, *operations):
+        return self.client.post(self.url, {'operations': list(operations)}, format='json')
+
+    def harga(self, akun):
+        return AkunGaming.objects.get(pk=akun.pk).harga
+
+    def test_persen_dengan_filter_dan_konfirmasi(self):
+        op = {'op': 'harga', 'tipe': 'AKUN', 'filter': {'game': 'Mobile Legends'}, 'persen': 10}
+        response = self.kirim(op)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('kirim konfirmasi_jumlah: 2', response.data['error'])
+        self.assertEqual(self.kirim(dict(op, konfirmasi_jumlah=True)).status_code, 400)
+
+        response = self.kirim(dict(op, konfirmasi_jumlah=2))
+        self.assertEqual(response.data['hasil'], [{'op': 'harga', 'jumlah': 2}])
+        self.assertEqual([self.harga(akun) for akun in self.ml], [Decimal('110000'), Decimal('220000')])
+        # Akun terjual dan game lain tidak ikut.
+        self.assertEqual(self.harga(self.terjual), Decimal('100000'))
+        self.assertEqual(self.harga(self.pubg), Decimal('50000'))
+
+    def test_batas_harga_hasil(self):
+        response = self.kirim({'op': 'harga', 'tipe': 'AKUN', 'ids': [self.pubg.pk, self.ml[0].pk], 'tambah': -50000})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('lebih dari 0', response.data['error'])
+        response = self.kirim({'op': 'harga', 'tipe': 'AKUN', 'ids': [self.ml[1].pk], 'persen': 10 ** 6})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.harga(self.ml[1]), Decimal('200000'))
+
+        response = self.kirim({'op': 'harga', 'tipe': 'AKUN', 'ids': [self.pubg.pk], 'tambah': '-49999.50'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.harga(self.pubg), Decimal('0.50'))
+
+    @override_settings(ADMIN_BULK_MAX_ITEMS=2)
+    def test_filter_dibatasi(self):
+        response = self.kirim({'op': 'hapus', 'tipe': 'AKUN', 'filter': {'max_harga': 500000}, 'konfirmasi_jumlah': 3})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Filter mengenai 3 baris; maksimal 2 baris', response.data['error'])
+        self.assertEqual(AkunGaming.objects.count(), 4)
+
+    def test_satu_operasi_gagal_membatalkan_semua(self):
+        kupon = Kupon.objects.create(kode='HEMAT', diskon_persen=10)
+        response = self.kirim(
+            {'op': 'kupon_aktif', 'ids': [kupon.pk], 'aktif': False},
+            {'op': 'hapus', 'tipe': 'AKUN', 'ids': [self.pubg.pk]},
+            {'op': 'update', 'tipe': 'AKUN', 'items': [{'id': self.ml[0].pk, 'is_sold': True}]},
+        )
+        self.assertEqual((response.status_code, response.data['operasi']), (400, 2))
+        self.assertTrue(Kupon.objects.get(pk=kupon.pk).aktif)
+        self.assertTrue(AkunGaming.objects.filter(pk=self.pubg.pk).exists())
+
+    def test_update_dan_hapus(self):
+        produk = TopUpProduct.objects.create(game='Mobile Legends', nama_paket='86 Diamond', harga=Decimal('20000'))
+        DashboardStats.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.kirim(
+                {'op': 'update', 'tipe': 'TOPUP', 'items': [{'id': produk.pk, 'harga': 15000}]},
+                {'op': 'hapus', 'tipe': 'AKUN', 'filter': {'game': 'PUBG Mobile'}, 'konfirmasi_jumlah': 1},
+            )
+        self.assertEqual([item['jumlah'] for item in response.data['hasil']], [1, 1])
+        self.assertEqual(TopUpProduct.objects.get(pk=produk.pk).harga, Decimal('15000'))
+        self.assertEqual(DashboardStats.objects.get(pk=1).akun_tersedia, 2)
+
+
+class GaleriAkunTest(MediaSementaraMixin, BaseApiTest):
+    def test_satu_bulk_insert(self):
+        akun = buat_akun()
+        nama_file = [self.storage.save(f'account_gallery/{i}.png', gambar_png()) for i in range(5)]
+        diperbarui = AkunGaming.objects.get(pk=akun.pk).diperbarui_pada
+        scope = catalog_cache.akun_scopes(akun.pk, akun.game)
+        versi = catalog_cache.get_versions(scope)
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            hasil = galeri.simpan(akun, nama_file)
+        insert_galeri = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "api_akungamingimage"')]
+        self.assertEqual(len(insert_galeri), 1)
+
+        self.assertEqual(len(hasil), 5)
+        self.assertEqual(sorted(AkunGamingImage.objects.filter(akun=akun).values_list('gambar', flat=True)), sorted(nama_file))
+        self.assertEqual(
+            AntreanGambar.objects.filter(model='api.akungamingimage', status='PENDING').count(), 5,
+        )
+        self.assertGreater(AkunGaming.objects.get(pk=akun.pk).diperbarui_pada, diperbarui)
+        self.assertNotEqual(catalog_cache.get_versions(scope), versi)
+
+    def test_tanpa_file(self):
+        akun = buat_akun()
+        with self.assertNumQueries(0):
+            self.assertEqual(galeri.simpan(akun, []), [])
+
+
+class UploadLangsungTest(MediaSementaraMixin, BaseApiTest):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(buat_user('admin', is_staff=True))
+
+    def tanda_tangan(self, tujuan, jumlah=1):
+        response = self.client.post('/api/admin/uploads/sign/', {'tujuan': tujuan, 'jumlah': jumlah}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['uploads']
+
+    def unggah(self, upload, isi=None):
+        isi = isi or SimpleUploadedFile('foto.png', gambar_png().read(), content_type='image/png')
+        return self.client.post(upload['upload_url'], dict(upload['fields'], file=isi), format='multipart')
+
+    def test_alur_sign_upload_create(self):
+        cover, = self.tanda_tangan('akun_gambar')
+        galeri_upload = self.tanda_tangan('akun_galeri', 2)
+        self.assertTrue(cover['public_id'].startswith('account_images/up_'))
+        for upload in (cover, *galeri_upload):
+            self.assertEqual(self.unggah(upload).status_code, 201)
+
+        response = self.client.post('/api/admin/akun/create/', {
+            'nama_akun': 'Akun Baru', 'game': 'Mobile Legends', 'harga': '150000', 'deskripsi': 'Akun baru',
+            'akun_email': 'baru@game', 'akun_password': 'sandi',
+            'gambar': cover['public_id'], 'images[]': [upload['public_id'] for upload in galeri_upload],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        akun = AkunGaming.objects.get()
+        self.assertEqual(akun.gambar.name, cover['public_id'])
+        self.assertEqual(akun.images.count(), 2)
+        self.assertEqual(decrypt_data(akun.akun_email), 'baru@game')
+
+    def test_upload_lokal_ditolak(self):
+        upload, = self.tanda_tangan('akun_gambar')
+        palsu = dict(upload, fields=dict(upload['fields'], public_id='account_images/up_' + '0' * 32))
+        self.assertEqual(self.unggah(palsu).status_code, 400)
+        bukan_gambar = SimpleUploadedFile('foto.png', b'bukan gambar')
+        self.assertEqual(self.unggah(upload, bukan_gambar).data['error'], 'File bukan gambar yang valid.')
+        self.assertEqual(self.unggah(upload).status_code, 201)
+        self.assertEqual(self.unggah(upload).data['error'], 'public_id sudah dipakai.')
+
+    def test_public_id_diverifikasi(self):
+        upload, = self.tanda_tangan('akun_gambar')
+        data = {
+            'nama_akun': 'Akun', 'game': 'Mobile Legends', 'harga': '1000',
+            'akun_email': 'a@game', 'akun_password': 'sandi', 'gambar': upload['public_id'],
+        }
+        response = self.client.post('/api/admin/akun/create/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Gambar belum diunggah', response.data['error'])
+
+        self.unggah(upload)
+        # public_id untuk tujuan lain tidak diterima.
+        response = self.client.post('/api/admin/akun/create/', dict(data, **{'images[]': [upload['public_id']]}), format='json')
+        self.assertIn('public_id gambar tidak valid untuk akun_galeri', response.data['error'])
+        self.assertFalse(AkunGaming.objects.exists())
+
+    def test_sign_dibatasi(self):
+        response = self.client.post('/api/admin/uploads/sign/', {'tujuan': 'akun_gambar', 'jumlah': 999}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/admin/uploads/sign/', {'tujuan': 'lain'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(buat_user())
+        response = self.client.post('/api/admin/uploads/sign/', {'tujuan': 'akun_gambar'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class CheckoutReservasiTest(BaseApiTest):
+    url = '/api/pembelian/create-akun/'
+
+    def setUp(self):
+        super().setUp()
+        self.akun = buat_akun()
+        self.budi, self.sari = buat_user('budi'), buat_user('sari')
+        self.server = LocalSnapServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        pengaturan = override_settings(MIDTRANS_SNAP_BASE_URL=self.server.snap_base_url)
+        pengaturan.enable()
+        self.addCleanup(pengaturan.disable)
+        payment.reset_snap_client()
+        self.addCleanup(payment.reset_snap_client)
+
+    def checkout(self, user, **data):
+        self.client.force_authenticate(user)
+        return self.client.post(self.url, dict(akun_id=self.akun.pk, **data), format='json')
+
+    def akun_db(self):
+        return AkunGaming.objects.get(pk=self.akun.pk)
+
+    def test_checkout_menahan_akun_dan_membatasi_pembayaran(self):
+        response = self.checkout(self.budi)
+        self.assertEqual(response.status_code, 200)
+        pembelian = Pembelian.objects.get(pk=response.data['pembelian_id'])
+        self.assertEqual(pembelian.midtrans_token, response.data['midtrans_token'])
+        self.assertEqual(EmailOutbox.objects.get().penerima, 'budi@example.com')
+        self.assertEqual(self.akun_db().dipesan_oleh, self.budi)
+
+        expiry = self.server.requests[0]['expiry']
+        self.assertEqual((expiry['unit'], expiry['duration']), ('minute', 15))
+        mulai = datetime.strptime(expiry['start_time'], '%Y-%m-%d %H:%M:%S %z')
+        self.assertLessEqual(mulai + timedelta(minutes=expiry['duration']), self.akun_db().dipesan_hingga)
+
+    def test_pembeli_lain_ditolak_409(self):
+        self.checkout(self.budi)
+        response = self.checkout(self.sari)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['dipesan_hingga'], self.akun_db().dipesan_hingga)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(Pembelian.objects.count(), 1)
+
+        # Reservasi lewat: pembeli lain boleh mengambil alih.
+        AkunGaming.objects.filter(pk=self.akun.pk).update(dipesan_hingga=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.checkout(self.sari).status_code, 200)
+        self.assertEqual(self.akun_db().dipesan_oleh, self.sari)
+
+    def test_pesan_atomik(self):
+        reservasi.pesan(self.akun.pk, self.budi)
+        with self.assertRaises(reservasi.AkunTidakTersedia) as konteks:
+            reservasi.pesan(self.akun.pk, self.sari)
+        self.assertIsNotNone(konteks.exception.dipesan_hingga)
+        # Pembeli yang sama boleh memperpanjang reservasinya sendiri.
+        self.assertEqual(reservasi.pesan(self.akun.pk, self.budi).dipesan_oleh_id, self.budi.pk)
+
+    def test_checkout_ulang_memakai_pesanan_berjalan(self):
+        Kupon.objects.create(kode='HEMAT10', diskon_persen=10)
+        pertama = self.checkout(self.budi, kode_kupon='HEMAT10')
+        kedua = self.checkout(self.budi, kode_kupon='hemat10')
+        self.assertEqual(kedua.data['midtrans_token'], pertama.data['midtrans_token'])
+        self.assertEqual(len(self.server.requests), 1)
+
+        response = self.checkout(self.budi)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['pembelian_id'], pertama.data['pembelian_id'])
+
+    def test_outbox_gagal_tanpa_pesanan(self):
+        with mock.patch('api.views.queue_email', side_effect=RuntimeError('outbox penuh')):
+            response = self.checkout(self.budi)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Pembelian.objects.exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+        self.assertIsNone(self.akun_db().dipesan_oleh)
+
+    def test_midtrans_gagal_melepas_reservasi(self):
+        with override_settings(MIDTRANS_SNAP_BASE_URL='http://127.0.0.1:9/snap/v1'):
+            payment.reset_snap_client()
+            response = self.checkout(self.budi)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Gagal membuat token pembayaran Midtrans', response.data['error'])
+        self.assertIsNone(self.akun_db().dipesan_hingga)
+
+    def test_pesanan_batal_dan_kedaluwarsa_melepas_reservasi(self):
+        response = self.checkout(self.budi)
+        pembelian = Pembelian.objects.get(pk=response.data['pembelian_id'])
+        webhooks.proses_notifikasi(notifikasi_midtrans(pembelian, 'expire'))
+        self.assertIsNone(self.akun_db().dipesan_oleh)
+
+        reservasi.pesan(self.akun.pk, self.sari)
+        AkunGaming.objects.filter(pk=self.akun.pk).update(dipesan_hingga=timezone.now() - timedelta(seconds=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('release_expired_reservations', stdout=StringIO())
+        self.assertIsNone(self.akun_db().dipesan_oleh)
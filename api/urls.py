@@ -37,6 +37,10 @@ urlpatterns = [
     path('pembelian/detail/<str:kode_transaksi>/', views.get_purchase_detail, name='purchase_detail'),
     path('pembelian/review/<int:purchase_id>/', views.submit_review, name='submit_review'),
     path('reviews/<str:game_name>/', views.get_reviews_by_game, name='game_reviews'),
+    path('reviews/<str:game_name>/summary/', views.get_rating_summary, name='game_rating_summary'),
+
+    # === Upload langsung (pengganti Cloudinary untuk media lokal) ===
+    path('uploads/local/', views.upload_lokal, name='upload_lokal'),
 
     # === Webhook Midtrans ===
     path('webhook/midtrans/', views.midtrans_webhook, name='midtrans_webhook'),
@@ -44,10 +48,14 @@ urlpatterns = [
     
     # === Dashboard Admin ===
     path('admin/all-orders/', views.admin_get_all_orders, name='admin_all_orders'),
+    path('admin/orders/export/', views.admin_export_orders, name='admin_export_orders'),
     path('admin/dashboard-stats/', views.get_dashboard_stats, name='admin_dashboard_stats'),
     path('admin/all-products/', views.admin_get_all_products, name='admin_all_products'),
     path('admin/product/delete/', views.admin_delete_product, name='admin_delete_product'),
+    path('admin/uploads/sign/', views.admin_sign_upload, name='admin_sign_upload'),
+    path('admin/bulk/', views.admin_bulk_mutations, name='admin_bulk_mutations'),
     path('admin/akun/create/', views.admin_create_akun, name='admin_create_akun'),
+    path('admin/akun/import/', views.admin_import_akun, name='admin_import_akun'),
     path('admin/akun/<int:pk>/detail/', views.admin_get_akun_detail, name='admin_get_akun_detail'),
     path('admin/akun/<int:pk>/update/', views.admin_update_akun, name='admin_update_akun'),
     path('admin/topup/create/', views.admin_create_topup, name='admin_create_topup'),
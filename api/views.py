@@ -1,15 +1,24 @@
+import csv
 import json
+import zipfile
+from datetime import datetime, time, timedelta
+from itertools import chain
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.dateparse import parse_date, parse_datetime
 from django.views.decorators.csrf import csrf_exempt
-from cryptography.fernet import Fernet
 from decimal import Decimal
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -17,17 +26,9 @@ from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.auth import password_validation
-from django.core.mail import send_mail
-import midtransclient
-import hashlib
-snap = midtransclient.Snap(
-    is_production=settings.MIDTRANS_IS_PRODUCTION,
-    server_key=settings.MIDTRANS_SERVER_KEY,
-    client_key=settings.MIDTRANS_CLIENT_KEY
-)
 from .models import (
     Kupon, AkunGaming, TopUpProduct, Pembelian, TopUpPembelian, 
-    AkunGamingImage, 
+    AkunGamingImage, DashboardStats, RingkasanRating,
 )
 from .serializers import (
     MyTokenObtainPairSerializer, ChangePasswordSerializer, 
@@ -35,36 +36,47 @@ from .serializers import (
     TopUpPembelianSerializer, UlasanSerializer, RegisterSerializer, KuponAdminSerializer,
     RiwayatAkunSerializer, RiwayatTopUpSerializer,PembelianDetailSerializer,AkunGamingSerializer,
 )
+from . import catalog_cache, direct_upload, galeri, kupon_cache, reservasi
+from .akun_import import FORMATS as IMPORT_FORMATS, impor_akun, tebak_format
+from .bulk import OperasiTidakValid, jalankan as jalankan_bulk
+from .catalog_cache import cache_katalog
+from .conditional import (
+    akun_detail_validators, akun_list_validators, conditional, topup_list_validators,
+)
+from .crypto import encrypt_data
+from .direct_upload import TUJUAN as UPLOAD_TUJUAN, UploadTidakValid
+from .outbox import queue_email
+from .facets import FilterTidakValid, filter_rentang, hitung_facets, minta_facets
+from .pagination import KeysetPagination
+from .reservasi import AkunTidakTersedia
+from .search import cari_akun
+from .webhooks import signature_valid, simpan_ke_inbox, sudah_diproses
 
 # ===================================================================
 # FUNGSI HELPER
 # ===================================================================
 
-def decrypt_data(encrypted_data):
-    if encrypted_data is None: return None
-    try:
-        f = Fernet(settings.FERNET_KEY)
-        return f.decrypt(encrypted_data.encode()).decode()
-    except Exception as e:
-        print(f"Error decrypting data: {e}")
-        return "Decryption Error"
-    
-def encrypt_data(data):
-    """Mengenkripsi data menggunakan FERNET_KEY."""
-    if not data:
-        return None
-    try:
-        f = Fernet(settings.FERNET_KEY)
-        return f.encrypt(data.encode()).decode()
-    except Exception as e:
-        print(f"Encryption Error: {e}")
-        return None 
-    
-def _buat_signature_key(order_id, status_code, gross_amount):
-    """Membuat signature key untuk verifikasi webhook Midtrans"""
-    server_key = settings.MIDTRANS_SERVER_KEY
-    string_to_hash = f"{order_id}{status_code}{gross_amount}{server_key}"
-    return hashlib.sha512(string_to_hash.encode()).hexdigest()
+RIWAYAT_FIELDS = ('id', 'kode_transaksi', 'tipe', 'nama_item', 'total', 'status', 'tanggal', 'midtrans_token')
+
+def _riwayat_querysets(user):
+    """
+    Queryset riwayat Akun dan Top Up milik user, diproyeksikan ke bentuk yang sama
+    dengan RiwayatAkunSerializer/RiwayatTopUpSerializer supaya bisa di-UNION ALL.
+    """
+    akun_history = Pembelian.objects.filter(pembeli=user).annotate(
+        tipe=Value('Akun', output_field=CharField()),
+        nama_item=Coalesce('akun__nama_akun', Value('Akun Dihapus'), output_field=CharField()),
+        total=F('harga_total'),
+        tanggal=F('dibuat_pada'),
+    ).values(*RIWAYAT_FIELDS)
+    topup_history = TopUpPembelian.objects.filter(pembeli=user).annotate(
+        tipe=Value('TopUp', output_field=CharField()),
+        nama_item=Coalesce('produk__nama_paket', Value('Produk Dihapus'), output_field=CharField()),
+        total=F('harga_pembelian'),
+        tanggal=F('tanggal_pembelian'),
+    ).values(*RIWAYAT_FIELDS)
+    return akun_history, topup_history
+
 # ===================================================================
 # AUTENTIKASI & USER VIEWS
 # ===================================================================
@@ -110,23 +122,63 @@ class ChangePasswordView(generics.UpdateAPIView):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional(akun_list_validators)
+@cache_katalog(lambda request: ['akun:semua'] if minta_facets(request) else catalog_cache.game_scope('akun', request),
+               params=('game', 'sort', 'q', 'min_harga', 'max_harga', 'min_level', 'max_level',
+                       'facets', 'cursor', 'page_size'))
 def akun_gaming_list(request):
-    queryset = AkunGaming.objects.filter(is_sold=False).order_by('-dibuat_pada')
+    """
+    Katalog akun yang belum terjual. `q` mencari di nama_akun dan deskripsi
+    (lihat search.py); dengan `q`, urutan default adalah relevansi.
+    min_harga/max_harga/min_level/max_level memfilter rentang (inklusif).
+    Dengan `facets=1`, respons berbentuk {'results': [...], 'facets': {...}}
+    (ditambah next/previous jika dipaginasi), lihat facets.py.
+    """
+    try:
+        filter_harga, filter_level = filter_rentang(request.query_params)
+    except FilterTidakValid as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = AkunGaming.objects.for_listing(request.user).filter(is_sold=False)
+    queryset = cari_akun(queryset, request.query_params.get('q'))
+    dicari = 'relevansi' in queryset.query.annotations
+    facets = None
     game_filter = request.query_params.get('game', None)
-    if game_filter and game_filter != 'semua':
+    if game_filter == 'semua':
+        game_filter = None
+    if minta_facets(request):
+        facets = hitung_facets(queryset, game_filter, filter_harga, filter_level)
+    if game_filter:
         queryset = queryset.filter(game=game_filter)
-    sort_by = request.query_params.get('sort', 'terbaru')
+    queryset = queryset.filter(filter_harga, filter_level)
+
+    sort_by = request.query_params.get('sort', 'relevan' if dicari else 'terbaru')
     if sort_by == 'termurah':
-        queryset = queryset.order_by('harga')
+        ordering = ('harga', 'id')
     elif sort_by == 'termahal':
-        queryset = queryset.order_by('-harga')
+        ordering = ('-harga', '-id')
+    elif sort_by == 'relevan' and dicari:
+        ordering = ('-relevansi', '-id')
     else:
-        queryset = queryset.order_by('-dibuat_pada')
+        ordering = ('-dibuat_pada', '-id')
+    if KeysetPagination.is_requested(request):
+        paginator = KeysetPagination(request)
+        page = paginator.paginate_queryset(queryset, ordering)
+        serializer = AkunGamingSerializer(page, many=True, context={'request': request})
+        response = paginator.get_paginated_response(serializer.data)
+        if facets is not None:
+            response.data['facets'] = facets
+        return response
+    queryset = queryset.order_by(*ordering)
     serializer = AkunGamingSerializer(queryset, many=True, context={'request': request})
+    if facets is not None:
+        return Response({'results': serializer.data, 'facets': facets})
     return Response(serializer.data)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional(akun_detail_validators)
+@cache_katalog(lambda request, pk: [f'akun:{pk}'])
 def akun_gaming_detail(request, pk):
     akun = get_object_or_404(AkunGaming, pk=pk)
     serializer = AkunGamingSerializer(akun, context={'request': request})
@@ -137,22 +189,53 @@ def akun_gaming_detail(request, pk):
 def get_similar_accounts(request, pk):
     current_akun = get_object_or_404(AkunGaming, pk=pk)
     similar_akuns = AkunGaming.objects.filter(game=current_akun.game, is_sold=False) \
-                                       .exclude(pk=pk).order_by('?')[0:5]
+                                      .exclude(pk=pk).random_sample(5) \
+                                      .for_listing(request.user)
     serializer = AkunGamingSerializer(similar_akuns, many=True, context={'request': request})
     return Response(serializer.data)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cache_katalog(lambda request, game_name: [catalog_cache.ulasan_scope(game_name)],
+               params=('cursor', 'page_size'))
 def get_reviews_by_game(request, game_name):
-    # PERBAIKAN DI SINI
+    """
+    Ulasan untuk satu game, terbaru dulu. Dengan `cursor`/`page_size`, hasilnya
+    dipaginasi keyset.
+    """
     reviews = Pembelian.objects.filter(akun__game=game_name, status='COMPLETED', rating__isnull=False) \
-                                .order_by('-dibuat_pada')
-    serializer = UlasanSerializer(reviews, many=True) # <-- Menggunakan UlasanSerializer
+                               .select_related('pembeli')
+    ordering = ('-dibuat_pada', '-id')
+    if KeysetPagination.is_requested(request):
+        paginator = KeysetPagination(request)
+        page = paginator.paginate_queryset(reviews, ordering)
+        serializer = UlasanSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    serializer = UlasanSerializer(reviews.order_by(*ordering), many=True) # <-- Menggunakan UlasanSerializer
     return Response(serializer.data)
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@cache_katalog(lambda request, game_name: [catalog_cache.ulasan_scope(game_name)])
+def get_rating_summary(request, game_name):
+    """Ringkasan rating satu game (jumlah, rata-rata, histogram 1-5) dari satu baris."""
+    ringkasan = RingkasanRating.get(game_name)
+    return Response({
+        'game': game_name,
+        'jumlah': ringkasan.jumlah,
+        'rata_rata': ringkasan.rata_rata,
+        'histogram': ringkasan.histogram,
+    })
+
 class TopUpProductList(generics.ListAPIView):
     serializer_class = TopUpProductSerializer
     permission_classes = [AllowAny]
+
+    @method_decorator(conditional(topup_list_validators))
+    @method_decorator(cache_katalog(lambda request: catalog_cache.game_scope('topup', request), params=('game',)))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         queryset = TopUpProduct.objects.all().order_by('harga')
         game_filter = self.request.query_params.get('game', None)
@@ -166,6 +249,10 @@ class TopUpProductDetail(generics.RetrieveAPIView):
     permission_classes = [AllowAny]
     lookup_field = 'pk'
 
+    @method_decorator(cache_katalog(lambda request, pk: [f'topup:{pk}']))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 # ===================================================================
 # INTERAKSI USER (FAVORIT, RIWAYAT, ULASAN)
 # ===================================================================
@@ -278,19 +365,16 @@ def validate_coupon_api(request):
         print(">>> Validation failed: Missing kode_kupon or account_id") # Debug print
         return Response({'error': 'Kode kupon dan ID Akun dibutuhkan.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # Mencari kupon yang cocok (case-insensitive) DAN aktif
-        print(f">>> Querying Kupon: kode__iexact='{kode_kupon}', aktif=True") # Debug print
-        kupon = Kupon.objects.get(kode__iexact=kode_kupon, aktif=True)
-        print(f">>> Kupon found: {kupon.kode}") # Debug print
-    except Kupon.DoesNotExist:
+    # Mencari kupon yang cocok (case-insensitive) DAN aktif, dari cache kupon aktif
+    kupon = kupon_cache.get_kupon_aktif(kode_kupon)
+    if kupon is None:
         # Gagal jika kode tidak cocok ATAU kupon tidak aktif
         print(f">>> Validation failed: Kupon '{kode_kupon}' not found or inactive.") # Debug print
         return Response({'valid': False, 'error': 'Kupon tidak valid.'}, status=status.HTTP_400_BAD_REQUEST)
 
     # Cek apakah kupon sudah digunakan oleh user ini
     print(f">>> Checking if user ID {request.user.id} used coupon ID {kupon.id}") # Debug print
-    if kupon.digunakan_oleh.filter(id=request.user.id).exists():
+    if kupon_cache.sudah_dipakai(kupon.pk, request.user.id):
         print(f">>> Validation failed: User {request.user.id} already used coupon {kupon.kode}.") # Debug print
         return Response({'valid': False, 'error': 'Kupon ini sudah pernah Anda gunakan.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -328,11 +412,10 @@ def validate_topup_coupon_api(request):
     product_id = request.data.get('product_id')
     if not kode_kupon or not product_id:
         return Response({'error': 'Kode kupon dan ID Produk dibutuhkan.'}, status=status.HTTP_400_BAD_REQUEST)
-    try:
-        kupon = Kupon.objects.get(kode__iexact=kode_kupon, aktif=True)
-    except Kupon.DoesNotExist:
+    kupon = kupon_cache.get_kupon_aktif(kode_kupon)
+    if kupon is None:
         return Response({'valid': False, 'error': 'Kupon tidak valid.'}, status=status.HTTP_400_BAD_REQUEST)
-    if kupon.digunakan_oleh.filter(id=request.user.id).exists():
+    if kupon_cache.sudah_dipakai(kupon.pk, request.user.id):
         return Response({'valid': False, 'error': 'Kupon ini sudah pernah Anda gunakan.'}, status=status.HTTP_400_BAD_REQUEST)
     try:
         produk = TopUpProduct.objects.get(pk=product_id)
@@ -371,8 +454,15 @@ def check_game_id_api(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@transaction.atomic
 def create_pembelian(request):
+    """
+    Checkout akun. Akun ditahan dulu untuk pembeli ini (lihat api/reservasi.py);
+    checkout lain untuk akun yang sama langsung ditolak dengan 409 tanpa membuat
+    transaksi Midtrans. Checkout ulang oleh pembeli yang sama memakai pesanan
+    PENDING yang masih berjalan, asalkan kuponnya sama.
+    Transaksi Midtrans dibuat di luar transaksi database; pesanan dan email
+    konfirmasinya (outbox) lalu disimpan bersama dalam satu transaksi.
+    """
     user = request.user
     data = request.data
     akun_id = data.get('akun_id')
@@ -381,15 +471,32 @@ def create_pembelian(request):
     akun = get_object_or_404(AkunGaming, pk=akun_id)
     if akun.is_sold:
         return Response({'error': 'Akun sudah terjual'}, status=status.HTTP_400_BAD_REQUEST)
-        
+
+    berjalan = reservasi.pesanan_berjalan(akun, user)
+    if berjalan is not None:
+        kupon_berjalan = berjalan.kupon.kode if berjalan.kupon else None
+        if kupon_cache.normalisasi_kode(kupon_berjalan) != kupon_cache.normalisasi_kode(kode_kupon):
+            return Response({'error': 'Pesanan untuk akun ini sudah dibuat dengan kupon berbeda. '
+                                      'Selesaikan pembayaran pesanan tersebut atau tunggu hingga kedaluwarsa.',
+                             'pembelian_id': berjalan.id, 'dipesan_hingga': akun.dipesan_hingga},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({'midtrans_token': berjalan.midtrans_token, 'pembelian_id': berjalan.id,
+                         'dipesan_hingga': akun.dipesan_hingga})
     try:
-        pembelian_obj, midtrans_token = Pembelian.create_pembelian(
+        akun = reservasi.pesan(akun.pk, user)
+    except AkunTidakTersedia as e:
+        if e.dipesan_hingga is None:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'error': str(e), 'dipesan_hingga': e.dipesan_hingga}, status=status.HTTP_409_CONFLICT)
+
+    tersimpan = False
+    try:
+        pembelian_obj, midtrans_token = Pembelian.siapkan_pembelian(
             pembeli=user, akun=akun, kode_kupon_str=kode_kupon
         )
 
-        try:
-            subject = f'Pesanan [PENDING] - Kode: {pembelian_obj.kode_transaksi}'
-            message = f"""
+        subject = f'Pesanan [PENDING] - Kode: {pembelian_obj.kode_transaksi}'
+        message = f"""
 Halo {user.username},
 
 Pesanan Anda untuk akun "{pembelian_obj.akun.nama_akun}" telah berhasil dibuat dengan kode transaksi:
@@ -402,15 +509,20 @@ Anda dapat melihat status pesanan dan melanjutkan pembayaran kapan saja melalui
 
 Terima kasih,
 Tim MainAjaa
-            """
-            
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False)
-            print(f"Email konfirmasi pesanan (pending) dikirim ke {user.email} for order {pembelian_obj.kode_transaksi}")
-        except Exception as e:
-            print(f"ERROR: Gagal mengirim email konfirmasi pesanan (pending) ke {user.email}: {e}")
-
-        return Response({'midtrans_token': midtrans_token, 'pembelian_id': pembelian_obj.id})
+        """
+        
+        with transaction.atomic():
+            pembelian_obj.save()
+            queue_email(subject, message, [user.email])
+        tersimpan = True
+        print(f"Email konfirmasi pesanan (pending) diantrekan untuk {user.email} for order {pembelian_obj.kode_transaksi}")
+
+        return Response({'midtrans_token': midtrans_token, 'pembelian_id': pembelian_obj.id,
+                         'dipesan_hingga': akun.dipesan_hingga})
     except Exception as e:
+        if not tersimpan:
+            # Pesanan tidak jadi dibuat (kupon tidak valid, Midtrans atau database gagal): lepas reservasinya.
+            reservasi.lepas(akun.pk, user.pk)
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
@@ -437,9 +549,8 @@ def create_topup_pembelian(request):
             game_zone_id=game_zone_id,
             kode_kupon_str=kode_kupon
         )
-        try:
-            subject = f'Pesanan Top Up [PENDING] - Kode: {pembelian_obj.kode_transaksi}'
-            message = f"""
+        subject = f'Pesanan Top Up [PENDING] - Kode: {pembelian_obj.kode_transaksi}'
+        message = f"""
 Halo {user.username},
 
 Pesanan Top Up Anda untuk "{pembelian_obj.produk.nama_paket}" telah berhasil dibuat dengan kode transaksi:
@@ -453,12 +564,10 @@ Anda dapat melihat status pesanan dan melanjutkan pembayaran kapan saja melalui
 
 Terima kasih,
 Tim MainAjaa
-            """
-            
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False)
-            print(f"Email konfirmasi top up (pending) dikirim ke {user.email} for order {pembelian_obj.kode_transaksi}")
-        except Exception as e:
-            print(f"ERROR: Gagal mengirim email konfirmasi top up (pending) ke {user.email}: {e}")
+        """
+        
+        queue_email(subject, message, [user.email])
+        print(f"Email konfirmasi top up (pending) diantrekan untuk {user.email} for order {pembelian_obj.kode_transaksi}")
 
         return Response({'midtrans_token': midtrans_token, 'pembelian_id': pembelian_obj.id})
     except Exception as e:
@@ -472,194 +581,39 @@ def get_pembelian_history(request):
     diurutkan berdasarkan tanggal terbaru.
     """
     user = request.user
+    akun_history, topup_history = _riwayat_querysets(user)
+    ordering = ('-tanggal', '-tipe', '-id')
 
-    akun_history = Pembelian.objects.filter(pembeli=user)
-    topup_history = TopUpPembelian.objects.filter(pembeli=user)
-    akun_data = RiwayatAkunSerializer(akun_history, many=True).data
-    topup_data = RiwayatTopUpSerializer(topup_history, many=True).data
-    combined_history = list(akun_data) + list(topup_data)
-    combined_history.sort(key=lambda x: str(x.get('tanggal')), reverse=True)
-    
-    return Response(combined_history)
-
-@csrf_exempt
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def midtrans_webhook(request):
-    try:
-        data = json.loads(request.body)
-        order_id = data.get('order_id')
-        transaction_status = data.get('transaction_status')
+    if KeysetPagination.is_requested(request):
+        paginator = KeysetPagination(request)
+        page = paginator.paginate_union([akun_history, topup_history], ordering)
+        return paginator.get_paginated_response(page)
 
-        if not order_id or not transaction_status:
-            return Response({'error': 'Data tidak valid'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Tentukan tipe pembelian berdasarkan prefix
-        pembelian = None
-        if order_id.startswith('TOPUP-'):
-            pembelian = get_object_or_404(TopUpPembelian, kode_transaksi=order_id)
-        elif order_id.startswith('AKUN-'):
-            pembelian = get_object_or_404(Pembelian, kode_transaksi=order_id)
-        else:
-            return Response({'error': 'Tipe order tidak dikenali'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if transaction_status == 'capture' or transaction_status == 'settlement':
-            # Hanya proses jika statusnya masih PENDING
-            if pembelian.status == 'PENDING':
-                pembelian.status = 'COMPLETED'
-                
-                subject = ''
-                message = ''
-                
-                # --- LOGIKA EMAIL LUNAS DIMULAI ---
-                if isinstance(pembelian, Pembelian) and pembelian.akun:
-                    # Ini adalah pembelian AKUN
-                    pembelian.akun.is_sold = True
-                    pembelian.akun.save()
-                    print(f"Akun ID {pembelian.akun.id} marked as sold for order {order_id}")
-
-                    # Dekripsi data akun untuk dikirim
-                    akun_email_dec = decrypt_data(pembelian.akun.akun_email)
-                    akun_pass_dec = decrypt_data(pembelian.akun.akun_password)
-
-                    subject = f'Pesanan LUNAS - Kode: {pembelian.kode_transaksi}'
-                    message = f"""
-Halo {pembelian.pembeli.username},
-
-Pembayaran Anda untuk pesanan {pembelian.kode_transaksi} ({pembelian.akun.nama_akun}) telah berhasil!
-
-Berikut adalah detail data akun yang Anda beli:
-----------------------------------
-Email/Username Akun: {akun_email_dec}
-Password Akun: {akun_pass_dec}
-----------------------------------
-
-Harap segera amankan akun Anda. Data ini juga dapat diakses melalui halaman 'Riwayat Pesanan' di profil Anda (setelah kami menyiapkannya).
-
-Terima kasih telah berbelanja,
-Tim MainAjaa
-                    """
-
-                elif isinstance(pembelian, TopUpPembelian):
-                    # Ini adalah pembelian TOP UP
-                    subject = f'Pesanan Top Up LUNAS - Kode: {pembelian.kode_transaksi}'
-                    message = f"""
-Halo {pembelian.pembeli.username},
-
-Pembayaran Anda untuk pesanan Top Up {pembelian.kode_transaksi} ({pembelian.produk.nama_paket}) telah berhasil!
-
-Top up Anda akan segera kami proses ke:
-Game ID: {pembelian.game_user_id} {pembelian.game_zone_id or ''}
-
-Terima kasih telah berbelanja,
-Tim MainAjaa
-                    """
-
-
-                try:
-                    if subject and message:
-                        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [pembelian.pembeli.email], fail_silently=False)
-                        print(f"Email konfirmasi LUNAS dikirim ke {pembelian.pembeli.email} for order {order_id}")
-                except Exception as e:
-                    print(f"ERROR: Gagal mengirim email LUNAS ke {pembelian.pembeli.email}: {e}")
-
-                if pembelian.kupon:
-                    pembelian.kupon.digunakan_oleh.add(pembelian.pembeli)
-
-        elif transaction_status == 'pending':
-            pass
-
-        elif transaction_status == 'cancel' or transaction_status == 'expire' or transaction_status == 'deny':
-            if pembelian.status == 'PENDING':
-                pembelian.status = 'CANCELED'
-                if isinstance(pembelian, Pembelian) and pembelian.akun:
-                    pembelian.akun.is_sold = False
-                    pembelian.akun.save()
-                    print(f"Akun ID {pembelian.akun.id} marked as NOT sold (reverted) for order {order_id}")
-
-        pembelian.save()
-        return Response({'status': 'success'}, status=status.HTTP_200_OK)
-
-    except Exception as e:
-        print(f"Error processing Midtrans webhook: {e}")
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    # Penggabungan & pengurutan dilakukan database (UNION ALL), bukan di Python.
+    combined_history = akun_history.union(topup_history, all=True).order_by(*ordering)
+    return Response(list(combined_history))
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def midtrans_webhook(request):
     """
-    Endpoint untuk menerima notifikasi webhook dari Midtrans.
-    Ini akan menangani AKUN dan TOPUP.
+    Endpoint untuk menerima notifikasi webhook dari Midtrans (AKUN dan TOPUP).
+    Hanya memverifikasi signature dan menyimpan notifikasi ke inbox, lalu langsung
+    menjawab 200; pemrosesannya dilakukan `manage.py process_webhook_inbox`.
     """
     try:
         data = request.data
         order_id = data.get('order_id')
-        status_code = data.get('status_code')
-        gross_amount = data.get('gross_amount')
-        signature_key = data.get('signature_key')
-        transaction_status = data.get('transaction_status')
-
-        # 1. Verifikasi Signature Key (Keamanan)
-        expected_signature = _buat_signature_key(order_id, status_code, gross_amount)
-        if signature_key != expected_signature:
+
+        # Verifikasi Signature Key (Keamanan)
+        if not signature_valid(data):
             print(f"WEBHOOK GAGAL: Signature key tidak valid untuk order {order_id}")
             return Response({'status': 'error', 'message': 'Invalid signature'}, status=400)
 
-        # 2. Tentukan model berdasarkan prefix order_id
-        pembelian = None
-        model_type = None
-
-        if order_id.startswith('AKUN-'):
-            try:
-                # Menggunakan model 'Pembelian' Anda
-                pembelian = Pembelian.objects.get(kode_transaksi=order_id)
-                model_type = 'AKUN'
-            except Pembelian.DoesNotExist:
-                pass  # Biarkan error 404 di bawah
-        
-        elif order_id.startswith('TOPUP-'): # Asumsi prefix ini
-            try:
-                # Menggunakan model 'TopUpPembelian' Anda
-                pembelian = TopUpPembelian.objects.get(kode_transaksi=order_id)
-                model_type = 'TOPUP'
-            except TopUpPembelian.DoesNotExist:
-                pass  # Biarkan error 404 di bawah
-
-        # 3. Handle jika order tidak ditemukan
-        if not pembelian:
-            print(f"WEBHOOK GAGAL: Order {order_id} tidak ditemukan di model manapun.")
-            return Response({'status': 'error', 'message': 'Order not found'}, status=404)
-
-        # 4. Update status di database
-        if transaction_status == 'capture' or transaction_status == 'settlement':
-            if pembelian.status != 'COMPLETED':
-                pembelian.status = 'COMPLETED'
-                pembelian.save()
-
-                # Jika ini pembelian AKUN, tandai akun sebagai terjual
-                if model_type == 'AKUN':
-                    try:
-                        akun = pembelian.akun
-                        akun.is_sold = True
-                        akun.save()
-                        print(f"WEBHOOK SUKSES: Akun {akun.id} ditandai terjual.")
-                    except Exception as e:
-                        print(f"WEBHOOK ERROR: Gagal menandai akun terjual untuk {order_id}: {e}")
-                try:
-                    print(f"WEBHOOK SUKSES: Email konfirmasi untuk {order_id} akan dikirim (jika diaktifkan).")
-                except Exception as e:
-                    print(f"WEBHOOK SUKSES: Gagal kirim email, tapi status diupdate. Error: {e}")
-            
-            print(f"WEBHOOK SUKSES: Status untuk {order_id} sudah COMPLETED.")
-
-        elif transaction_status == 'cancel' or transaction_status == 'expire' or transaction_status == 'deny':
-            if pembelian.status != 'CANCELLED':
-                pembelian.status = 'CANCELLED'
-                pembelian.save()
-            print(f"WEBHOOK SUKSES: Status untuk {order_id} diupdate ke CANCELLED.")
-
-        # Kirim balasan 200 OK ke Midtrans
+        # Kiriman ulang yang sudah pernah diproses tidak perlu masuk inbox lagi.
+        if not sudah_diproses(data):
+            simpan_ke_inbox(data)
         return Response({'status': 'ok'}, status=200)
 
     except Exception as e:
@@ -670,11 +624,120 @@ def midtrans_webhook(request):
 # ADMIN DASHBOARD VIEWS
 # ===================================================================
 
+ADMIN_ORDER_FIELDS = (
+    'id', 'kode_transaksi', 'tipe', 'nama_item', 'game', 'pembeli_username',
+    'total', 'harga_asli', 'kupon_kode', 'status', 'tanggal', 'midtrans_token',
+)
+ADMIN_ORDER_SORTS = {
+    'terbaru': ('-tanggal', '-tipe', '-id'),
+    'terlama': ('tanggal', 'tipe', 'id'),
+    'termahal': ('-total', '-tipe', '-id'),
+    'termurah': ('total', 'tipe', 'id'),
+}
+
+ADMIN_COUPON_SORTS = {
+    'terbaru': ('-dibuat_pada', '-id'),
+    'terpopuler': ('-jumlah_pengguna', '-id'),
+    'diskon_terbesar': ('-total_diskon', '-id'),
+}
+
+def _parse_tanggal_filter(value, akhir=False):
+    """
+    Mengubah '2025-01-31' atau datetime ISO menjadi datetime aware. Untuk batas akhir
+    berupa tanggal, dipakai awal hari berikutnya (filter eksklusif) agar index tetap terpakai.
+    """
+    waktu = parse_datetime(value)
+    if waktu is None:
+        tanggal = parse_date(value)
+        if tanggal is None:
+            raise ValueError(f"Format tanggal tidak valid: {value}")
+        if akhir:
+            tanggal += timedelta(days=1)
+        waktu = datetime.combine(tanggal, time.min)
+    if timezone.is_naive(waktu):
+        waktu = timezone.make_aware(waktu)
+    return waktu
+
+def _admin_order_querysets(params):
+    """
+    Menerapkan filter admin (status, tipe, game, dari/sampai, pembeli, kupon) di database.
+    Mengembalikan (queryset Pembelian atau None, queryset TopUpPembelian atau None).
+    """
+    tipe = params.get('tipe', 'semua').upper()
+    akun_qs = Pembelian.objects.all() if tipe in ('SEMUA', 'AKUN') else None
+    topup_qs = TopUpPembelian.objects.all() if tipe in ('SEMUA', 'TOPUP') else None
+
+    filters_akun, filters_topup = {}, {}
+    if params.get('status'):
+        filters_akun['status'] = filters_topup['status'] = params['status'].upper()
+    if params.get('game') and params['game'] != 'semua':
+        filters_akun['akun__game'] = filters_topup['produk__game'] = params['game']
+    if params.get('pembeli'):
+        filters_akun['pembeli__username'] = filters_topup['pembeli__username'] = params['pembeli']
+    if params.get('kupon'):
+        filters_akun['kupon__kode__iexact'] = filters_topup['kupon__kode__iexact'] = params['kupon']
+    if params.get('dari'):
+        dari = _parse_tanggal_filter(params['dari'])
+        filters_akun['dibuat_pada__gte'] = filters_topup['tanggal_pembelian__gte'] = dari
+    if params.get('sampai'):
+        sampai = _parse_tanggal_filter(params['sampai'], akhir=True)
+        lookup = 'lt' if parse_datetime(params['sampai']) is None else 'lte'
+        filters_akun[f'dibuat_pada__{lookup}'] = filters_topup[f'tanggal_pembelian__{lookup}'] = sampai
+
+    if akun_qs is not None:
+        akun_qs = akun_qs.filter(**filters_akun)
+    if topup_qs is not None:
+        topup_qs = topup_qs.filter(**filters_topup)
+    return akun_qs, topup_qs
+
+def _admin_order_projection(akun_qs, topup_qs):
+    """Proyeksi pesanan Akun & Top Up ke kolom yang sama (ADMIN_ORDER_FIELDS) untuk UNION ALL."""
+    querysets = []
+    if akun_qs is not None:
+        querysets.append(akun_qs.annotate(
+            tipe=Value('AKUN', output_field=CharField()),
+            nama_item=Coalesce('akun__nama_akun', Value('N/A'), output_field=CharField()),
+            game=F('akun__game'),
+            pembeli_username=F('pembeli__username'),
+            total=F('harga_total'),
+            kupon_kode=F('kupon__kode'),
+            tanggal=F('dibuat_pada'),
+        ).values(*ADMIN_ORDER_FIELDS))
+    if topup_qs is not None:
+        querysets.append(topup_qs.annotate(
+            tipe=Value('TOPUP', output_field=CharField()),
+            nama_item=Coalesce('produk__nama_paket', Value('N/A'), output_field=CharField()),
+            game=F('produk__game'),
+            pembeli_username=F('pembeli__username'),
+            total=F('harga_pembelian'),
+            kupon_kode=F('kupon__kode'),
+            tanggal=F('tanggal_pembelian'),
+        ).values(*ADMIN_ORDER_FIELDS))
+    return querysets
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_get_all_orders(request):
-    akun_purchases = Pembelian.objects.all().order_by('-dibuat_pada')
-    topup_purchases = TopUpPembelian.objects.all().order_by('-tanggal_pembelian')
+    """
+    Daftar semua pesanan untuk admin, dengan filter server-side:
+    status, tipe (AKUN/TOPUP), game, dari/sampai, pembeli (username), kupon (kode).
+    Dengan `cursor`/`page_size`, hasilnya dipaginasi keyset dan bisa diurutkan
+    lewat `sort` (terbaru, terlama, termahal, termurah).
+    """
+    try:
+        akun_qs, topup_qs = _admin_order_querysets(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if KeysetPagination.is_requested(request):
+        ordering = ADMIN_ORDER_SORTS.get(request.query_params.get('sort'), ADMIN_ORDER_SORTS['terbaru'])
+        querysets = _admin_order_projection(akun_qs, topup_qs)
+        paginator = KeysetPagination(request)
+        page = paginator.paginate_union(querysets, ordering) if querysets else []
+        return paginator.get_paginated_response(page)
+
+    akun_purchases = akun_qs.order_by('-dibuat_pada') if akun_qs is not None else Pembelian.objects.none()
+    topup_purchases = topup_qs.order_by('-tanggal_pembelian') if topup_qs is not None else TopUpPembelian.objects.none()
     akun_data = PembelianSerializer(akun_purchases, many=True).data
     topup_data = TopUpPembelianSerializer(topup_purchases, many=True).data
     combined_data = []
@@ -691,18 +754,51 @@ def admin_get_all_orders(request):
     all_orders = sorted(combined_data, key=lambda x: x['dibuat_pada'], reverse=True)
     return Response(all_orders)
 
+class _Echo:
+    """Pseudo-buffer untuk csv.writer: write() langsung mengembalikan barisnya."""
+    def write(self, value):
+        return value
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_export_orders(request):
+    """
+    Export pesanan (filter & sort sama dengan admin_get_all_orders) sebagai stream
+    CSV atau NDJSON (`output=csv|ndjson`). Tabel dibaca per chunk dengan keyset,
+    jadi memori worker tetap kecil berapapun jumlah pesanannya.
+    """
+    try:
+        akun_qs, topup_qs = _admin_order_querysets(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    output = request.query_params.get('output', 'csv').lower()
+    if output not in ('csv', 'ndjson'):
+        return Response({'error': 'Output harus csv atau ndjson.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    ordering = ADMIN_ORDER_SORTS.get(request.query_params.get('sort'), ADMIN_ORDER_SORTS['terbaru'])
+    querysets = _admin_order_projection(akun_qs, topup_qs)
+    rows = KeysetPagination.iterate_union(querysets, ordering) if querysets else iter(())
+
+    if output == 'ndjson':
+        content = (json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+        response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+    else:
+        writer = csv.writer(_Echo())
+        header = (writer.writerow(ADMIN_ORDER_FIELDS),)
+        body = (writer.writerow([row[field] for field in ADMIN_ORDER_FIELDS]) for row in rows)
+        response = StreamingHttpResponse(chain(header, body), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="pesanan.{output}"'
+    return response
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def get_dashboard_stats(request):
-    akun_tersedia = AkunGaming.objects.filter(is_sold=False).count()
-    akun_terjual = AkunGaming.objects.filter(is_sold=True).count()
-    topup_berhasil = TopUpPembelian.objects.filter(status='COMPLETED').count()
-    revenue_akun = Pembelian.objects.filter(status='COMPLETED').aggregate(total=Sum('harga_total'))['total'] or 0
-    revenue_topup = TopUpPembelian.objects.filter(status='COMPLETED').aggregate(total=Sum('harga_pembelian'))['total'] or 0
-    total_revenue = float(revenue_akun) + float(revenue_topup)
+    # Dibaca dari proyeksi DashboardStats (satu baris), bukan agregat live.
+    stats = DashboardStats.get()
+    total_revenue = float(stats.revenue_akun) + float(stats.revenue_topup)
     stats_data = {
-        'akun_tersedia': akun_tersedia, 'akun_terjual': akun_terjual,
-        'topup_berhasil': topup_berhasil, 'total_revenue': total_revenue,
+        'akun_tersedia': stats.akun_tersedia, 'akun_terjual': stats.akun_terjual,
+        'topup_berhasil': stats.topup_berhasil, 'total_revenue': total_revenue,
     }
     return Response(stats_data, status=status.HTTP_200_OK)
 
@@ -711,28 +807,50 @@ def get_dashboard_stats(request):
 def admin_get_all_products(request):
     tipe_filter = request.query_params.get('tipe', 'semua')
     game_filter = request.query_params.get('game', 'semua')
-    combined_data = []
+    sections = []
     if tipe_filter == 'semua' or tipe_filter == 'AKUN':
-        akun_queryset = AkunGaming.objects.all().order_by('-dibuat_pada')
+        akun_queryset = AkunGaming.objects.for_listing(request.user)
         if game_filter and game_filter != 'semua':
             akun_queryset = akun_queryset.filter(game=game_filter)
-        akun_data = AkunGamingSerializer(akun_queryset, many=True, context={'request': request}).data
+        sections.append(('AKUN', akun_queryset, ('-dibuat_pada', '-id')))
+    if tipe_filter == 'semua' or tipe_filter == 'TOPUP':
+        topup_queryset = TopUpProduct.objects.all()
+        if game_filter and game_filter != 'semua':
+            topup_queryset = topup_queryset.filter(game=game_filter)
+        sections.append(('TOPUP', topup_queryset, ('-id',)))
+
+    paginator = None
+    if KeysetPagination.is_requested(request) and sections:
+        paginator = KeysetPagination(request)
+        rows = paginator.paginate_sections(sections)
+        groups = {
+            tipe: [obj for row_tipe, obj in rows if row_tipe == tipe]
+            for tipe, _, _ in sections
+        }
+    else:
+        groups = {
+            tipe: queryset.order_by(*ordering)
+            for tipe, queryset, ordering in sections
+        }
+
+    combined_data = []
+    if 'AKUN' in groups:
+        akun_data = AkunGamingSerializer(groups['AKUN'], many=True, context={'request': request}).data
         for item in akun_data:
             item['tipe'] = 'AKUN'
             item['nama_item'] = item['nama_akun']
             item['status_jual'] = 'TERJUAL' if item['is_sold'] else 'TERSEDIA'
             combined_data.append(item)
-    if tipe_filter == 'semua' or tipe_filter == 'TOPUP':
-        topup_queryset = TopUpProduct.objects.all().order_by('-id')
-        if game_filter and game_filter != 'semua':
-            topup_queryset = topup_queryset.filter(game=game_filter)
-        topup_data = TopUpProductSerializer(topup_queryset, many=True).data
+    if 'TOPUP' in groups:
+        topup_data = TopUpProductSerializer(groups['TOPUP'], many=True).data
         for item in topup_data:
             item['tipe'] = 'TOPUP'
             item['nama_item'] = item['nama_paket']
             item['harga'] = item['harga']
             item['status_jual'] = 'TERSEDIA'
             combined_data.append(item)
+    if paginator is not None:
+        return paginator.get_paginated_response(combined_data)
     all_products = sorted(combined_data, key=lambda x: x['tipe'])
     return Response(all_products)
 
@@ -757,7 +875,55 @@ def admin_delete_product(request):
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
-@transaction.atomic
+def admin_bulk_mutations(request):
+    """
+    Menjalankan beberapa operasi massal (ubah harga, update, hapus, aktif/nonaktif
+    kupon) dalam satu transaksi. Format operasi dijelaskan di api/bulk.py.
+    """
+    try:
+        hasil = jalankan_bulk(request.data.get('operations'))
+    except OperasiTidakValid as e:
+        return Response({'error': str(e), 'operasi': e.index}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'hasil': hasil}, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def admin_sign_upload(request):
+    """
+    Membuat parameter upload bertanda tangan berumur pendek supaya dashboard
+    mengunggah gambar langsung ke media storage. Body: `tujuan` (akun_gambar,
+    akun_galeri, topup_gambar) dan `jumlah` (default 1).
+    """
+    tujuan = request.data.get('tujuan')
+    if tujuan not in UPLOAD_TUJUAN:
+        return Response({'error': f"tujuan harus salah satu dari: {', '.join(UPLOAD_TUJUAN)}."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        jumlah = int(request.data.get('jumlah') or 1)
+    except (TypeError, ValueError):
+        return Response({'error': 'jumlah harus berupa angka.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= jumlah <= settings.DIRECT_UPLOAD_MAX_FILES:
+        return Response({'error': f'jumlah harus antara 1 dan {settings.DIRECT_UPLOAD_MAX_FILES}.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'uploads': direct_upload.buat_upload(tujuan, jumlah, request)}, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def upload_lokal(request):
+    """
+    Pengganti endpoint upload Cloudinary saat media disimpan di filesystem
+    (development/test). Otorisasi lewat token dari admin_sign_upload.
+    """
+    backend = direct_upload.get_upload_backend('akun_gambar')
+    if not isinstance(backend, direct_upload.LocalUploadBackend):
+        return Response({'error': 'Upload lokal tidak aktif.'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        public_id = backend.terima(request.data, request.FILES.get('file'))
+    except UploadTidakValid as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'public_id': public_id}, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
 def admin_create_akun(request):
     """
     Membuat AkunGaming baru dari dashboard admin.
@@ -774,12 +940,17 @@ def admin_create_akun(request):
     akun_password = request.data.get('akun_password')
     # --- Selesai ---
 
-    gambar_cover = request.FILES.get('gambar')
-    gambar_galeri = request.FILES.getlist('images[]')
+    # Gambar sudah diunggah langsung ke storage; yang dikirim hanya public_id-nya (lihat api/direct_upload.py)
+    gambar_cover = request.data.get('gambar')
+    gambar_galeri = direct_upload.daftar(request.data, 'images[]')
 
     # Validasi (Tambahkan validasi kredensial)
     if not all([nama_akun, game, harga, gambar_cover, akun_email, akun_password]): # <-- Tambahkan akun_email & akun_password
         return Response({'error': 'Semua field bertanda * wajib diisi.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        direct_upload.verifikasi({'akun_gambar': [gambar_cover], 'akun_galeri': gambar_galeri})
+    except UploadTidakValid as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
         # --- Enkripsi Kredensial ---
@@ -789,21 +960,19 @@ def admin_create_akun(request):
              raise ValueError("Gagal mengenkripsi kredensial akun.")
         # --- Selesai Enkripsi ---
 
-        # Buat objek AkunGaming utama (Tambahkan kredensial terenkripsi)
-        akun = AkunGaming.objects.create(
-            nama_akun=nama_akun,
-            game=game,
-            level=level if level else 1,
-            deskripsi=deskripsi,
-            harga=harga,
-            gambar=gambar_cover,
-            akun_email=encrypted_email,       # <-- Tambahkan ini
-            akun_password=encrypted_password # <-- Tambahkan ini
-        )
-
-        # Loop dan simpan semua gambar galeri (tidak berubah)
-        for img_file in gambar_galeri:
-            AkunGamingImage.objects.create(akun=akun, gambar=img_file)
+        with transaction.atomic():
+            # Buat objek AkunGaming utama (Tambahkan kredensial terenkripsi)
+            akun = AkunGaming.objects.create(
+                nama_akun=nama_akun,
+                game=game,
+                level=level if level else 1,
+                deskripsi=deskripsi,
+                harga=harga,
+                gambar=gambar_cover,
+                akun_email=encrypted_email,       # <-- Tambahkan ini
+                akun_password=encrypted_password # <-- Tambahkan ini
+            )
+            galeri.simpan(akun, gambar_galeri)
 
         # Kembalikan data yang baru dibuat (tidak berubah)
         serializer = AkunGamingSerializer(akun, context={'request': request})
@@ -817,6 +986,34 @@ def admin_create_akun(request):
         # --- SELESAI PERUBAHAN ---
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def admin_import_akun(request):
+    """
+    Import massal akun dari file CSV/NDJSON (`file`), dengan gambar berupa URL
+    atau nama file di zip pendamping (`zip`). Lihat api/akun_import.py untuk kolom.
+    Respons berupa stream NDJSON: event `error` per baris yang dilewati, `progress`
+    per chunk, dan `selesai` di akhir. Untuk file sangat besar, gunakan
+    `manage.py import_akun`.
+    """
+    file = request.FILES.get('file')
+    if not file:
+        return Response({'error': 'File import wajib diunggah.'}, status=status.HTTP_400_BAD_REQUEST)
+    format_file = request.data.get('format') or tebak_format(file.name)
+    if format_file not in IMPORT_FORMATS:
+        return Response({'error': 'Format harus csv atau ndjson.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        chunk_size = int(request.data.get('chunk_size') or 0) or None
+    except ValueError:
+        return Response({'error': 'chunk_size harus berupa angka.'}, status=status.HTTP_400_BAD_REQUEST)
+    zip_file = request.FILES.get('zip')
+    if zip_file and not zipfile.is_zipfile(zip_file):
+        return Response({'error': 'File zip tidak valid.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    events = impor_akun(file, format_file, zip_file=zip_file, chunk_size=chunk_size)
+    content = (json.dumps(event) + '\n' for event in events)
+    return StreamingHttpResponse(content, content_type='application/x-ndjson')
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_get_akun_detail(request, pk):
@@ -829,24 +1026,28 @@ def admin_get_akun_detail(request, pk):
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
-@transaction.atomic
 def admin_update_akun(request, pk):
     try:
         akun = get_object_or_404(AkunGaming, pk=pk)
-        akun.nama_akun = request.data.get('nama_akun', akun.nama_akun)
-        akun.game = request.data.get('game', akun.game)
-        akun.level = request.data.get('level', akun.level)
-        akun.deskripsi = request.data.get('deskripsi', akun.deskripsi)
-        akun.harga = request.data.get('harga', akun.harga)
-        if 'gambar' in request.FILES:
-            akun.gambar = request.FILES.get('gambar')
-        akun.save()
-        gambar_galeri = request.FILES.getlist('images[]')
-        for img_file in gambar_galeri:
-            AkunGamingImage.objects.create(akun=akun, gambar=img_file)
-        delete_image_ids = request.data.getlist('delete_images[]')
-        if delete_image_ids:
-            AkunGamingImage.objects.filter(id__in=delete_image_ids, akun=akun).delete()
+        gambar_cover = request.data.get('gambar')
+        gambar_galeri = direct_upload.daftar(request.data, 'images[]')
+        try:
+            direct_upload.verifikasi({'akun_gambar': [gambar_cover] if gambar_cover else [], 'akun_galeri': gambar_galeri})
+        except UploadTidakValid as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            akun.nama_akun = request.data.get('nama_akun', akun.nama_akun)
+            akun.game = request.data.get('game', akun.game)
+            akun.level = request.data.get('level', akun.level)
+            akun.deskripsi = request.data.get('deskripsi', akun.deskripsi)
+            akun.harga = request.data.get('harga', akun.harga)
+            if gambar_cover:
+                akun.gambar = gambar_cover
+            akun.save()
+            galeri.simpan(akun, gambar_galeri)
+            delete_image_ids = direct_upload.daftar(request.data, 'delete_images[]')
+            if delete_image_ids:
+                AkunGamingImage.objects.filter(id__in=delete_image_ids, akun=akun).delete()
         serializer = AkunGamingSerializer(akun, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Exception as e:
@@ -857,17 +1058,21 @@ def admin_update_akun(request, pk):
 def admin_create_topup(request):
     """
     Membuat TopUpProduct baru dari dashboard admin.
-    Menerima 'multipart/form-data'.
+    `gambar` berisi public_id hasil upload langsung (lihat api/direct_upload.py).
     """
     # Ambil data dari form
     game = request.data.get('game')
     nama_paket = request.data.get('nama_paket')
     harga = request.data.get('harga')
-    gambar = request.FILES.get('gambar') 
+    gambar = request.data.get('gambar')
 
     # Validasi sederhana
     if not all([game, nama_paket, harga, gambar]):
         return Response({'error': 'Field Game, Nama Paket, Harga, dan Gambar wajib diisi.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        direct_upload.verifikasi({'topup_gambar': [gambar]})
+    except UploadTidakValid as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
         topup = TopUpProduct.objects.create(
@@ -897,7 +1102,7 @@ def admin_get_topup_detail(request, pk):
         return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(['POST']) # Pakai POST untuk multipart/form-data
+@api_view(['POST'])
 @permission_classes([IsAdminUser])
 def admin_update_topup(request, pk):
     """
@@ -911,9 +1116,14 @@ def admin_update_topup(request, pk):
         topup.nama_paket = request.data.get('nama_paket', topup.nama_paket)
         topup.harga = request.data.get('harga', topup.harga)
 
-        # Cek apakah ada gambar baru
-        if 'gambar' in request.FILES:
-            topup.gambar = request.FILES.get('gambar')
+        # Cek apakah ada gambar baru (public_id hasil upload langsung)
+        gambar = request.data.get('gambar')
+        if gambar:
+            try:
+                direct_upload.verifikasi({'topup_gambar': [gambar]})
+            except UploadTidakValid as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            topup.gambar = gambar
 
         topup.save() # Simpan perubahan
 
@@ -927,10 +1137,27 @@ def admin_update_topup(request, pk):
 @permission_classes([IsAdminUser])
 def admin_get_all_coupons(request):
     """
-    Mengambil semua kupon untuk tabel admin.
+    Mengambil semua kupon untuk tabel admin. Jumlah pengguna dan total diskon dibaca
+    dari counter di tabel kupon, jadi jumlah query tetap berapapun jumlah kupon.
+    Filter opsional: aktif (true/false), q (potongan kode). Dengan `cursor`/`page_size`,
+    hasilnya dipaginasi keyset dan bisa diurutkan lewat `sort`
+    (terbaru, terpopuler, diskon_terbesar).
     """
-    coupons = Kupon.objects.all().order_by('-dibuat_pada')
-    serializer = KuponAdminSerializer(coupons, many=True)
+    coupons = Kupon.objects.all()
+    aktif = request.query_params.get('aktif')
+    if aktif in ('true', 'false'):
+        coupons = coupons.filter(aktif=(aktif == 'true'))
+    if request.query_params.get('q'):
+        coupons = coupons.filter(kode__icontains=request.query_params['q'])
+
+    ordering = ADMIN_COUPON_SORTS.get(request.query_params.get('sort'), ADMIN_COUPON_SORTS['terbaru'])
+    if KeysetPagination.is_requested(request):
+        paginator = KeysetPagination(request)
+        page = paginator.paginate_queryset(coupons, ordering)
+        serializer = KuponAdminSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    serializer = KuponAdminSerializer(coupons.order_by(*ordering), many=True)
     return Response(serializer.data)
 
 @api_view(['POST'])
@@ -1040,8 +1267,16 @@ def get_favorite_accounts(request):
     """
     user = request.user
     # Ambil semua akun yang difavoritkan oleh user ini DAN belum terjual
-    favorit_akun = user.favorite_accounts.filter(is_sold=False).order_by('-dibuat_pada')
+    favorit_akun = user.favorite_accounts.for_listing(user).filter(is_sold=False)
+    ordering = ('-dibuat_pada', '-id')
 
+    if KeysetPagination.is_requested(request):
+        paginator = KeysetPagination(request)
+        page = paginator.paginate_queryset(favorit_akun, ordering)
+        serializer = AkunGamingSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+    favorit_akun = favorit_akun.order_by(*ordering)
     # Gunakan serializer yang sama dengan list akun
     serializer = AkunGamingSerializer(favorit_akun, many=True, context={'request': request})
     return Response(serializer.data)
@@ -1090,10 +1325,10 @@ Jika Anda tidak meminta ini, abaikan saja email ini.
 Salam,
 Tim MainAjaa
         """
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
-        print(f"Email reset password dikirim ke {user.email}")
+        queue_email(subject, message, [user.email])
+        print(f"Email reset password diantrekan untuk {user.email}")
     except Exception as e:
-        print(f"ERROR: Gagal mengirim email reset password: {e}")
+        print(f"ERROR: Gagal mengantrekan email reset password: {e}")
         return Response({'error': 'Gagal mengirim email.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     return Response({'success': 'Jika email terdaftar, link reset telah dikirim.'}, status=status.HTTP_200_OK)
@@ -1164,11 +1399,25 @@ def submit_review(request, purchase_id):
     if pembelian.rating is not None:
         return Response({'error': 'Anda sudah pernah memberi ulasan untuk pesanan ini.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Simpan ulasan
     try:
-        pembelian.rating = int(rating)
-        pembelian.ulasan = ulasan
-        pembelian.save()
+        rating = int(rating)
+    except (TypeError, ValueError):
+        rating = None
+    if rating not in range(1, 6):
+        return Response({'error': 'Rating harus angka 1 sampai 5.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Simpan ulasan (dan ringkasan rating game-nya) dalam satu transaksi. Baris pesanan
+    # dikunci supaya dua submit bersamaan tidak tercatat dua kali di ringkasan.
+    try:
+        with transaction.atomic():
+            pembelian = Pembelian.objects.select_for_update(of=('self',)).select_related('akun').get(pk=pembelian.pk)
+            if pembelian.rating is not None:
+                return Response({'error': 'Anda sudah pernah memberi ulasan untuk pesanan ini.'}, status=status.HTTP_400_BAD_REQUEST)
+            pembelian.rating = rating
+            pembelian.ulasan = ulasan
+            pembelian.save()
+            if pembelian.akun:
+                RingkasanRating.tambah(pembelian.akun.game, rating)
         
         # Kirim kembali data ulasan yang sudah disimpan (atau cukup sukses)
         return Response({
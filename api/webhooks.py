@@ -0,0 +1,318 @@
+"""
+Pemrosesan notifikasi Midtrans (AKUN dan TOPUP).
+
+Midtrans mengirim ulang notifikasi, dan bisa mengirim settlement dan expire untuk
+order yang sama secara bersamaan. Karena itu:
+  - setiap (transaction_id, transaction_status) hanya diproses sekali (tabel
+    MidtransNotifikasi); kiriman duplikat selesai dalam satu lookup index,
+  - baris pesanan dikunci (select_for_update) selama status diubah,
+  - perpindahan status mengikuti TRANSISI_STATUS, jadi pesanan yang sudah
+    COMPLETED tidak bisa mundur ke CANCELED (dan sebaliknya),
+  - pesanan Akun yang lunas setelah akunnya terjual ke pesanan lain (atau dihapus)
+    menjadi REFUND: tanpa email kredensial, kupon, maupun revenue, untuk ditinjau admin.
+
+Endpoint webhook hanya memverifikasi signature dan menyimpan notifikasi ke
+MidtransInbox (simpan_ke_inbox), jadi Midtrans langsung mendapat 200. Pemrosesan
+dilakukan worker lewat proses_inbox().
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection as db_connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import reservasi
+from .crypto import DekripsiGagal, decrypt_data
+from .models import (
+    AkunGaming, DashboardStats, Kupon, MidtransInbox, MidtransNotifikasi, Pembelian, TopUpPembelian,
+)
+from .outbox import queue_email
+
+MAX_BACKOFF = timedelta(minutes=10)
+
+# transaction_status Midtrans -> status pesanan
+STATUS_MIDTRANS = {
+    'capture': 'COMPLETED',
+    'settlement': 'COMPLETED',
+    'cancel': 'CANCELED',
+    'expire': 'CANCELED',
+    'deny': 'CANCELED',
+}
+
+# Status pesanan -> status yang boleh dituju. COMPLETED, CANCELED dan REFUND final.
+TRANSISI_STATUS = {
+    'PENDING': {'COMPLETED', 'CANCELED', 'REFUND'},
+    'COMPLETED': set(),
+    'CANCELED': set(),
+    'REFUND': set(),
+}
+
+
+def buat_signature_key(order_id, status_code, gross_amount):
+    """Membuat signature key untuk verifikasi webhook Midtrans"""
+    server_key = settings.MIDTRANS_SERVER_KEY
+    string_to_hash = f"{order_id}{status_code}{gross_amount}{server_key}"
+    return hashlib.sha512(string_to_hash.encode()).hexdigest()
+
+
+def signature_valid(data):
+    expected = buat_signature_key(data.get('order_id'), data.get('status_code'), data.get('gross_amount'))
+    return data.get('signature_key') == expected
+
+
+def email_lunas(pembelian):
+    """
+    Menyusun (subject, message) email LUNAS untuk pesanan Akun atau Top Up.
+    Untuk pesanan Akun, email berisi kredensial akun yang sudah didekripsi.
+    Melempar DekripsiGagal jika kredensial tidak bisa dibaca: proses_notifikasi
+    ikut di-rollback (pesanan tetap PENDING, tanpa email) dan inbox mengulanginya
+    dengan backoff, jadi notifikasi bisa diproses lagi setelah FERNET_KEYS dibetulkan.
+    """
+    subject = ''
+    message = ''
+    if isinstance(pembelian, Pembelian) and pembelian.akun:
+        # Dekripsi data akun untuk dikirim
+        try:
+            akun_email_dec = decrypt_data(pembelian.akun.akun_email)
+            akun_pass_dec = decrypt_data(pembelian.akun.akun_password)
+        except DekripsiGagal as e:
+            raise DekripsiGagal(
+                f"Kredensial akun {pembelian.akun_id} untuk {pembelian.kode_transaksi} tidak bisa didekripsi: {e}"
+            ) from e
+
+        subject = f'Pesanan LUNAS - Kode: {pembelian.kode_transaksi}'
+        message = f"""
+Halo {pembelian.pembeli.username},
+
+Pembayaran Anda untuk pesanan {pembelian.kode_transaksi} ({pembelian.akun.nama_akun}) telah berhasil!
+
+Berikut adalah detail data akun yang Anda beli:
+----------------------------------
+Email/Username Akun: {akun_email_dec}
+Password Akun: {akun_pass_dec}
+----------------------------------
+
+Harap segera amankan akun Anda. Data ini juga dapat diakses melalui halaman 'Riwayat Pesanan' di profil Anda (setelah kami menyiapkannya).
+
+Terima kasih telah berbelanja,
+Tim MainAjaa
+        """
+
+    elif isinstance(pembelian, TopUpPembelian):
+        nama_paket = pembelian.produk.nama_paket if pembelian.produk else 'Produk Dihapus'
+        subject = f'Pesanan Top Up LUNAS - Kode: {pembelian.kode_transaksi}'
+        message = f"""
+Halo {pembelian.pembeli.username},
+
+Pembayaran Anda untuk pesanan Top Up {pembelian.kode_transaksi} ({nama_paket}) telah berhasil!
+
+Top up Anda akan segera kami proses ke:
+Game ID: {pembelian.game_user_id} {pembelian.game_zone_id or ''}
+
+Terima kasih telah berbelanja,
+Tim MainAjaa
+        """
+    return subject, message
+
+
+class PesananTidakDitemukan(Exception):
+    pass
+
+
+def _model_pesanan(order_id):
+    if order_id.startswith('AKUN-'):
+        return Pembelian
+    if order_id.startswith('TOPUP-'):
+        return TopUpPembelian
+    return None
+
+
+def _kunci_dedupe(data):
+    # transaction_id selalu ada di notifikasi Midtrans; order_id hanya cadangan.
+    return data.get('transaction_id') or data.get('order_id'), data.get('transaction_status')
+
+
+def sudah_diproses(data):
+    transaction_id, transaction_status = _kunci_dedupe(data)
+    return MidtransNotifikasi.objects.filter(
+        transaction_id=transaction_id, transaction_status=transaction_status,
+    ).exists()
+
+
+def _akun_tersedia(pembelian):
+    """Mengunci akun pesanan; False jika akun sudah dihapus atau sudah terjual."""
+    if not pembelian.akun_id:
+        return False
+    akun = AkunGaming.objects.select_for_update().filter(pk=pembelian.akun_id).first()
+    return akun is not None and not akun.is_sold
+
+
+def _tandai_refund(pembelian):
+    print(f"WEBHOOK PERINGATAN: Akun untuk pesanan {pembelian.kode_transaksi} sudah terjual atau dihapus; "
+          f"pesanan ditandai REFUND.")
+    subject = f'Pesanan Perlu Refund - Kode: {pembelian.kode_transaksi}'
+    message = f"""
+Halo {pembelian.pembeli.username},
+
+Pembayaran Anda untuk pesanan {pembelian.kode_transaksi} sudah kami terima, tetapi akun yang Anda pesan sudah tidak tersedia.
+
+Tim kami akan memproses pengembalian dana (refund) Anda dan menghubungi Anda melalui email ini.
+
+Mohon maaf atas ketidaknyamanannya,
+Tim MainAjaa
+        """
+    queue_email(subject, message, [pembelian.pembeli.email])
+
+
+def _tandai_lunas(pembelian):
+    if isinstance(pembelian, Pembelian) and pembelian.akun_id:
+        # Sudah dikunci dan dicek belum terjual oleh _akun_tersedia.
+        akun = AkunGaming.objects.select_for_update().get(pk=pembelian.akun_id)
+        if akun.sedang_dipesan and akun.dipesan_oleh_id != pembelian.pembeli_id:
+            print(f"WEBHOOK PERINGATAN: Akun {akun.id} sedang dipesan pembeli lain; reservasinya "
+                  f"dilepas karena pesanan {pembelian.kode_transaksi} lunas.")
+        akun.is_sold = True
+        # Terjual: reservasi checkout tidak diperlukan lagi (lihat api/reservasi.py).
+        akun.dipesan_oleh = None
+        akun.dipesan_hingga = None
+        akun.save()
+        DashboardStats.catat_akun_terjual()
+        pembelian.akun = akun
+        print(f"WEBHOOK SUKSES: Akun {akun.id} ditandai terjual.")
+
+    if pembelian.kupon_id:
+        # jumlah_pengguna ikut naik lewat sinyal m2m_changed.
+        pembelian.kupon.digunakan_oleh.add(pembelian.pembeli_id)
+        Kupon.catat_diskon(pembelian)
+
+    subject, message = email_lunas(pembelian)
+    if subject and message:
+        queue_email(subject, message, [pembelian.pembeli.email])
+        print(f"WEBHOOK SUKSES: Email konfirmasi untuk {pembelian.kode_transaksi} diantrekan.")
+
+
+def proses_notifikasi(data):
+    """
+    Menerapkan satu notifikasi Midtrans (signature sudah diverifikasi pemanggil).
+    Mengembalikan string hasil: 'duplikat', 'diabaikan', 'ditolak' atau status baru
+    (termasuk 'REFUND' untuk pesanan Akun yang akunnya sudah tidak tersedia).
+    Melempar PesananTidakDitemukan jika order_id tidak dikenal.
+    """
+    order_id = data.get('order_id') or ''
+    status_baru = STATUS_MIDTRANS.get(data.get('transaction_status'))
+    if status_baru is None:
+        # pending, refund, dll: tidak mengubah status pesanan.
+        return 'diabaikan'
+
+    model = _model_pesanan(order_id)
+    if model is None:
+        raise PesananTidakDitemukan(order_id)
+
+    if sudah_diproses(data):
+        return 'duplikat'
+
+    transaction_id, transaction_status = _kunci_dedupe(data)
+    with transaction.atomic():
+        pembelian = model.objects.select_for_update(of=('self',)).filter(kode_transaksi=order_id).first()
+        if pembelian is None:
+            raise PesananTidakDitemukan(order_id)
+
+        # Setelah baris pesanan terkunci, kiriman paralel yang sama akan bentrok di
+        # unique index dan keluar di sini tanpa mengulang efek samping.
+        try:
+            with transaction.atomic():
+                MidtransNotifikasi.objects.create(
+                    transaction_id=transaction_id, transaction_status=transaction_status, order_id=order_id,
+                )
+        except IntegrityError:
+            return 'duplikat'
+
+        status_lama = pembelian.status
+        if status_baru == status_lama:
+            return status_lama
+        if status_baru not in TRANSISI_STATUS.get(status_lama, set()):
+            print(f"WEBHOOK DITOLAK: {order_id} tidak boleh pindah dari {status_lama} ke {status_baru}.")
+            return 'ditolak'
+
+        if status_baru == 'COMPLETED' and isinstance(pembelian, Pembelian) and not _akun_tersedia(pembelian):
+            status_baru = 'REFUND'
+
+        pembelian.status = status_baru
+        pembelian.save(update_fields=['status'])
+        # REFUND bukan COMPLETED, jadi tidak menambah revenue.
+        DashboardStats.catat_status_pesanan(pembelian, status_lama)
+        if status_baru == 'COMPLETED':
+            _tandai_lunas(pembelian)
+        elif status_baru == 'REFUND':
+            _tandai_refund(pembelian)
+        elif isinstance(pembelian, Pembelian):
+            reservasi.lepas_untuk_pesanan(pembelian)
+        print(f"WEBHOOK SUKSES: Status untuk {order_id} diupdate ke {status_baru}.")
+        return status_baru
+
+
+# --- Inbox ---
+
+def simpan_ke_inbox(data):
+    """Menyimpan notifikasi (signature sudah diverifikasi) untuk diproses worker."""
+    return MidtransInbox.objects.create(order_id=data.get('order_id') or '', payload=dict(data))
+
+
+def _backoff(percobaan):
+    detik = settings.WEBHOOK_INBOX_BACKOFF_SECONDS * (2 ** (percobaan - 1))
+    return min(timedelta(seconds=detik), MAX_BACKOFF)
+
+
+def proses_inbox(batch_size=None):
+    """
+    Memproses satu batch notifikasi PENDING yang sudah jatuh tempo.
+
+    Urutan per order_id dijaga: baris hanya diambil jika tidak ada baris PENDING
+    yang lebih lama untuk order yang sama, termasuk yang sedang menunggu retry atau
+    sedang dipegang worker lain (skip_locked). Notifikasi untuk order berbeda tetap
+    bisa diproses paralel oleh beberapa worker.
+    Mengembalikan (jumlah selesai, jumlah gagal).
+    """
+    batch_size = batch_size or settings.WEBHOOK_INBOX_BATCH_SIZE
+    lebih_lama = MidtransInbox.objects.filter(
+        status='PENDING', order_id=OuterRef('order_id'), id__lt=OuterRef('id'),
+    )
+    selesai = gagal = 0
+    with transaction.atomic():
+        batch = list(
+            MidtransInbox.objects
+            .select_for_update(skip_locked=db_connection.features.has_select_for_update_skip_locked)
+            .filter(status='PENDING', proses_setelah__lte=timezone.now())
+            .filter(~Exists(lebih_lama))
+            .order_by('proses_setelah', 'id')[:batch_size]
+        )
+        for notifikasi in batch:
+            try:
+                with transaction.atomic():
+                    notifikasi.hasil = proses_notifikasi(notifikasi.payload)
+            except PesananTidakDitemukan:
+                # Tidak akan berhasil dengan retry.
+                gagal += 1
+                notifikasi.status = 'FAILED'
+                notifikasi.error_terakhir = 'Order tidak ditemukan'
+                print(f"WEBHOOK GAGAL: Order {notifikasi.order_id} tidak ditemukan (inbox #{notifikasi.id}).")
+            except Exception as e:
+                gagal += 1
+                notifikasi.percobaan += 1
+                notifikasi.error_terakhir = str(e)
+                if notifikasi.percobaan >= settings.WEBHOOK_INBOX_MAX_ATTEMPTS:
+                    notifikasi.status = 'FAILED'
+                else:
+                    notifikasi.proses_setelah = timezone.now() + _backoff(notifikasi.percobaan)
+                print(f"WEBHOOK ERROR: Gagal memproses inbox #{notifikasi.id} ({notifikasi.order_id}): {e}")
+            else:
+                selesai += 1
+                notifikasi.status = 'DONE'
+                notifikasi.error_terakhir = ''
+            notifikasi.diproses_pada = timezone.now()
+        MidtransInbox.objects.bulk_update(
+            batch, ['status', 'hasil', 'percobaan', 'proses_setelah', 'error_terakhir', 'diproses_pada']
+        )
+    return selesai, gagal
@@ -3,6 +3,7 @@
 from pathlib import Path
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -72,6 +73,31 @@ DATABASES = {
     )
 }
 
+# Cache - Redis jika REDIS_URL diisi (butuh paket `redis`), selain itu memori lokal
+# per proses. Dengan LocMemCache, invalidasi hanya terlihat oleh worker yang
+# menulis, jadi worker lain bisa melayani data lama sampai CATALOG_CACHE_TIMEOUT.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'mainajaa',
+        }
+    }
+
+# Cache respons katalog publik (api/catalog_cache.py)
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', 60))
+# Snapshot kupon aktif per proses (api/kupon_cache.py), detik
+KUPON_CACHE_TTL = int(os.environ.get('KUPON_CACHE_TTL', 30))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -122,19 +148,72 @@ CORS_ALLOW_CREDENTIALS = True
 MIDTRANS_SERVER_KEY = os.environ.get('MIDTRANS_SERVER_KEY')
 MIDTRANS_CLIENT_KEY = os.environ.get('MIDTRANS_CLIENT_KEY')
 MIDTRANS_IS_PRODUCTION = False
+# Klien Snap bersama (api/payment.py): timeout (detik) dan ukuran connection pool
+MIDTRANS_CONNECT_TIMEOUT = float(os.environ.get('MIDTRANS_CONNECT_TIMEOUT', 3.05))
+MIDTRANS_READ_TIMEOUT = float(os.environ.get('MIDTRANS_READ_TIMEOUT', 15))
+MIDTRANS_POOL_SIZE = int(os.environ.get('MIDTRANS_POOL_SIZE', 10))
+# Kosongkan untuk memakai URL Snap resmi; isi untuk mengarah ke stand-in lokal
+MIDTRANS_SNAP_BASE_URL = os.environ.get('MIDTRANS_SNAP_BASE_URL') or None
 
 # Encryption
 FERNET_KEY = os.environ.get('FERNET_KEY')
+# Daftar kunci dipisah koma, kunci terbaru di depan (lihat api/crypto.py).
+# Jika kosong, hanya FERNET_KEY yang dipakai.
+FERNET_KEYS = [k.strip() for k in os.environ.get('FERNET_KEYS', '').split(',') if k.strip()] or [FERNET_KEY]
 
 # Email Configuration
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() in ('true', '1', 't')
 EMAIL_HOST_USER = os.environ.get('EMAIL_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Email outbox (lihat api/outbox.py & manage.py send_outbox_emails)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.environ.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.environ.get('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+
+# Inbox webhook Midtrans (lihat api/webhooks.py & manage.py process_webhook_inbox)
+WEBHOOK_INBOX_BATCH_SIZE = int(os.environ.get('WEBHOOK_INBOX_BATCH_SIZE', 50))
+WEBHOOK_INBOX_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_INBOX_MAX_ATTEMPTS', 8))
+WEBHOOK_INBOX_BACKOFF_SECONDS = int(os.environ.get('WEBHOOK_INBOX_BACKOFF_SECONDS', 10))
+
+# Turunan gambar katalog (lihat api/images.py & manage.py process_image_jobs)
+# Lebar maksimum per ukuran (px); gambar yang lebih kecil tidak diperbesar.
+IMAGE_DERIVATIVE_SIZES = {'thumbnail': 160, 'card': 480, 'full': 1280}
+IMAGE_DERIVATIVE_QUALITY = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', 80))
+IMAGE_JOB_BATCH_SIZE = int(os.environ.get('IMAGE_JOB_BATCH_SIZE', 10))
+IMAGE_JOB_MAX_ATTEMPTS = int(os.environ.get('IMAGE_JOB_MAX_ATTEMPTS', 5))
+IMAGE_JOB_BACKOFF_SECONDS = int(os.environ.get('IMAGE_JOB_BACKOFF_SECONDS', 30))
+IMAGE_JOB_LEASE_SECONDS = int(os.environ.get('IMAGE_JOB_LEASE_SECONDS', 600))
+
+# Import massal akun (lihat api/akun_import.py & manage.py import_akun)
+AKUN_IMPORT_CHUNK_SIZE = int(os.environ.get('AKUN_IMPORT_CHUNK_SIZE', 200))
+AKUN_IMPORT_DOWNLOAD_WORKERS = int(os.environ.get('AKUN_IMPORT_DOWNLOAD_WORKERS', 8))
+AKUN_IMPORT_IMAGE_TIMEOUT = int(os.environ.get('AKUN_IMPORT_IMAGE_TIMEOUT', 10))
+AKUN_IMPORT_IMAGE_MAX_BYTES = int(os.environ.get('AKUN_IMPORT_IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+
+# Upload gambar langsung ke media storage (lihat api/direct_upload.py)
+DIRECT_UPLOAD_TTL_SECONDS = int(os.environ.get('DIRECT_UPLOAD_TTL_SECONDS', 600))
+DIRECT_UPLOAD_MAX_FILES = int(os.environ.get('DIRECT_UPLOAD_MAX_FILES', 20))
+DIRECT_UPLOAD_MAX_BYTES = int(os.environ.get('DIRECT_UPLOAD_MAX_BYTES', 10 * 1024 * 1024))
+DIRECT_UPLOAD_VERIFY_WORKERS = int(os.environ.get('DIRECT_UPLOAD_VERIFY_WORKERS', 4))
+
+# Reservasi akun saat checkout (lihat api/reservasi.py & manage.py release_expired_reservations)
+AKUN_RESERVASI_TTL_SECONDS = int(os.environ.get('AKUN_RESERVASI_TTL_SECONDS', 15 * 60))
+# Expiry Midtrans dihitung dalam menit penuh dari sisa reservasi, jadi reservasi yang
+# lebih pendek dari 2 menit bisa menyisakan kurang dari satu menit untuk membayar.
+if AKUN_RESERVASI_TTL_SECONDS < 120:
+    raise ImproperlyConfigured('AKUN_RESERVASI_TTL_SECONDS minimal 120 detik.')
+AKUN_RESERVASI_BATCH_SIZE = int(os.environ.get('AKUN_RESERVASI_BATCH_SIZE', 500))
+
+# Mutasi massal admin (lihat api/bulk.py)
+ADMIN_BULK_MAX_OPERATIONS = int(os.environ.get('ADMIN_BULK_MAX_OPERATIONS', 50))
+ADMIN_BULK_MAX_ITEMS = int(os.environ.get('ADMIN_BULK_MAX_ITEMS', 1000))
+
 # Security Settings untuk Production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -0,0 +1,31 @@
+#!/usr/bin/env bash
+# start.sh - perintah start deploy (lihat railway.json)
+
+# Keluar jika ada error
+set -o errexit
+
+# 1. Jalankan migrasi database
+python manage.py migrate
+
+# 2. Kumpulkan file statis (untuk Admin)
+python manage.py collectstatic --noinput
+
+# 3. Worker latar belakang; dijalankan ulang otomatis jika berhenti
+jalankan_worker() {
+    while true; do
+        python manage.py "$@" || echo "Worker $1 berhenti (exit $?), dijalankan ulang dalam 5 detik."
+        sleep 5
+    done
+}
+
+# Kirim email dari outbox (api/outbox.py)
+jalankan_worker send_outbox_emails --loop &
+
+# Proses notifikasi Midtrans dari inbox webhook (api/webhooks.py)
+jalankan_worker process_webhook_inbox --loop &
+
+# Buat thumbnail/turunan gambar dari antrean (process_image_jobs)
+jalankan_worker process_image_jobs --loop &
+
+# 4. Web server
+exec gunicorn backend.wsgi:application --bind 0.0.0.0:$PORT